@@ -0,0 +1,69 @@
+"""Benchmark: Monte Carlo season projection (utils/simulation.py).
+
+Builds a synthetic league halfway through a double round robin and times
+`simulate` for 10/20/40 teams, then checks that every run placed each team
+exactly once. The target is a 20-team league x 10k runs in under a second.
+
+Usage:
+    python ligapro_manager/benchmarks/bench_simulation.py [--runs N] [--workers N]
+"""
+import sys
+import os
+import argparse
+import time
+from itertools import combinations
+
+import numpy as np
+
+# Add the package directory to sys.path to import utils like bootstrap.py does
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.simulation import SeasonModel, simulate, run_simulation
+
+
+def synthetic_model(num_teams, seed=1):
+    """First round robin played (random table), second one still pending."""
+    rng = np.random.default_rng(seed)
+    pairs = list(combinations(range(num_teams), 2))
+    played = len(pairs) * 2 // num_teams
+    points = rng.integers(0, 3 * played, num_teams)
+    goals_for = rng.integers(played // 2, played * 2, num_teams)
+    goals_against = rng.integers(played // 2, played * 2, num_teams)
+    return SeasonModel(
+        points=points,
+        goals_for=goals_for,
+        goals_against=goals_against,
+        shutdown_wins=np.zeros(num_teams, dtype=np.int64),
+        manual=np.zeros(num_teams, dtype=np.int64),
+        fixtures_home=np.array([b for _, b in pairs], dtype=np.intp),
+        fixtures_away=np.array([a for a, _ in pairs], dtype=np.intp),
+        expected_home=rng.uniform(0.8, 2.2, len(pairs)),
+        expected_away=rng.uniform(0.6, 1.8, len(pairs)),
+        win_points=3,
+        draw_points=1,
+        shutdown_enabled=False,
+        tiebreakers=('points', 'goal_difference', 'goals_for')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'teams':>5} {'fixtures':>8} {'runs':>7} {'seconds':>8}")
+    for num_teams in (10, 20, 40):
+        model = synthetic_model(num_teams)
+        simulate(model, 100, seed=0)  # warm-up
+
+        start = time.perf_counter()
+        counts = run_simulation(model, args.runs, workers=args.workers, seed=0)
+        elapsed = time.perf_counter() - start
+
+        assert (counts.sum(axis=0) == args.runs).all() and (counts.sum(axis=1) == args.runs).all()
+        print(f"{num_teams:>5} {len(model.fixtures_home):>8} {args.runs:>7} {elapsed:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
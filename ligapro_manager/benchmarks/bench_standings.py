@@ -0,0 +1,140 @@
+"""Benchmark: single-pass standings engine vs the original nested loop.
+
+Builds synthetic leagues of 10/20/40 teams playing 1-5 rounds (num_vueltas),
+checks that both implementations produce the same table and prints timings.
+
+Usage:
+    python ligapro_manager/benchmarks/bench_standings.py [--repeat N]
+"""
+import sys
+import os
+import random
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# Add the package directory to sys.path to import utils like bootstrap.py does
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.standings_engine import StandingsEngine
+
+
+def legacy_standings(teams, matches, win_points=3, draw_points=1, shutdown_enabled=False):
+    """Original calculate_standings loop (one pass over the matches per team)."""
+    standings = []
+    for team in teams:
+        stats = {
+            'team': team,
+            'played': 0,
+            'won': 0,
+            'drawn': 0,
+            'lost': 0,
+            'goals_for': 0,
+            'goals_against': 0,
+            'goal_difference': 0,
+            'points': (team.manual_points_modifier or 0)
+        }
+
+        for match in matches:
+            if match.home_team_id == team.id:
+                stats['played'] += 1
+                stats['goals_for'] += match.home_score or 0
+                stats['goals_against'] += match.away_score or 0
+
+                if match.home_score > match.away_score:
+                    stats['won'] += 1
+                    stats['points'] += win_points
+                elif match.home_score == match.away_score:
+                    stats['drawn'] += 1
+                    if shutdown_enabled and getattr(match, 'shutdown_winner_id', None):
+                        if match.shutdown_winner_id == team.id:
+                            stats['points'] += 2
+                        else:
+                            stats['points'] += 1
+                    else:
+                        stats['points'] += draw_points
+                else:
+                    stats['lost'] += 1
+
+            elif match.away_team_id == team.id:
+                stats['played'] += 1
+                stats['goals_for'] += match.away_score or 0
+                stats['goals_against'] += match.home_score or 0
+
+                if match.away_score > match.home_score:
+                    stats['won'] += 1
+                    stats['points'] += win_points
+                elif match.away_score == match.home_score:
+                    stats['drawn'] += 1
+                    if shutdown_enabled and getattr(match, 'shutdown_winner_id', None):
+                        if match.shutdown_winner_id == team.id:
+                            stats['points'] += 2
+                        else:
+                            stats['points'] += 1
+                    else:
+                        stats['points'] += draw_points
+                else:
+                    stats['lost'] += 1
+
+        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+        standings.append(stats)
+
+    standings.sort(key=lambda x: (x['points'], x['goal_difference'], x['goals_for']), reverse=True)
+    return standings
+
+
+def synthetic_league(num_teams, num_vueltas, seed=0):
+    """Every pair plays once per round, with random scores and shutdown winners."""
+    rng = random.Random(seed)
+    teams = [SimpleNamespace(id=f"team-{i}", manual_points_modifier=rng.choice([0, 0, 0, -1, 2]))
+             for i in range(num_teams)]
+    matches = []
+    start = datetime(2025, 1, 1)
+    for r in range(num_vueltas):
+        for i, team_a in enumerate(teams):
+            for team_b in teams[i + 1:]:
+                # Home and away flip on even rounds
+                home, away = (team_b, team_a) if r % 2 else (team_a, team_b)
+                home_score, away_score = rng.randint(0, 4), rng.randint(0, 4)
+                matches.append(SimpleNamespace(
+                    id=f"match-{len(matches)}",
+                    home_team_id=home.id,
+                    away_team_id=away.id,
+                    home_score=home_score,
+                    away_score=away_score,
+                    shutdown_winner_id=rng.choice([home.id, away.id]) if home_score == away_score else None,
+                    match_date=start + timedelta(days=len(matches) // 5)
+                ))
+    return teams, matches
+
+
+def table(rows):
+    fields = ('played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'goal_difference', 'points')
+    return [(row['team'].id,) + tuple(row[f] for f in fields) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='runs per measurement')
+    args = parser.parse_args()
+
+    print(f"{'teams':>5} {'rounds':>6} {'matches':>7} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}")
+    for num_teams in (10, 20, 40):
+        for num_vueltas in range(1, 6):
+            teams, matches = synthetic_league(num_teams, num_vueltas, seed=num_teams * 10 + num_vueltas)
+            engine = StandingsEngine(shutdown_enabled=True)
+
+            expected = table(legacy_standings(teams, matches, shutdown_enabled=True))
+            actual = table(engine.standings(teams, matches))
+            if expected != actual:
+                raise SystemExit(f"Mismatch for {num_teams} teams x {num_vueltas} rounds")
+
+            legacy = timeit.timeit(lambda: legacy_standings(teams, matches, shutdown_enabled=True), number=args.repeat)
+            single = timeit.timeit(lambda: engine.standings(teams, matches), number=args.repeat)
+            print(f"{num_teams:>5} {num_vueltas:>6} {len(matches):>7} "
+                  f"{legacy / args.repeat * 1000:>10.2f} {single / args.repeat * 1000:>10.2f} {legacy / single:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
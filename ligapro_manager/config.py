@@ -13,6 +13,26 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', f'sqlite:///{db_path}')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Default standings tiebreak chain (see utils/standings_engine.TIEBREAK_RULES); premium leagues pick their own
+    STANDINGS_TIEBREAKERS = os.environ.get('STANDINGS_TIEBREAKERS', 'points,goal_difference,goals_for').split(',')
+
+    # Development aid: report the number of SQL queries per request in X-Query-Count
+    QUERY_COUNT_HEADER = os.environ.get('QUERY_COUNT_HEADER', 'false').lower() == 'true'
+
+    # Rendered fragment cache (utils/fragment_cache.py); set the dir to share it between workers
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    FRAGMENT_CACHE_DIR = os.environ.get('FRAGMENT_CACHE_DIR')
+
+    # Per-league computed data (utils/cache.py: clinch, projections, what-if...) kept per worker
+    LEAGUE_CACHE_MAX_ENTRIES = int(os.environ.get('LEAGUE_CACHE_MAX_ENTRIES', 1024))
+
+    # How long a match holds its court; closer starts on the same court are a double booking
+    MATCH_DURATION_MINUTES = int(os.environ.get('MATCH_DURATION_MINUTES', 60))
+
+    # Season projections (utils/simulation.py); more than one worker uses a process pool
+    SIMULATION_RUNS = int(os.environ.get('SIMULATION_RUNS', 10000))
+    SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', 1))
+    
     # Stripe Config
     STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY')
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
@@ -1,6 +1,12 @@
+from flask import current_app
 from flask_wtf import FlaskForm
-from wtforms import StringField, IntegerField, BooleanField
+from wtforms import StringField, IntegerField, BooleanField, SelectField
 from wtforms.validators import DataRequired, Length, NumberRange, Optional
+from utils.standings_engine import TIEBREAK_RULES, TIEBREAK_LABELS, parse_tiebreakers
+
+# Criteria after points; the first one breaks ties on points
+TIEBREAKER_SLOTS = ('tiebreaker_1', 'tiebreaker_2', 'tiebreaker_3', 'tiebreaker_4')
+TIEBREAKER_CHOICES = [('', 'Ninguno')] + [(rule, TIEBREAK_LABELS[rule]) for rule in TIEBREAK_RULES if rule != 'points']
 
 class LeagueForm(FlaskForm):
     name = StringField('Nombre de la Liga', validators=[DataRequired(), Length(min=2, max=100)])
@@ -32,3 +38,20 @@ class LeagueForm(FlaskForm):
     show_player_registration_date = BooleanField('Mostrar fecha de registro de los jugadores', default=False)
     enable_player_limit = BooleanField('Establecer límite de jugadores por equipo', default=False)
     max_players_per_team = IntegerField('Límite de jugadores', validators=[Optional(), NumberRange(min=1)], default=15)
+    tiebreaker_1 = SelectField('1er Criterio', choices=TIEBREAKER_CHOICES, validators=[Optional()])
+    tiebreaker_2 = SelectField('2do Criterio', choices=TIEBREAKER_CHOICES, validators=[Optional()])
+    tiebreaker_3 = SelectField('3er Criterio', choices=TIEBREAKER_CHOICES, validators=[Optional()])
+    tiebreaker_4 = SelectField('4to Criterio', choices=TIEBREAKER_CHOICES, validators=[Optional()])
+
+    def __init__(self, *args, **kwargs):
+        # Spread the league's chain (or the app default) over the criteria selects
+        league = kwargs.get('obj')
+        chain = parse_tiebreakers(league.tiebreakers if league is not None and league.tiebreakers
+                                  else current_app.config.get('STANDINGS_TIEBREAKERS'))
+        for slot, rule in zip(TIEBREAKER_SLOTS, chain[1:]):
+            kwargs.setdefault(slot, rule)
+        super().__init__(*args, **kwargs)
+
+    def tiebreaker_chain(self):
+        """Selected criteria as stored in League.tiebreakers."""
+        return ','.join(parse_tiebreakers([getattr(self, slot).data for slot in TIEBREAKER_SLOTS]))
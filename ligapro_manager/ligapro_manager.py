@@ -5,6 +5,7 @@ from routes import register_blueprints
 from config import Config
 from models import User
 import stripe
+import click
 import os
 
 def create_app(config_class=Config):
@@ -21,6 +22,21 @@ def create_app(config_class=Config):
     bcrypt.init_app(app)
     login_manager.init_app(app)
 
+    # Bump League.revision on every write to a league's data
+    from utils.cache import init_revision_tracking, configure_league_cache
+    init_revision_tracking()
+    configure_league_cache(app.config['LEAGUE_CACHE_MAX_ENTRIES'])
+
+    # Tag regular matches with the group both teams play in
+    from utils.groups import init_group_tagging
+    init_group_tagging()
+
+    from utils.query_count import init_query_counter
+    init_query_counter(app)
+
+    from utils.fragment_cache import init_fragment_cache
+    init_fragment_cache(app)
+
     # Register Blueprints
     register_blueprints(app)
 
@@ -140,7 +156,30 @@ def run_migrations():
                     "ALTER TABLE leagues ADD COLUMN enable_player_limit BOOLEAN DEFAULT FALSE",
                     "ALTER TABLE leagues ADD COLUMN max_players_per_team INTEGER",
                     "ALTER TABLE users ADD COLUMN player_registry_template VARCHAR(20) DEFAULT 'registro1'",
-                    "ALTER TABLE leagues ADD COLUMN display_order INTEGER DEFAULT 0"
+                    "ALTER TABLE leagues ADD COLUMN display_order INTEGER DEFAULT 0",
+                    "ALTER TABLE leagues ADD COLUMN standings_signature VARCHAR(50)",
+                    "ALTER TABLE leagues ADD COLUMN revision INTEGER NOT NULL DEFAULT 0",
+                    "ALTER TABLE players ADD COLUMN normalized_name VARCHAR(100)",
+                    "ALTER TABLE season_stats ADD COLUMN normalized_name VARCHAR(100)",
+                    "CREATE INDEX IF NOT EXISTS ix_players_team_normalized_name ON players (team_id, normalized_name)",
+                    "CREATE INDEX IF NOT EXISTS ix_season_stats_team_normalized_name ON season_stats (team_id, normalized_name)",
+                    "CREATE INDEX IF NOT EXISTS ix_matches_league_date ON matches (league_id, match_date, id)",
+                    "CREATE INDEX IF NOT EXISTS ix_matches_home_date ON matches (home_team_id, match_date, id)",
+                    "CREATE INDEX IF NOT EXISTS ix_matches_away_date ON matches (away_team_id, match_date, id)",
+                    "CREATE INDEX IF NOT EXISTS ix_matches_court_date ON matches (court_id, match_date)",
+                    "CREATE INDEX IF NOT EXISTS ix_courts_league_name ON courts (league_id, name)",
+                    "CREATE INDEX IF NOT EXISTS ix_leagues_user_id ON leagues (user_id)",
+                    "ALTER TABLE matches ADD COLUMN playoff_tie_id VARCHAR(36) REFERENCES playoff_ties(id)",
+                    "CREATE INDEX IF NOT EXISTS ix_matches_playoff_tie_id ON matches (playoff_tie_id)",
+                    "ALTER TABLE leagues ADD COLUMN ratings_signature VARCHAR(50)",
+                    "ALTER TABLE leagues ADD COLUMN ratings_last_date TIMESTAMP",
+                    "ALTER TABLE leagues ADD COLUMN ratings_last_id VARCHAR(36)",
+                    "ALTER TABLE leagues ADD COLUMN tiebreakers VARCHAR(100)",
+                    "ALTER TABLE teams ADD COLUMN group_id VARCHAR(36) REFERENCES league_groups(id)",
+                    "ALTER TABLE matches ADD COLUMN group_id VARCHAR(36) REFERENCES league_groups(id)",
+                    "CREATE INDEX IF NOT EXISTS ix_teams_group_id ON teams (group_id)",
+                    "CREATE INDEX IF NOT EXISTS ix_matches_group_id ON matches (group_id)",
+                    "ALTER TABLE playoff_brackets ADD COLUMN group_qualifiers INTEGER"
                 ]
                 
                 for migration in migrations:
@@ -161,9 +200,27 @@ def run_migrations():
                         else:
                             print(f"Migration Error for '{migration}': {e}")
 
+                backfill_normalized_names(conn)
+
     except Exception as e:
         print(f"Migration Setup Error: {e}")
 
+def backfill_normalized_names(conn):
+    """Fill normalized_name for players and season stats created before the column existed."""
+    from sqlalchemy import text
+    from utils.helpers import normalize_name
+
+    for table, name_column in (('players', 'name'), ('season_stats', 'player_name')):
+        rows = conn.execute(text(f"SELECT id, {name_column} FROM {table} WHERE normalized_name IS NULL")).all()
+        if not rows:
+            continue
+        conn.execute(
+            text(f"UPDATE {table} SET normalized_name = :normalized WHERE id = :id"),
+            [{'id': row[0], 'normalized': normalize_name(row[1])} for row in rows]
+        )
+        conn.commit()
+        print(f"Backfilled normalized_name for {len(rows)} {table} row(s)")
+
 # CLI Commands
 @app.cli.command("init-db")
 def init_db_command():
@@ -171,6 +228,48 @@ def init_db_command():
     db.create_all()
     print("Initialized the database.")
 
+@app.cli.command("rebuild-standings")
+@click.argument("league_id", required=False)
+def rebuild_standings_command(league_id=None):
+    """Recompute the persisted standings of one league (or all of them)."""
+    from models import League
+    from utils.standings import rebuild_standings
+
+    query = League.query
+    if league_id:
+        query = query.filter_by(id=league_id)
+
+    count = 0
+    for league in query.all():
+        rebuild_standings(league)
+        count += 1
+    db.session.commit()
+    print(f"Rebuilt standings for {count} league(s).")
+
+@app.cli.command("rebuild-ratings")
+@click.argument("league_id", required=False)
+@click.option("--chunk", default=500, show_default=True, help="Leagues replayed per NumPy batch.")
+def rebuild_ratings_command(league_id=None, chunk=500):
+    """Replay the Elo ratings of one league (or all of them) from their matches."""
+    import time
+    from models import League
+    from utils.ratings import rebuild_ratings
+
+    start = time.perf_counter()
+    query = League.query.order_by(League.id)
+    if league_id:
+        query = query.filter_by(id=league_id)
+    leagues = query.all()
+
+    for i in range(0, len(leagues), chunk):
+        batch = leagues[i:i + chunk]
+        rebuild_ratings(batch)
+        # Ratings are drawn in cached fragments; bulk writes skip the flush hook
+        League.query.filter(League.id.in_([league.id for league in batch])).update(
+            {League.revision: League.revision + 1}, synchronize_session=False)
+        db.session.commit()
+    print(f"Rebuilt ratings for {len(leagues)} league(s) in {time.perf_counter() - start:.2f}s.")
+
 # Initialize on startup
 if __name__ == '__main__':
     init_database()
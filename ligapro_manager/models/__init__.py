@@ -8,3 +8,7 @@ from .stats import SeasonStat
 from .owner_settings import OwnerCourtSetting
 from .ignored_discrepancy import IgnoredDiscrepancy
 from .archived_finance import ArchivedFinance
+from .standing import TeamStanding
+from .playoff import PlayoffBracket, PlayoffTie
+from .rating import TeamRating
+from .group import Group
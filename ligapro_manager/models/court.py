@@ -16,3 +16,8 @@ class Court(db.Model):
     
     # Relationships
     matches = db.relationship('Match', backref='court', lazy=True)
+
+    __table_args__ = (
+        # Same-named courts of an owner's leagues are one physical court (utils/conflicts.py)
+        db.Index('ix_courts_league_name', 'league_id', 'name'),
+    )
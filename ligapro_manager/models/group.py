@@ -0,0 +1,21 @@
+from extensions import db
+from datetime import datetime, timezone
+import uuid
+
+class Group(db.Model):
+    """Group (division) of a league; its teams get their own table and matrix (see utils/groups.py)."""
+    __tablename__ = 'league_groups'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    league_id = db.Column(db.String(36), db.ForeignKey('leagues.id'), nullable=False, index=True)
+    name = db.Column(db.String(20), nullable=False) # "A", "B"...
+    position = db.Column(db.Integer, nullable=False, default=0) # Display and seeding order
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    league = db.relationship('League', backref=db.backref('groups', lazy=True, cascade='all, delete-orphan',
+                                                          order_by='Group.position'))
+    teams = db.relationship('Team', backref='group', lazy=True, foreign_keys='Team.group_id')
+
+    def __repr__(self):
+        return f'<Group {self.name}>'
@@ -7,7 +7,7 @@ class League(db.Model):
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), nullable=False)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
     max_teams = db.Column(db.Integer, default=10)
     win_points = db.Column(db.Integer, default=3)
     draw_points = db.Column(db.Integer, default=1)
@@ -46,11 +46,17 @@ class League(db.Model):
     custom_name_color = db.Column(db.String(10), default='#ffffff') # Color for league name in reports
     custom_role_style = db.Column(db.String(50), nullable=True) # Override style for this league
     enable_shutdown_tiebreaker = db.Column(db.Boolean, default=False)
+    tiebreakers = db.Column(db.String(100), nullable=True) # Comma separated tiebreak chain (None: STANDINGS_TIEBREAKERS)
     show_matchday_in_report = db.Column(db.Boolean, default=False)
     allow_captains_add_players = db.Column(db.Boolean, default=True)
     show_player_registration_date = db.Column(db.Boolean, default=False)
     enable_player_limit = db.Column(db.Boolean, default=False)
     max_players_per_team = db.Column(db.Integer, nullable=True)
+    standings_signature = db.Column(db.String(50), nullable=True) # Scoring config the persisted standings were built with
+    ratings_signature = db.Column(db.String(50), nullable=True) # Elo settings the persisted ratings were built with (None: replay)
+    ratings_last_date = db.Column(db.DateTime, nullable=True) # Latest result folded into the ratings
+    ratings_last_id = db.Column(db.String(36), nullable=True)
+    revision = db.Column(db.Integer, default=0, nullable=False) # Bumped on every write to the league's data (cache key)
 
     @property
     def active_teams_count(self):
@@ -22,4 +22,15 @@ class Match(db.Model):
     match_name = db.Column(db.String(200), nullable=True)
     is_practice = db.Column(db.Boolean, default=False)
     shutdown_winner_id = db.Column(db.String(36), db.ForeignKey('teams.id'), nullable=True)
+    playoff_tie_id = db.Column(db.String(36), db.ForeignKey('playoff_ties.id'), nullable=True, index=True) # Leg of a bracket tie
+    group_id = db.Column(db.String(36), db.ForeignKey('league_groups.id'), nullable=True, index=True) # Regular match inside one group
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # Keyset paging of match lists, newest first (utils/pagination.py)
+        db.Index('ix_matches_league_date', 'league_id', 'match_date', 'id'),
+        db.Index('ix_matches_home_date', 'home_team_id', 'match_date', 'id'),
+        db.Index('ix_matches_away_date', 'away_team_id', 'match_date', 'id'),
+        # Court double-booking lookups by start time (utils/conflicts.py)
+        db.Index('ix_matches_court_date', 'court_id', 'match_date'),
+    )
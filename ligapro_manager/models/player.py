@@ -1,5 +1,7 @@
 from extensions import db
 from datetime import datetime, timezone
+from sqlalchemy.orm import validates
+from utils.text import normalize_name
 import uuid
 
 class Player(db.Model):
@@ -7,9 +9,19 @@ class Player(db.Model):
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), nullable=False)
+    normalized_name = db.Column(db.String(100), nullable=True)  # normalize_name(name), kept by the validator below
     team_id = db.Column(db.String(36), db.ForeignKey('teams.id'), nullable=False)
     curp = db.Column(db.String(20), nullable=True)
     number = db.Column(db.Integer, nullable=True)
     photo_url = db.Column(db.String(500), nullable=True)
     registration_date = db.Column(db.Date, nullable=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('ix_players_team_normalized_name', 'team_id', 'normalized_name'),
+    )
+
+    @validates('name')
+    def _normalize(self, key, value):
+        self.normalized_name = normalize_name(value)
+        return value
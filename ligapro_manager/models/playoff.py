@@ -0,0 +1,99 @@
+from extensions import db
+from datetime import datetime, timezone
+import uuid
+
+class PlayoffBracket(db.Model):
+    __tablename__ = 'playoff_brackets'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    league_id = db.Column(db.String(36), db.ForeignKey('leagues.id'), nullable=False, unique=True)
+    mode = db.Column(db.String(20), nullable=False) # corte_directo, con_repechaje, grupos
+    group_qualifiers = db.Column(db.Integer, nullable=True) # Teams per group that enter (mode grupos)
+    playoff_type = db.Column(db.String(20), default='single') # 'single' or 'double'
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    league = db.relationship('League', backref=db.backref('playoff_bracket', uselist=False, cascade='all, delete-orphan'))
+    ties = db.relationship('PlayoffTie', backref='bracket', lazy=True, cascade='all, delete-orphan',
+                           order_by='PlayoffTie.position')
+
+
+class PlayoffTie(db.Model):
+    """One pairing of the bracket: a single match or an Ida/Vuelta pair of legs.
+
+    Seeds are the regular season positions frozen when the bracket was
+    generated. Teams stay empty until the ties feeding this one are decided.
+    """
+    __tablename__ = 'playoff_ties'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    bracket_id = db.Column(db.String(36), db.ForeignKey('playoff_brackets.id'), nullable=False, index=True)
+    stage = db.Column(db.String(20), nullable=False) # repechaje, round_of_16, quarterfinal, semifinal, tercer_lugar, final
+    position = db.Column(db.Integer, nullable=False) # 1-based order within the stage
+    home_team_id = db.Column(db.String(36), db.ForeignKey('teams.id'), nullable=True)
+    away_team_id = db.Column(db.String(36), db.ForeignKey('teams.id'), nullable=True)
+    home_seed = db.Column(db.Integer, nullable=True)
+    away_seed = db.Column(db.Integer, nullable=True)
+    home_aggregate = db.Column(db.Integer, nullable=True) # Set when the tie is decided
+    away_aggregate = db.Column(db.Integer, nullable=True)
+    winner_team_id = db.Column(db.String(36), db.ForeignKey('teams.id'), nullable=True)
+    next_tie_id = db.Column(db.String(36), db.ForeignKey('playoff_ties.id'), nullable=True) # Receives the winner
+    loser_tie_id = db.Column(db.String(36), db.ForeignKey('playoff_ties.id'), nullable=True) # Receives the loser (tercer lugar)
+
+    # Relationships
+    home_team = db.relationship('Team', foreign_keys=[home_team_id])
+    away_team = db.relationship('Team', foreign_keys=[away_team_id])
+    next_tie = db.relationship('PlayoffTie', remote_side=[id], foreign_keys=[next_tie_id], post_update=True)
+    loser_tie = db.relationship('PlayoffTie', remote_side=[id], foreign_keys=[loser_tie_id], post_update=True)
+    legs = db.relationship('Match', backref='playoff_tie', lazy=True, order_by='Match.created_at')
+
+    @property
+    def is_decided(self):
+        return self.winner_team_id is not None
+
+    @property
+    def loser_team_id(self):
+        if not self.is_decided:
+            return None
+        return self.away_team_id if self.winner_team_id == self.home_team_id else self.home_team_id
+
+    @property
+    def is_played(self):
+        """Both teams known and every leg completed."""
+        return bool(self.home_team_id and self.away_team_id and self.legs and all(m.is_completed for m in self.legs))
+
+    def goals(self):
+        """(home, away) goals over the completed legs, in the tie's own orientation."""
+        home = away = 0
+        for m in self.legs:
+            if not m.is_completed:
+                continue
+            if m.home_team_id == self.home_team_id:
+                home += m.home_score or 0
+                away += m.away_score or 0
+            else:
+                home += m.away_score or 0
+                away += m.home_score or 0
+        return home, away
+
+    def leg_scores(self, team_id):
+        """Goals of `team_id` in each leg, None for legs not played yet."""
+        scores = []
+        for m in self.legs:
+            if not m.is_completed:
+                scores.append(None)
+            else:
+                scores.append(m.home_score if m.home_team_id == team_id else m.away_score)
+        return scores
+
+    @property
+    def next_leg(self):
+        """First leg still to be played (or the first one), for the result link."""
+        return next((m for m in self.legs if not m.is_completed), self.legs[0] if self.legs else None)
+
+    def place(self, team_id, seed):
+        """Put a qualified team in the first free side."""
+        if self.home_team_id is None:
+            self.home_team_id, self.home_seed = team_id, seed
+        else:
+            self.away_team_id, self.away_seed = team_id, seed
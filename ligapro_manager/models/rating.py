@@ -0,0 +1,21 @@
+from extensions import db
+from datetime import datetime, timezone
+import uuid
+
+class TeamRating(db.Model):
+    """Elo power rating of a team, replayed from its completed matches (see utils/ratings.py)."""
+    __tablename__ = 'team_ratings'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    league_id = db.Column(db.String(36), db.ForeignKey('leagues.id'), nullable=False, index=True)
+    team_id = db.Column(db.String(36), db.ForeignKey('teams.id'), nullable=False, unique=True)
+    rating = db.Column(db.Float, nullable=False)
+    played = db.Column(db.Integer, default=0) # Matches folded into the rating
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    league = db.relationship('League', backref=db.backref('ratings', lazy=True, cascade='all, delete-orphan'))
+    team = db.relationship('Team', backref=db.backref('power_rating', uselist=False, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<TeamRating {self.team_id} ({self.rating:.0f})>'
@@ -0,0 +1,25 @@
+from extensions import db
+from datetime import datetime, timezone
+import uuid
+
+class TeamStanding(db.Model):
+    __tablename__ = 'team_standings'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    league_id = db.Column(db.String(36), db.ForeignKey('leagues.id'), nullable=False, index=True)
+    team_id = db.Column(db.String(36), db.ForeignKey('teams.id'), nullable=False, unique=True)
+    played = db.Column(db.Integer, default=0)
+    won = db.Column(db.Integer, default=0)
+    drawn = db.Column(db.Integer, default=0)
+    lost = db.Column(db.Integer, default=0)
+    goals_for = db.Column(db.Integer, default=0)
+    goals_against = db.Column(db.Integer, default=0)
+    points = db.Column(db.Integer, default=0) # Includes shutdown points and manual_points_modifier
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    league = db.relationship('League', backref=db.backref('standings', lazy=True, cascade='all, delete-orphan'))
+    team = db.relationship('Team', backref=db.backref('standing', uselist=False, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<TeamStanding {self.team_id} ({self.points} pts)>'
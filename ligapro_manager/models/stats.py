@@ -1,5 +1,7 @@
 from extensions import db
 from datetime import datetime, timezone
+from sqlalchemy.orm import validates
+from utils.text import normalize_name
 import uuid
 
 class SeasonStat(db.Model):
@@ -9,6 +11,7 @@ class SeasonStat(db.Model):
     league_id = db.Column(db.String(36), db.ForeignKey('leagues.id'), nullable=False)
     team_id = db.Column(db.String(36), db.ForeignKey('teams.id'), nullable=False)
     player_name = db.Column(db.String(100), nullable=False)
+    normalized_name = db.Column(db.String(100), nullable=True)  # normalize_name(player_name), matches Player.normalized_name
     photo_url = db.Column(db.String(500), nullable=True)
     stat_type = db.Column(db.String(20), nullable=False)  # 'goals' or 'conceded'
     value = db.Column(db.Integer, default=0)
@@ -16,3 +19,12 @@ class SeasonStat(db.Model):
     
     # Relationships
     team = db.relationship('Team', backref='season_stats')
+
+    __table_args__ = (
+        db.Index('ix_season_stats_team_normalized_name', 'team_id', 'normalized_name'),
+    )
+
+    @validates('player_name')
+    def _normalize(self, key, value):
+        self.normalized_name = normalize_name(value)
+        return value
@@ -16,6 +16,7 @@ class Team(db.Model):
     is_deleted = db.Column(db.Boolean, default=False)
     is_hidden = db.Column(db.Boolean, default=False)
     manual_points_modifier = db.Column(db.Integer, default=0)
+    group_id = db.Column(db.String(36), db.ForeignKey('league_groups.id'), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
     # Relationships
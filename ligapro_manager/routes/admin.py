@@ -5,6 +5,7 @@ from models import User, League, Team, Match, Player
 from datetime import datetime, timedelta
 from forms import RegisterForm
 from utils.decorators import admin_required
+from utils.fragment_cache import fragment_cache
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -28,7 +29,8 @@ def admin_dashboard():
                          total_leagues=total_leagues,
                          total_teams=total_teams,
                          total_players=total_players,
-                         recent_users=recent_users)
+                         recent_users=recent_users,
+                         fragment_cache_stats=fragment_cache.stats())
 
 
 @admin_bp.route('/admin/users/<user_id>/delete', methods=['POST'])
@@ -1,16 +1,26 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort, current_app
 from flask_login import login_required, current_user
 from extensions import db
-from models import League, Team, Match, Player, Court, SeasonStat
+from models import League, Team, Match, Player, Court, SeasonStat, PlayoffBracket, PlayoffTie
 from forms import LeagueForm, StatForm, MatchForm
 from utils.decorators import owner_required, premium_required
-from utils.helpers import calculate_standings, normalize_name
-from sqlalchemy import or_
+from utils.helpers import calculate_standings
+from utils.cache import league_cached
+from utils.fragment_cache import cached_fragment
+from utils.pagination import match_keyset_page
+from utils.head_to_head import head_to_head
+from utils.matrix import matrix_rounds, matrix_payload, matrix_cells
+from utils.playoffs import PLAYOFF_STAGES, STAGE_BY_SIZE, GROUP_MODE, seed_label
+from utils.groups import league_groups, grouped_teams
+from utils.clinch import cached_clinch_status
+from sqlalchemy import or_, select
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 import json
 import requests
 from flask import Response, stream_with_context
 from collections import OrderedDict
+from functools import cache
 
 league_bp = Blueprint('league', __name__)
 
@@ -43,7 +53,8 @@ def create_league():
             max_teams=max_teams,
             win_points=win_points,
             draw_points=draw_points,
-            num_vueltas=1 # Default
+            num_vueltas=1, # Default
+            tiebreakers=form.tiebreaker_chain() if current_user.is_active_premium else None
         )
         db.session.add(league)
         db.session.flush() # Get ID
@@ -62,90 +73,166 @@ def create_league():
     return render_template('league_form.html', form=form, title='Nueva Liga')
 
 
-@league_bp.route('/leagues/<league_id>')
-@login_required
-@owner_required
-def league_detail(league_id):
+def _viewable_league(league_id):
+    """League the current user may open, or None when the plan limit blocks it."""
     if current_user.role == 'admin':
         league = League.query.get_or_404(league_id)
     else:
         league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
-        
+
     # Check Access Limit for downgraded users
     from utils.helpers import is_league_accessible
     if not is_league_accessible(current_user.id, league.id):
-        flash('Has excedido tu límite de ligas gratuitas. Actualiza a Premium para acceder a esta liga.', 'warning')
-        return redirect(url_for('premium.premium'))
-    
-    # Show only active teams in the list, but keep deleted teams for historical match references if needed
+        return None
+    return league
+
+
+def _league_teams(league_id, with_players=True):
+    """(all_teams, active_teams, scheduling_teams) from a single team query."""
     # Show only active teams in the list, but keep deleted teams for historical match references if needed
-    active_teams = Team.query.filter_by(league_id=league_id, is_deleted=False).all()
+    query = Team.query.filter_by(league_id=league_id)
+    if with_players:
+        query = query.options(selectinload(Team.players))
+    all_teams = query.all() # Need all for matches history lookup
+    active_teams = [t for t in all_teams if not t.is_deleted]
     # Scheduling Teams (Exclude Hidden)
     scheduling_teams = [t for t in active_teams if not t.is_hidden]
-    all_teams = Team.query.filter_by(league_id=league_id).all() # Need all for matches history lookup
+    return all_teams, active_teams, scheduling_teams
+
+
+def _player_number_column():
+    """Roster number of the player a SeasonStat row names (first by name on a normalized-name tie)."""
+    return select(Player.number).where(
+        Player.team_id == SeasonStat.team_id,
+        Player.normalized_name == SeasonStat.normalized_name
+    ).order_by(Player.name).limit(1).correlate(SeasonStat).scalar_subquery()
+
+
+def _with_player_numbers(query):
+    """Run a SeasonStat query, setting stat.player_number ('#10' or '') on each row."""
+    stats = []
+    for stat, num in query.add_columns(_player_number_column()).all():
+        stat.player_number = f"#{num}" if num else ""
+        stats.append(stat)
+    return stats
+
+
+def _season_leaders(league_id):
+    """Top scorers and goalkeepers with their player numbers."""
+    season_stats = _with_player_numbers(SeasonStat.query.filter(
+        SeasonStat.league_id == league_id,
+        SeasonStat.stat_type.in_(['goals', 'conceded'])
+    ).options(joinedload(SeasonStat.team)).order_by(SeasonStat.value.desc()))
+
+    top_scorers = [stat for stat in season_stats if stat.stat_type == 'goals']
+    top_goalkeepers = sorted((stat for stat in season_stats if stat.stat_type == 'conceded'), key=lambda stat: stat.value)
+    return top_scorers, top_goalkeepers
+
+
+def _players_by_team(active_teams):
+    """Roster of each team for the JS player dropdowns."""
+    players_by_team = {}
+    for team in active_teams:
+        players = sorted(team.players, key=lambda p: p.name)
+        players_by_team[team.id] = [{'id': p.id, 'name': p.name, 'photo_url': p.photo_url, 'number': p.number} for p in players]
+    return players_by_team
+
+
+def _regular_matches(league_id):
+    return Match.query.filter(
+        Match.league_id == league_id,
+        or_(Match.stage == 'regular', Match.stage == None, Match.stage == '')
+    ).options(joinedload(Match.court)).order_by(Match.match_date).all()
+
+
+@league_bp.route('/leagues/<league_id>')
+@login_required
+@owner_required
+def league_detail(league_id):
+    """Page shell: header, panel tab and modals. Other tabs load through league_tab."""
+    league = _viewable_league(league_id)
+    if league is None:
+        flash('Has excedido tu límite de ligas gratuitas. Actualiza a Premium para acceder a esta liga.', 'warning')
+        return redirect(url_for('premium.premium'))
     
+    # Standings first: reading them refreshes the team rows loaded below
     standings = calculate_standings(league_id)
+    all_teams, active_teams, scheduling_teams = _league_teams(league_id, with_players=False)
 
     # Form for editing league settings (embedded)
     form = LeagueForm(obj=league)
+
+    teams_dict = {t.id: t for t in all_teams}
+    top_scorers, top_goalkeepers = _season_leaders(league_id)
     
-    # Update Form Choices to use scheduling_teams
-    # Removed incorrect form fields assignments as LeagueForm does not have home_team/away_team
-    
-    # Matches Paging
-    page = request.args.get('page', 1, type=int)
-    matches_pagination = Match.query.filter(
+    # Dashboard Data
+    recent_matches = Match.query.filter(
         Match.league_id == league_id,
-        or_(Match.stage == 'regular', Match.stage == None, Match.stage == '')
-    ).order_by(Match.match_date.desc()).paginate(page=page, per_page=30, error_out=False)
-    
-    matches = matches_pagination.items 
+        Match.is_completed == True
+    ).options(joinedload(Match.court)).order_by(Match.match_date.desc()).limit(3).all()
 
-    # Matrix View Data (Multi-Round)
-    # Use scheduling_teams for Matrix
-    num_vueltas = league.num_vueltas if (league.num_vueltas and league.owner.is_active_premium) else 1
-    
-    # helper to init a blank matrix
-    def init_matrix():
-        m = {}
-        for home in scheduling_teams:
-            m[home.id] = {}
-            for away in scheduling_teams:
-                if home.id == away.id:
-                     m[home.id][away.id] = {'status': 'cnt_play'} 
-                else:
-                     m[home.id][away.id] = {'status': 'empty', 'home_id': home.id, 'away_id': away.id}
-        return m
-
-    # Initialize matrices for each round
-    round_matrices = {r: init_matrix() for r in range(1, num_vueltas + 1)}
-
-    # Inject Round Number into all empty cells
-    for r in round_matrices:
-        for h in round_matrices[r]:
-            for a in round_matrices[r][h]:
-                round_matrices[r][h][a]['round'] = r
-
-    # Fetch ALL regular matches
-    all_regular_matches = Match.query.filter(
+    upcoming_matches = Match.query.filter(
         Match.league_id == league_id,
-        or_(Match.stage == 'regular', Match.stage == None, Match.stage == '')
-    ).order_by(Match.match_date).all()
-    
-    # Group matches by pair to assign rounds
-    # pair key: sorted tuple of ids
-    matches_by_pair = {}
+        Match.is_completed == False
+    ).options(joinedload(Match.court)).order_by(Match.match_date).limit(3).all()
     
-    for m in all_regular_matches:
-        pair = tuple(sorted([m.home_team_id, m.away_team_id]))
-        if pair not in matches_by_pair:
-            matches_by_pair[pair] = []
-        matches_by_pair[pair].append(m)
-        
+    return render_template('league_detail.html', 
+                          league=league, 
+                          teams=active_teams,
+                          courts=league.courts[:1] if not league.owner.is_active_premium else league.courts,
+                          standings=standings,
+                          teams_dict=teams_dict,
+                          top_scorers=top_scorers,
+                          top_goalkeepers=top_goalkeepers,
+                          recent_matches=recent_matches,
+                          upcoming_matches=upcoming_matches,
+                          form=form)
+
+
+def _standings_tab(league):
+    from utils.standings import remaining_fixtures, counted_matches_select, group_standings
+    from utils.ratings import team_ratings, fixture_difficulty
+    # Ratings first: nothing after the standings load may expire their teams
+    ratings = team_ratings(league)
+    standings = calculate_standings(league.id, include_form=True)
+    counted = db.session.execute(select(counted_matches_select(league))).all()
+    fixtures = remaining_fixtures(league, [s['team'].id for s in standings], counted)
+    groups = league_groups(league.id)
+    return {'standings': standings, 'clinch': cached_clinch_status(league, standings), 'ratings': ratings,
+            'schedule': fixture_difficulty(standings, ratings, fixtures),
+            'group_tables': group_standings(league, groups) if groups else []}
+
+
+def _teams_tab(league):
+    _, active_teams, _ = _league_teams(league.id)
+    groups = league_groups(league.id)
+    return {'teams': active_teams, 'groups': groups,
+            'group_sections': grouped_teams(groups, active_teams) if groups else []}
+
+
+def _matches_tab(league):
+    all_teams = Team.query.filter_by(league_id=league.id).all()
+
+    # Matches Paging (keyset: "Cargar más" fetches the next page from league.more_matches)
+    matches_page = match_keyset_page(Match.query.filter(
+        Match.league_id == league.id,
+        or_(Match.stage == 'regular', Match.stage == None, Match.stage == '')
+    ).options(joinedload(Match.court)), request.args.get('cursor'))
+    return {
+        'matches_page': matches_page,
+        'teams_dict': {t.id: t for t in all_teams},
+        # Slot template of the season generator (empty league only)
+        'courts': league.courts[:1] if not league.owner.is_active_premium else league.courts
+    }
+
+
+def _dates_tab(league):
+    all_teams = Team.query.filter_by(league_id=league.id).all()
+
     # Group matches by date for the new "Dates" view
     matches_by_date = OrderedDict()
     # Sort all_regular_matches descending by date 
-    sorted_matches = sorted(all_regular_matches, key=lambda x: x.match_date, reverse=True)
+    sorted_matches = sorted(_regular_matches(league.id), key=lambda x: x.match_date, reverse=True)
     
     for m in sorted_matches:
         date_key = m.match_date.date()
@@ -164,172 +251,159 @@ def league_detail(league_id):
         5: 'MAY', 6: 'JUN', 7: 'JUL', 8: 'AGO',
         9: 'SEP', 10: 'OCT', 11: 'NOV', 12: 'DIC'
     }
-        
-    # Assign matches to appropriate matrix
-    for pair, matches in matches_by_pair.items():
-        for i, m in enumerate(matches):
-            round_num = i + 1
-            if round_num <= num_vueltas:
-                target_matrix = round_matrices[round_num]
-                
-                # Check if cell exists (in case team was hidden/deleted but match exists)
-                if m.home_team_id in target_matrix and m.away_team_id in target_matrix[m.home_team_id]:
-                    # Populate Actual
-                    target_matrix[m.home_team_id][m.away_team_id] = {
-                        'status': 'scheduled',
-                        'match': {
-                            'id': m.id,
-                            'home_score': m.home_score,
-                            'away_score': m.away_score,
-                            'match_date_iso': m.match_date.isoformat(),
-                            'match_date_display': m.match_date.strftime('%d-%b'),
-                            'match_time_display': m.match_date.strftime('%I:%M %p'),
-                            'court_id': m.court_id,
-                            'is_completed': m.is_completed,
-                            'shutdown_winner_id': m.shutdown_winner_id,
-                            'is_practice': m.is_practice
-                        },
-                        'home_id': m.home_team_id,
-                        'away_id': m.away_team_id
-                    }
-                    if m.is_completed:
-                        target_matrix[m.home_team_id][m.away_team_id]['status'] = 'completed'
-                        
-                # Check Mirror
-                if m.away_team_id in target_matrix and m.home_team_id in target_matrix[m.away_team_id]:
-                    symmetric_cell = target_matrix[m.away_team_id][m.home_team_id]
-                    if symmetric_cell['status'] == 'empty':
-                         target_matrix[m.away_team_id][m.home_team_id] = {
-                             'status': 'scheduled',
-                             'match': {
-                                 'id': m.id,
-                                 'home_score': m.away_score, # Swapped
-                                 'away_score': m.home_score, # Swapped
-                                 'match_date_iso': m.match_date.isoformat(),
-                                 'match_date_display': m.match_date.strftime('%d-%b'),
-                                 'match_time_display': m.match_date.strftime('%I:%M %p'),
-                                 'court_id': m.court_id,
-                                 'is_completed': m.is_completed,
-                                 'shutdown_winner_id': m.shutdown_winner_id,
-                                 'is_practice': m.is_practice
-                             },
-                             'home_id': m.away_team_id,
-                             'away_id': m.home_team_id
-                         }
-                         if m.is_completed:
-                              target_matrix[m.away_team_id][m.home_team_id]['status'] = 'completed'
-
-    playoff_matches = {
-        'repechaje': Match.query.filter_by(league_id=league_id, stage='repechaje').all(),
-        'round_of_16': Match.query.filter_by(league_id=league_id, stage='round_of_16').all(),
-        'quarterfinal': Match.query.filter_by(league_id=league_id, stage='quarterfinal').all(),
-        'semifinal': Match.query.filter_by(league_id=league_id, stage='semifinal').all(),
-        'tercer_lugar': Match.query.filter_by(league_id=league_id, stage='tercer_lugar').all(),
-        'final': Match.query.filter_by(league_id=league_id, stage='final').all()
+
+    return {
+        'matches_by_date': matches_by_date,
+        'spanish_months': spanish_months,
+        'spanish_months_short': spanish_months_short,
+        'teams_dict': {t.id: t for t in all_teams}
     }
-    stages_order = ['repechaje', 'round_of_16', 'quarterfinal', 'semifinal', 'tercer_lugar', 'final']
-    has_playoffs = any(len(m) > 0 for m in playoff_matches.values())
-    
-    teams_dict = {t.id: t for t in all_teams}
-    
+
+
+def _matrix_tab(league):
+    league_id = league.id
+    _, active_teams, scheduling_teams = _league_teams(league_id)
+
+    # Matrix View Data (Multi-Round)
+    # Use scheduling_teams for Matrix
+    num_vueltas = matrix_rounds(league)
+    # One square per group, so large leagues never build a teams x teams grid
+    matrix = matrix_payload(scheduling_teams, _regular_matches(league_id), num_vueltas, league_groups(league_id))
+    teams_by_id = {t.id: t for t in scheduling_teams}
+    matrix_sections = [dict(section, teams=[teams_by_id[team_id] for team_id in
+                                            matrix['teams'][section['start']:section['start'] + section['size']]])
+                       for section in matrix['groups']]
+
     # Teams Data for JS (Matrix View) use scheduling_teams
     teams_js = {t.id: {'name': t.name, 'shield_url': t.shield_url} for t in scheduling_teams}
     
-    # Pass players by team for JS dropdown
-    players_by_team = {}
-    for team in active_teams:
-        players = Player.query.filter_by(team_id=team.id).order_by(Player.name).all()
-        players_by_team[team.id] = [{'id': p.id, 'name': p.name, 'photo_url': p.photo_url, 'number': p.number} for p in players]
-    
-    def find_player_number(team_id, player_name):
-        norm_stat_name = normalize_name(player_name)
-        if team_id in players_by_team:
-            for p_data in players_by_team[team_id]:
-                if normalize_name(p_data['name']) == norm_stat_name:
-                    return p_data['number']
-        return None
+    # Pass teams_history for Matrix Modal UI (plain data, cached per league revision)
+    teams_history = head_to_head(league)
+
+    return {
+        'teams': active_teams,
+        'scheduling_teams': scheduling_teams,
+        'num_vueltas': num_vueltas,
+        'matrix': matrix,
+        'matrix_sections': matrix_sections,
+        'matrix_cells': matrix_cells(matrix),
+        'teams_js': teams_js,
+        'teams_history': teams_history
+    }
 
-    # Get Season Stats
-    top_scorers = SeasonStat.query.filter_by(league_id=league_id, stat_type='goals').order_by(SeasonStat.value.desc()).all()
-    for stat in top_scorers:
-        num = find_player_number(stat.team_id, stat.player_name)
-        stat.player_number = f"#{num}" if num else ""
-        
-    top_goalkeepers = SeasonStat.query.filter_by(league_id=league_id, stat_type='conceded').order_by(SeasonStat.value.asc()).all()
-    for stat in top_goalkeepers:
-        num = find_player_number(stat.team_id, stat.player_name)
-        stat.player_number = f"#{num}" if num else ""
-    
-    # Dashboard Data
-    recent_matches = Match.query.filter(
-        Match.league_id == league_id,
-        Match.is_completed == True
-    ).order_by(Match.match_date.desc()).limit(3).all()
 
-    upcoming_matches = Match.query.filter(
-        Match.league_id == league_id,
-        Match.is_completed == False
-    ).order_by(Match.match_date).limit(3).all()
+def _stats_tab(league):
+    _, active_teams, _ = _league_teams(league.id)
+    top_scorers, top_goalkeepers = _season_leaders(league.id)
+    players_by_team = _players_by_team(active_teams)
 
     # Form for adding stats (Owner Only)
     stat_form = StatForm()
     if current_user.role == 'owner' or current_user.role == 'admin':
         stat_form.team_id.choices = [(t.id, t.name) for t in active_teams]
-        
-    # Pass teams_history for Matrix Modal UI
-    teams_history = {}
-    all_completed_history = Match.query.filter_by(league_id=league_id, is_completed=True, is_practice=False).order_by(Match.match_date.asc()).all()
-    for m in all_completed_history:
-        if m.home_team_id not in teams_history:
-            teams_history[m.home_team_id] = {}
-        if m.away_team_id not in teams_history[m.home_team_id]:
-            teams_history[m.home_team_id][m.away_team_id] = {'count': 0, 'last_date': None, 'last_time': None, 'last_court_name': None}
-            
-        if m.away_team_id not in teams_history:
-            teams_history[m.away_team_id] = {}
-        if m.home_team_id not in teams_history[m.away_team_id]:
-            teams_history[m.away_team_id][m.home_team_id] = {'count': 0, 'last_date': None, 'last_time': None, 'last_court_name': None}
 
-        teams_history[m.home_team_id][m.away_team_id]['count'] += 1
-        teams_history[m.away_team_id][m.home_team_id]['count'] += 1
-        
-        date_str = m.match_date.strftime('%Y-%m-%d') if m.match_date else None
-        time_str = m.match_date.strftime('%I:%M %p') if m.match_date else None
-        court_name = m.court.name if m.court else '-- Sin Cancha --'
+    return {
+        'top_scorers': top_scorers,
+        'top_goalkeepers': top_goalkeepers,
+        'players_by_team': players_by_team,
+        'stat_form': stat_form
+    }
 
-        teams_history[m.home_team_id][m.away_team_id]['last_date'] = date_str
-        teams_history[m.home_team_id][m.away_team_id]['last_time'] = time_str
-        teams_history[m.home_team_id][m.away_team_id]['last_court_name'] = court_name
 
-        teams_history[m.away_team_id][m.home_team_id]['last_date'] = date_str
-        teams_history[m.away_team_id][m.home_team_id]['last_time'] = time_str
-        teams_history[m.away_team_id][m.home_team_id]['last_court_name'] = court_name
-    
-    return render_template('league_detail.html', 
-                          league=league, 
-                          teams=active_teams,
-                          courts=league.courts[:1] if not league.owner.is_active_premium else league.courts,
-                          standings=standings,
-                          matches=matches,
-                          round_matrices=round_matrices,
-                          num_vueltas=num_vueltas,
-                          playoff_matches=playoff_matches,
-                          has_playoffs=has_playoffs,
-                          teams_dict=teams_dict,
-                          top_scorers=top_scorers,
-                          top_goalkeepers=top_goalkeepers,
-                          recent_matches=recent_matches,
-                          upcoming_matches=upcoming_matches,
-                          players_by_team=players_by_team,
-                          stat_form=stat_form,
-                          matches_pagination=matches_pagination,
-                          teams_js=teams_js,
-                          teams_history=teams_history,
-                          scheduling_teams=scheduling_teams,
-                          matches_by_date=matches_by_date,
-                          spanish_months=spanish_months,
-                          spanish_months_short=spanish_months_short,
-                          form=form)
+def _playoff_tab(league):
+    league_id = league.id
+    all_teams, active_teams, _ = _league_teams(league_id)
+
+    # Single playoff query, partitioned by stage
+    playoff_matches = {stage: [] for stage in PLAYOFF_STAGES}
+    for m in Match.query.filter(Match.league_id == league_id, Match.stage.in_(PLAYOFF_STAGES)).options(joinedload(Match.court)).all():
+        playoff_matches[m.stage].append(m)
+    has_playoffs = any(len(m) > 0 for m in playoff_matches.values())
+
+    # Bracket view: stored ties, legs included
+    bracket_ties = {stage: [] for stage in PLAYOFF_STAGES}
+    bracket = PlayoffBracket.query.filter_by(league_id=league_id).options(
+        selectinload(PlayoffBracket.ties).selectinload(PlayoffTie.legs)
+    ).first()
+    if bracket is not None:
+        for tie in bracket.ties:
+            bracket_ties[tie.stage].append(tie)
+
+    groups = league_groups(league_id)
+    return {
+        'teams': active_teams,
+        'teams_dict': {t.id: t for t in all_teams},
+        'playoff_matches': playoff_matches,
+        'has_playoffs': has_playoffs,
+        'bracket': bracket,
+        'bracket_ties': bracket_ties,
+        'groups': groups,
+        'group_mode': GROUP_MODE,
+        # Teams per group that can qualify so the bracket is full (2, 4, 8 or 16 teams)
+        'group_qualifier_options': [n for n in (1, 2, 4, 8) if n * len(groups) in STAGE_BY_SIZE],
+        'seed_label': lambda seed: seed_label(bracket, groups, seed)
+    }
+
+
+def _settings_tab(league):
+    return {
+        'form': LeagueForm(obj=league),
+        'courts': league.courts[:1] if not league.owner.is_active_premium else league.courts
+    }
+
+
+# Lazily loaded tabs of league_detail: name -> context builder
+LEAGUE_TABS = {
+    'standings': _standings_tab,
+    'teams': _teams_tab,
+    'matches': _matches_tab,
+    'dates': _dates_tab,
+    'matrix': _matrix_tab,
+    'stats': _stats_tab,
+    'playoff': _playoff_tab,
+    'settings': _settings_tab,
+}
+
+# What else each cached tab's markup depends on besides the league; settings is not cached
+TAB_CACHE_VARY = {
+    'standings': lambda: (),
+    'teams': lambda: (),
+    'matches': lambda: (request.args.get('cursor'),),
+    'dates': lambda: (),
+    'matrix': lambda: (),
+    'stats': lambda: (current_user.role,),
+    'playoff': lambda: (current_user.is_active_premium,),
+}
+
+
+@league_bp.route('/leagues/<league_id>/tabs/<tab>')
+@login_required
+@owner_required
+def league_tab(league_id, tab):
+    """HTML fragment of one league_detail tab, fetched when the tab is opened."""
+    if tab not in LEAGUE_TABS:
+        abort(404)
+    league = _viewable_league(league_id)
+    if league is None:
+        abort(403)
+
+    def render():
+        return render_template(f'league_tabs/{tab}.html', league=league, **LEAGUE_TABS[tab](league))
+
+    if tab not in TAB_CACHE_VARY:
+        return render()
+    return cached_fragment(league, f'tab:{tab}', render, *TAB_CACHE_VARY[tab]())
+
+
+@league_bp.route('/leagues/<league_id>/matches/more')
+@login_required
+@owner_required
+def more_matches(league_id):
+    """Next page of the matches list, after the `cursor` of the last match shown."""
+    league = _viewable_league(league_id)
+    if league is None:
+        abort(403)
+    return render_template('league_tabs/match_items.html', league=league, **_matches_tab(league))
 
 
 @league_bp.route('/leagues/<league_id>/edit', methods=['GET', 'POST'])
@@ -382,6 +456,7 @@ def edit_league(league_id):
                     league.custom_role_style = style if style else None
 
             league.enable_shutdown_tiebreaker = form.enable_shutdown_tiebreaker.data
+            league.tiebreakers = form.tiebreaker_chain()
             league.allow_captains_add_players = form.allow_captains_add_players.data
             league.show_player_registration_date = form.show_player_registration_date.data
             league.enable_player_limit = form.enable_player_limit.data
@@ -530,7 +605,6 @@ def generate_share_report(league_id):
         report_note = None
     
     # Data containers
-    standings = []
     recent_matches = []
     upcoming_matches = []
     top_scorers = []
@@ -541,9 +615,28 @@ def generate_share_report(league_id):
     teams = Team.query.filter_by(league_id=league_id).all()
     teams_dict = {t.id: t for t in teams}
 
-    if include_standings:
+    is_premium = league.owner.is_active_premium
+
+    # Built only when a standings fragment is rendered
+    @cache
+    def table():
+        if not include_standings:
+            return {'standings': [], 'clinch': {}}
         standings = calculate_standings(league_id)
-        
+        return {'standings': standings, 'clinch': cached_clinch_status(league, standings)}
+
+    def render_table(template):
+        return render_template(template, league=league, is_premium=is_premium, **table())
+
+    if include_standings:
+        standings_html = cached_fragment(league, 'share_standings', lambda: render_table('share_standings_fragment.html'))
+        standings_compact_html = cached_fragment(league, 'share_standings_compact',
+                                                 lambda: render_table('share_standings_compact_fragment.html'))
+    else:
+        # The compact layout always draws the (empty) table
+        standings_html = ''
+        standings_compact_html = render_table('share_standings_compact_fragment.html')
+
     if include_recent:
         query = Match.query.filter(
             Match.league_id == league_id,
@@ -623,40 +716,24 @@ def generate_share_report(league_id):
             matches_by_court[court_name].append(match)
 
     if include_scorers:
-        top_scorers = SeasonStat.query.filter_by(league_id=league_id, stat_type='goals').order_by(SeasonStat.value.desc()).limit(5).all()
+        top_scorers = _with_player_numbers(SeasonStat.query.filter_by(league_id=league_id, stat_type='goals').options(
+            joinedload(SeasonStat.team)).order_by(SeasonStat.value.desc()).limit(5))
         for stat in top_scorers:
             stat.team_initials = stat.team.name[:3].upper() if stat.team else "???"
-            # Attempt to find player number robustly
-            num = None
-            players = Player.query.filter_by(team_id=stat.team_id).all()
-            norm_name = normalize_name(stat.player_name)
-            for p in players:
-                if normalize_name(p.name) == norm_name:
-                    num = p.number
-                    break
-            stat.player_number = f"#{num}" if num else ""
         
     if include_keepers:
-        top_goalkeepers = SeasonStat.query.filter_by(league_id=league_id, stat_type='conceded').order_by(SeasonStat.value.asc()).limit(5).all()
+        top_goalkeepers = _with_player_numbers(SeasonStat.query.filter_by(league_id=league_id, stat_type='conceded').options(
+            joinedload(SeasonStat.team)).order_by(SeasonStat.value.asc()).limit(5))
         for stat in top_goalkeepers:
             stat.team_initials = stat.team.name[:3].upper() if stat.team else "???"
-            # Attempt to find player number robustly
-            num = None
-            players = Player.query.filter_by(team_id=stat.team_id).all()
-            norm_name = normalize_name(stat.player_name)
-            for p in players:
-                if normalize_name(p.name) == norm_name:
-                    num = p.number
-                    break
-            stat.player_number = f"#{num}" if num else ""
         
-    is_premium = league.owner.is_active_premium
     today_str = datetime.now().strftime('%d/%m/%Y')
     return render_template('share_report.html',
                           league=league,
                           is_premium=is_premium,
                           teams_dict=teams_dict,
-                          standings=standings,
+                          standings_html=standings_html,
+                          standings_compact_html=standings_compact_html,
                           recent_matches=recent_matches,
                           upcoming_matches=upcoming_matches,
                           matches_by_court=matches_by_court,
@@ -700,15 +777,100 @@ def modify_team_points(league_id):
     team = Team.query.filter_by(id=team_id, league_id=league_id, is_deleted=False, is_hidden=False).first_or_404()
 
     if action == 'subtract':
-        team.manual_points_modifier = (team.manual_points_modifier or 0) - points
-    else:
-        team.manual_points_modifier = (team.manual_points_modifier or 0) + points
+        points = -points
+    team.manual_points_modifier = (team.manual_points_modifier or 0) + points
+
+    from utils.standings import adjust_manual_points
+    adjust_manual_points(team, points)
 
     db.session.commit()
     flash(f'Puntos de {team.name} {"sumados" if action == "add" else "restados"} correctamente.', 'success')
     return redirect(url_for('league.league_detail', league_id=league_id))
 
 
+@league_bp.route('/leagues/<league_id>/standings/timeline')
+@login_required
+@owner_required
+def standings_timeline(league_id):
+    if current_user.role == 'admin':
+        league = League.query.get_or_404(league_id)
+    else:
+        league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
+
+    from utils.standings import standings_timeline as build_timeline, standings_signature
+    teams = Team.query.filter_by(league_id=league_id, is_deleted=False, is_hidden=False).all()
+    # The signature covers premium expiry, which does not bump the revision
+    timeline = league_cached(league, f'standings_timeline:{standings_signature(league)}',
+                             lambda: build_timeline(league, teams))
+    return jsonify(timeline)
+
+
+@league_bp.route('/leagues/<league_id>/standings/probabilities')
+@login_required
+@owner_required
+def standings_probabilities(league_id):
+    if current_user.role == 'admin':
+        league = League.query.get_or_404(league_id)
+    else:
+        league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
+
+    from utils.standings import standings_signature
+    from utils.simulation import season_probabilities
+    mode = request.args.get('mode')
+    if mode not in ('corte_directo', 'con_repechaje'):
+        mode = league.playoff_mode or 'corte_directo'
+
+    def build():
+        standings = calculate_standings(league_id)
+        # Seeded with the revision: the same data always gives the same figures
+        return season_probabilities(league, standings, current_app.config['SIMULATION_RUNS'], mode,
+                                    workers=current_app.config['SIMULATION_WORKERS'], seed=league.revision or 0)
+
+    return jsonify(league_cached(league, f'probabilities:{mode}:{standings_signature(league)}', build))
+
+
+@league_bp.route('/leagues/<league_id>/standings/what-if', methods=['GET', 'POST'])
+@login_required
+def standings_what_if(league_id):
+    """Standings with hypothetical scores for pending matches; nothing is saved.
+
+    GET lists the pending fixtures and the current table. POST takes
+    {"results": [{"match_id", "home_score", "away_score", "shutdown_winner_id"}]}
+    and answers with the re-sorted table. Captains may use it for their league.
+    """
+    if current_user.role == 'admin':
+        league = League.query.get_or_404(league_id)
+    elif current_user.role == 'captain':
+        team = Team.query.get(current_user.team_id)
+        if not team or team.league_id != league_id:
+            return jsonify({'error': 'No tienes acceso.'}), 403
+        league = team.league
+    else:
+        league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
+
+    from utils.standings import standings_signature
+    from utils.what_if import what_if_base, what_if_standings, WhatIfError
+    # Loaded once per revision; every keystroke after that is computed in memory
+    base = league_cached(league, f'what_if:{standings_signature(league)}', lambda: what_if_base(league))
+
+    if request.method == 'GET':
+        return jsonify({
+            'standings': what_if_standings(league, base, []),
+            'fixtures': [dict(fixture, match_date=fixture['match_date'].isoformat())
+                         for fixture in base['pending'].values()]
+        })
+
+    data = request.get_json(silent=True) or {}
+    results = data.get('results') or []
+    if not isinstance(results, list) or not all(isinstance(result, dict) for result in results):
+        return jsonify({'error': 'Formato inválido.'}), 400
+    try:
+        standings = what_if_standings(league, base, results)
+    except WhatIfError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'standings': standings})
+
+
 @league_bp.route('/proxy-image')
 def proxy_image():
     url = request.args.get('url')
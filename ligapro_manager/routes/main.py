@@ -1,8 +1,13 @@
+from functools import cache
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user, logout_user
 from models import League, Team, Match, SeasonStat
 from utils.decorators import owner_required
 from utils.helpers import calculate_standings
+from utils.clinch import cached_clinch_status
+from utils.pagination import match_keyset_page, team_matches_query
+from utils.fragment_cache import cached_fragment
+from sqlalchemy.orm import joinedload
 
 main_bp = Blueprint('main', __name__)
 
@@ -44,12 +49,22 @@ def captain_dashboard():
         return redirect(url_for('auth.login'))
     
     league = team.league
-    standings = calculate_standings(league.id)
+
+    # Built only when one of the cached fragments below is rendered
+    @cache
+    def table():
+        standings = calculate_standings(league.id)
+        return {'standings': standings, 'clinch': cached_clinch_status(league, standings)}
+
+    standings_html = cached_fragment(league, 'captain_standings', lambda: render_template(
+        'captain_standings_fragment.html', team=team, **table()), team.id)
+    summary_html = cached_fragment(league, 'captain_summary', lambda: render_template(
+        'captain_summary_fragment.html', team=team, **table()), team.id)
+    leaders_html = cached_fragment(league, 'captain_leaders', lambda: render_template(
+        'captain_leaders_fragment.html', league=league, **_captain_leaders(league)))
     
-    # Get team matches
-    matches = Match.query.filter(
-        (Match.home_team_id == team.id) | (Match.away_team_id == team.id)
-    ).order_by(Match.match_date.desc()).all()
+    # Get team matches (first page; the rest through captain_matches)
+    matches_page = match_keyset_page(team_matches_query(team))
     
     # Filter notes for captain
     notes = [n for n in team.notes if n.is_public]
@@ -58,22 +73,37 @@ def captain_dashboard():
     # Get all teams for name lookup
     teams_dict = {t.id: t for t in Team.query.filter_by(league_id=league.id).all()}
     
-    # Get Top 5 Stats (if allowed)
-    top_scorers = []
-    top_goalkeepers = []
-    
-    if league.show_stats:
-        top_scorers = SeasonStat.query.filter_by(league_id=league.id, stat_type='goals')\
-            .order_by(SeasonStat.value.desc()).limit(5).all()
-        top_goalkeepers = SeasonStat.query.filter_by(league_id=league.id, stat_type='conceded')\
-            .order_by(SeasonStat.value.asc()).limit(5).all()
-    
     return render_template('captain_dashboard.html', 
                           team=team, 
                           league=league, 
-                          standings=standings,
-                          matches=matches,
+                          standings_html=standings_html,
+                          summary_html=summary_html,
+                          leaders_html=leaders_html,
+                          matches_page=matches_page,
                           notes=notes,
-                          teams_dict=teams_dict,
-                          top_scorers=top_scorers,
-                          top_goalkeepers=top_goalkeepers)
+                          teams_dict=teams_dict)
+
+
+def _captain_leaders(league):
+    """Top 5 scorers and goalkeepers of the captain dashboard (if allowed)."""
+    if not league.show_stats:
+        return {'top_scorers': [], 'top_goalkeepers': []}
+    query = SeasonStat.query.filter_by(league_id=league.id).options(joinedload(SeasonStat.team))
+    return {
+        'top_scorers': query.filter_by(stat_type='goals').order_by(SeasonStat.value.desc()).limit(5).all(),
+        'top_goalkeepers': query.filter_by(stat_type='conceded').order_by(SeasonStat.value.asc()).limit(5).all()
+    }
+
+
+@main_bp.route('/captain/matches')
+@login_required
+def captain_matches():
+    """Next page of the captain dashboard's match list ("Cargar más")."""
+    if current_user.role != 'captain':
+        return redirect(url_for('main.dashboard'))
+
+    team = Team.query.get_or_404(current_user.team_id)
+    matches_page = match_keyset_page(team_matches_query(team), request.args.get('cursor'))
+    teams_dict = {t.id: t for t in Team.query.filter_by(league_id=team.league_id).all()}
+    return render_template('captain_matches_fragment.html', team=team, league=team.league,
+                           matches_page=matches_page, teams_dict=teams_dict)
@@ -1,12 +1,21 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from extensions import db
-from models import League, Team, Match, Court, SeasonStat
+from models import League, Team, Match, Court, SeasonStat, TeamStanding, TeamRating, PlayoffBracket, PlayoffTie
 from forms import MatchForm, MatchResultForm
 from utils.decorators import owner_required
-import json
-from datetime import datetime, timezone
+from datetime import datetime
+from sqlalchemy.orm import selectinload
 from utils.helpers import calculate_standings
+from utils.standings import StandingsDelta, standings_changes, team_form, group_standings
+from utils.ratings import team_ratings, rebuild_ratings
+from utils.matrix import matrix_entry, matrix_round_of
+from utils.cache import bump_revision
+from utils.head_to_head import head_to_head
+from utils.fixtures import generate_fixture, parse_slot_times, FixtureError
+from utils.conflicts import find_conflicts, conflicts_message
+from utils.playoffs import PLAYOFF_STAGES, STAGE_TITLES, GROUP_MODE, PlayoffError, create_bracket, adopt_playoffs, advance_bracket, delete_bracket, group_seeds
+from utils.groups import league_groups
 
 match_bp = Blueprint('match', __name__)
 
@@ -43,44 +52,66 @@ def create_match(league_id):
                 match.referee_cost_away = str(league.price_per_match)
                 match.referee_cost = str(league.price_referee)
             db.session.add(match)
+            conflicts = conflicts_message(find_conflicts([match]))
             db.session.commit()
             flash('Partido programado.', 'success')
+            if conflicts:
+                flash(conflicts, 'warning')
             return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
 
-    # Calculate match history for frontend display
-    completed_matches = Match.query.filter_by(league_id=league_id, is_completed=True).order_by(Match.match_date.asc()).all()
-    teams_history = {t.id: {} for t in teams}
-    
-    months = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic']
-    
-    for m in completed_matches:
-        if m.home_team_id in teams_history and m.away_team_id in teams_history:
-            date_str = f"{m.match_date.day} {months[m.match_date.month - 1]} {m.match_date.year}" if m.match_date else None
-            time_str = m.match_date.strftime('%I:%M %p') if m.match_date else None
-            court_name = m.court.name if m.court else '-- Sin Cancha --'
-            
-            if m.away_team_id not in teams_history[m.home_team_id]:
-                teams_history[m.home_team_id][m.away_team_id] = {'count': 0, 'last_date': None, 'last_time': None, 'last_court_name': None}
-            teams_history[m.home_team_id][m.away_team_id]['count'] += 1
-            if date_str:
-                teams_history[m.home_team_id][m.away_team_id]['last_date'] = date_str
-                teams_history[m.home_team_id][m.away_team_id]['last_time'] = time_str
-                teams_history[m.home_team_id][m.away_team_id]['last_court_name'] = court_name
-                
-            if m.home_team_id not in teams_history[m.away_team_id]:
-                teams_history[m.away_team_id][m.home_team_id] = {'count': 0, 'last_date': None, 'last_time': None, 'last_court_name': None}
-            teams_history[m.away_team_id][m.home_team_id]['count'] += 1
-            if date_str:
-                teams_history[m.away_team_id][m.home_team_id]['last_date'] = date_str
-                teams_history[m.away_team_id][m.home_team_id]['last_time'] = time_str
-                teams_history[m.away_team_id][m.home_team_id]['last_court_name'] = court_name
-            
     # Create a mapping of id -> name for easy JS lookup
     teams_map = {t.id: t.name for t in teams}
 
     return render_template('match_form.html', form=form, league=league, 
-                         title='Programar Partido', teams_history=teams_history, teams_map=teams_map)
+                         title='Programar Partido', teams_map=teams_map)
+
+
+@match_bp.route('/leagues/<league_id>/head-to-head')
+@login_required
+@owner_required
+def head_to_head_history(league_id):
+    """Previous meetings of every pair of teams, for the match form's hints."""
+    league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
+    return jsonify(head_to_head(league, include_practice=True))
+
+
+@match_bp.route('/leagues/<league_id>/fixture/generate', methods=['POST'])
+@login_required
+@owner_required
+def generate_season_fixture(league_id):
+    """Schedule the whole regular season (round robin) from a slot template."""
+    league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
+
+    try:
+        start_date = datetime.strptime(request.form.get('start_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        flash('Selecciona la fecha de la primera jornada.', 'danger')
+        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
+
+    days_between = request.form.get('days_between', 7, type=int)
+    if not days_between or days_between < 1:
+        days_between = 7
+
+    try:
+        count = generate_fixture(
+            league,
+            start_date,
+            parse_slot_times(request.form.get('slot_times')),
+            court_ids=request.form.getlist('court_ids'),
+            days_between=days_between,
+            shuffle=request.form.get('shuffle') == 'on'
+        )
+    except FixtureError as e:
+        db.session.rollback()
+        flash(str(e), 'danger')
+        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
 
+    conflicts = conflicts_message(find_conflicts(Match.query.filter_by(league_id=league.id, stage='regular').all()))
+    db.session.commit()
+    flash(f'Calendario generado: {count} partidos programados.', 'success')
+    if conflicts:
+        flash(conflicts, 'warning')
+    return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
 
 @match_bp.route('/matches/<match_id>/result', methods=['GET', 'POST'])
 @login_required
@@ -120,6 +151,12 @@ def update_match_result(match_id):
     form.court_id.choices = [(c.id, c.name) for c in courts]
     
     if form.validate_on_submit():
+        # Snapshot both the current and the new pairing before editing
+        standings_delta = StandingsDelta(league)
+        standings_delta.capture(match.home_team_id, match.away_team_id)
+        standings_delta.capture(form.home_team_id.data, form.away_team_id.data)
+        old_slot = (match.court_id, match.match_date)
+
         match.home_team_id = form.home_team_id.data
         match.away_team_id = form.away_team_id.data
         match.court_id = form.court_id.data
@@ -143,8 +180,15 @@ def update_match_result(match_id):
             match.is_completed = False
             match.shutdown_winner_id = None
         
+        standings_delta.apply()
+        # Only a moved match can have taken someone else's court
+        conflicts = None
+        if (match.court_id, match.match_date) != old_slot:
+            conflicts = conflicts_message(find_conflicts([match]))
         db.session.commit()
         flash('Partido actualizado (Resultados y Detalles).', 'success')
+        if conflicts:
+            flash(conflicts, 'warning')
         anchor = 'playoff' if match.stage not in ['regular', None] else 'matches'
         return redirect(url_for('league.league_detail', league_id=league.id, _anchor=anchor))
     
@@ -155,6 +199,66 @@ def update_match_result(match_id):
                           home_team=home_team, away_team=away_team, league=league)
 
 
+@match_bp.route('/matches/<match_id>/score', methods=['POST'])
+@login_required
+@owner_required
+def record_score(match_id):
+    """Record a result sent as JSON and answer with only what changed.
+
+    Body: {"home_score", "away_score", "shutdown_winner_id", "is_practice"} in
+    the match's own home/away order; empty scores leave the match pending.
+    The answer holds the matrix entry of the match, the standings rows
+    (with their new positions) that moved, the Elo ratings and the form of
+    both teams, so the page can patch itself.
+    """
+    match = Match.query.get_or_404(match_id)
+    league = match.league
+    if league.user_id != current_user.id:
+        return jsonify({'error': 'No tienes acceso.'}), 403
+
+    data = request.get_json(silent=True) or {}
+    try:
+        scores = [None if data.get(key) in (None, '') else int(data[key]) for key in ('home_score', 'away_score')]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Marcador inválido.'}), 400
+    if any(score is not None and score < 0 for score in scores):
+        return jsonify({'error': 'Marcador inválido.'}), 400
+
+    before = calculate_standings(league.id)
+
+    standings_delta = StandingsDelta(league)
+    standings_delta.capture(match.home_team_id, match.away_team_id)
+
+    match.home_score, match.away_score = scores
+    if 'is_practice' in data:
+        match.is_practice = bool(data['is_practice'])
+
+    if match.home_score is not None and match.away_score is not None:
+        match.is_completed = True
+        shutdown_winner_id = data.get('shutdown_winner_id')
+        if (league.enable_shutdown_tiebreaker and match.home_score == match.away_score
+                and shutdown_winner_id in [str(match.home_team_id), str(match.away_team_id)]):
+            match.shutdown_winner_id = shutdown_winner_id
+        else:
+            match.shutdown_winner_id = None
+    else:
+        match.is_completed = False
+        match.shutdown_winner_id = None
+
+    standings_delta.apply()
+    db.session.commit()
+
+    changes = standings_changes(before, calculate_standings(league.id))
+    return jsonify({
+        'match': matrix_entry(match, matrix_round_of(match)),
+        'standings': changes['rows'],
+        'order': changes['order'],
+        'leaders': changes['leaders'],
+        'ratings': {team_id: round(rating) for team_id, rating in team_ratings(league).items()},
+        'form': team_form(league, team_ids=[match.home_team_id, match.away_team_id])
+    })
+
+
 @match_bp.route('/matches/<match_id>/delete', methods=['POST'])
 @login_required
 @owner_required
@@ -169,7 +273,10 @@ def delete_match(match_id):
     next_action = request.form.get('next_action')
     selected_date = request.form.get('selected_date')
         
+    standings_delta = StandingsDelta(match.league)
+    standings_delta.capture(match.home_team_id, match.away_team_id)
     db.session.delete(match)
+    standings_delta.apply()
     db.session.commit()
     flash('Partido eliminado.', 'success')
     
@@ -225,8 +332,11 @@ def edit_match(match_id):
                 match.referee_cost_away = str(league.price_per_match)
                 match.referee_cost = str(league.price_referee)
                 
+            conflicts = conflicts_message(find_conflicts([match]))
             db.session.commit()
             flash('Partido actualizado.', 'success')
+            if conflicts:
+                flash(conflicts, 'warning')
             
             if next_action == 'global_schedule':
                 if selected_date:
@@ -237,39 +347,10 @@ def edit_match(match_id):
             anchor = 'playoff' if match.stage not in ['regular', None, ''] else 'matches'
             return redirect(url_for('league.league_detail', league_id=league_id, _anchor=anchor))
             
-    # Calculate match history for frontend display (reuse logic)
-    completed_matches = Match.query.filter_by(league_id=league_id, is_completed=True).order_by(Match.match_date.asc()).all()
-    teams_history = {t.id: {} for t in teams}
-    
-    months = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic']
-    
-    for m in completed_matches:
-        if m.id == match.id: continue # Exclude current match if it was somehow completed (safeguard)
-        if m.home_team_id in teams_history and m.away_team_id in teams_history:
-            date_str = f"{m.match_date.day} {months[m.match_date.month - 1]} {m.match_date.year}" if m.match_date else None
-            time_str = m.match_date.strftime('%I:%M %p') if m.match_date else None
-            court_name = m.court.name if m.court else '-- Sin Cancha --'
-            
-            if m.away_team_id not in teams_history[m.home_team_id]:
-                teams_history[m.home_team_id][m.away_team_id] = {'count': 0, 'last_date': None, 'last_time': None, 'last_court_name': None}
-            teams_history[m.home_team_id][m.away_team_id]['count'] += 1
-            if date_str:
-                teams_history[m.home_team_id][m.away_team_id]['last_date'] = date_str
-                teams_history[m.home_team_id][m.away_team_id]['last_time'] = time_str
-                teams_history[m.home_team_id][m.away_team_id]['last_court_name'] = court_name
-                
-            if m.home_team_id not in teams_history[m.away_team_id]:
-                teams_history[m.away_team_id][m.home_team_id] = {'count': 0, 'last_date': None, 'last_time': None, 'last_court_name': None}
-            teams_history[m.away_team_id][m.home_team_id]['count'] += 1
-            if date_str:
-                teams_history[m.away_team_id][m.home_team_id]['last_date'] = date_str
-                teams_history[m.away_team_id][m.home_team_id]['last_time'] = time_str
-                teams_history[m.away_team_id][m.home_team_id]['last_court_name'] = court_name
-            
     teams_map = {t.id: t.name for t in teams}
     
     return render_template('match_form.html', form=form, league=league, match=match,
-                          title='Editar Partido', teams_history=teams_history, teams_map=teams_map, next_action=next_action, selected_date=selected_date)
+                          title='Editar Partido', teams_map=teams_map, next_action=next_action, selected_date=selected_date)
 
 
 @match_bp.route('/leagues/<league_id>/reset_season', methods=['POST'])
@@ -286,15 +367,27 @@ def reset_season(league_id):
     deleted = Match.query.filter_by(league_id=league_id).delete(synchronize_session=False)
     
     # Reset playoff state
+    delete_bracket(league_id)
     league.playoff_mode = None
     league.playoff_bye_teams = None
     
     # Delete Season Stats (Goleadores / Arqueros)
     SeasonStat.query.filter_by(league_id=league_id).delete(synchronize_session=False)
 
+    # Persisted standings are rebuilt (all zeros) on the next read
+    TeamStanding.query.filter_by(league_id=league_id).delete(synchronize_session=False)
+    league.standings_signature = None
+    TeamRating.query.filter_by(league_id=league_id).delete(synchronize_session=False)
+
     # Clean up soft-deleted teams (Hard Delete)
     # Now that matches are gone, we can safely remove the "ghost" teams
     deleted_teams_count = Team.query.filter_by(league_id=league_id, is_deleted=True).delete(synchronize_session=False)
+
+    # Every remaining team back to the initial rating
+    rebuild_ratings([league])
+
+    # Bulk deletes bypass the flush hook
+    bump_revision(league_id)
     
     db.session.commit()
     flash(f'Temporada reiniciada. {deleted} partidos eliminados. {deleted_teams_count} equipos eliminados permanentemente.', 'success')
@@ -310,12 +403,14 @@ def reset_playoffs(league_id):
     # Delete all playoff matches
     deleted = Match.query.filter(
         Match.league_id == league_id,
-        Match.stage.in_(['repechaje', 'quarterfinal', 'semifinal', 'tercer_lugar', 'final'])
+        Match.stage.in_(PLAYOFF_STAGES)
     ).delete(synchronize_session=False)
     
     # Reset league playoff state
+    delete_bracket(league_id)
     league.playoff_mode = None
     league.playoff_bye_teams = None
+    bump_revision(league_id)
     
     db.session.commit()
     db.session.commit()
@@ -335,169 +430,43 @@ def generate_playoffs(league_id):
         flash('La modalidad Ida y Vuelta es exclusiva para Premium.', 'warning')
         return redirect(url_for('premium.premium'))
     
-    standings = calculate_standings(league_id)
-    total_teams = len(standings)
-    
-    if total_teams < 5:
-        flash('Se necesitan al menos 5 equipos para la liguilla.', 'danger')
-        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
+    group_qualifiers = None
+    if mode == GROUP_MODE:
+        # Seeds come from the group tables: 1A vs 2B, 1B vs 2A...
+        group_qualifiers = request.form.get('group_qualifiers', 2, type=int)
+        try:
+            standings = group_seeds(group_standings(league, league_groups(league_id)), group_qualifiers)
+        except PlayoffError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
+    else:
+        standings = calculate_standings(league_id)
+        total_teams = len(standings)
+
+        if total_teams < 5:
+            flash('Se necesitan al menos 5 equipos para la liguilla.', 'danger')
+            return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
     
     # Delete existing playoff matches
     Match.query.filter(
         Match.league_id == league_id,
-        Match.stage.in_(['repechaje', 'round_of_16', 'quarterfinal', 'semifinal', 'tercer_lugar', 'final'])
+        Match.stage.in_(PLAYOFF_STAGES)
     ).delete(synchronize_session=False)
-    
+    delete_bracket(league_id)
+    bump_revision(league_id)
+
     # Clear playoff state
     league.playoff_mode = mode
     league.playoff_type = playoff_type
     league.playoff_bye_teams = None
-    
-    playoff_matches = []
-    bye_teams = []
-    
-    # Get default court (first one registered)
-    default_court = Court.query.filter_by(league_id=league_id).order_by(Court.created_at.asc()).first()
-    default_court_id = default_court.id if default_court else None
-
-
-    # Continue with generation...
-    # Small leagues (5-7 teams)
-    if total_teams <= 7:
-        if mode == 'corte_directo':
-            # Top 4 -> Semifinals
-            playoff_matches.append({
-                'home': standings[0], 'away': standings[3], 'stage': 'semifinal',
-                'name': f"Semifinal 1: {standings[0]['team'].name} vs {standings[3]['team'].name}"
-            })
-            playoff_matches.append({
-                'home': standings[1], 'away': standings[2], 'stage': 'semifinal',
-                'name': f"Semifinal 2: {standings[1]['team'].name} vs {standings[2]['team'].name}"
-            })
-        else:  # con_repechaje
-            if total_teams < 6:
-                flash('Se necesitan al menos 6 equipos para modo con repechaje.', 'danger')
-                return redirect(url_for('league.league_detail', league_id=league_id))
-            
-            # Top 2 get bye
-            bye_teams = [standings[0]['team'].id, standings[1]['team'].id]
-            
-            # Repechaje: 3 vs 6, 4 vs 5
-            playoff_matches.append({
-                'home': standings[2], 'away': standings[5], 'stage': 'repechaje',
-                'name': f"Repechaje 1: {standings[2]['team'].name} vs {standings[5]['team'].name}"
-            })
-            playoff_matches.append({
-                'home': standings[3], 'away': standings[4], 'stage': 'repechaje',
-                'name': f"Repechaje 2: {standings[3]['team'].name} vs {standings[4]['team'].name}"
-            })
-    
-    # Large leagues (16+ teams) -> Round of 16
-    elif total_teams >= 16:
-        if mode == 'corte_directo':
-            # Top 16 -> Round of 16
-            for i in range(8):
-                playoff_matches.append({
-                    'home': standings[i], 'away': standings[15-i], 'stage': 'round_of_16',
-                    'name': f"Octavo {i+1}: {standings[i]['team'].name} vs {standings[15-i]['team'].name}"
-                })
-        else: # con_repechaje for 16+ teams could be complex, keeping top 14 with bye or similar. 
-              # For now, let's keep it simple: if >= 16 and corte_directo, do 16.
-              # If con_repechaje, let's do top 12 bye and 13-20 repechaje?
-              # User explicitly asked for 16 teams.
-            for i in range(8):
-                playoff_matches.append({
-                    'home': standings[i], 'away': standings[15-i], 'stage': 'round_of_16',
-                    'name': f"Octavo {i+1}: {standings[i]['team'].name} vs {standings[15-i]['team'].name}"
-                })
-
-    # Medium leagues (8+ teams)
-    elif total_teams >= 8:
-        if mode == 'corte_directo':
-            # Top 8 -> Quarterfinals
-            if total_teams < 8:
-                flash('Se necesitan al menos 8 equipos para corte directo.', 'danger')
-                return redirect(url_for('league.league_detail', league_id=league_id))
-            
-            # Match 1: 1 vs 8
-            playoff_matches.append({
-                'home': standings[0], 'away': standings[7], 'stage': 'quarterfinal',
-                'name': f"Cuarto 1: {standings[0]['team'].name} vs {standings[7]['team'].name}"
-            })
-            # Match 2: 2 vs 7
-            playoff_matches.append({
-                'home': standings[1], 'away': standings[6], 'stage': 'quarterfinal',
-                'name': f"Cuarto 2: {standings[1]['team'].name} vs {standings[6]['team'].name}"
-            })
-            # Match 3: 3 vs 6
-            playoff_matches.append({
-                'home': standings[2], 'away': standings[5], 'stage': 'quarterfinal',
-                'name': f"Cuarto 3: {standings[2]['team'].name} vs {standings[5]['team'].name}"
-            })
-            # Match 4: 4 vs 5
-            playoff_matches.append({
-                'home': standings[3], 'away': standings[4], 'stage': 'quarterfinal',
-                'name': f"Cuarto 4: {standings[3]['team'].name} vs {standings[4]['team'].name}"
-            })
-        else:  # con_repechaje
-            if total_teams < 10:
-                flash('Se necesitan al menos 10 equipos para modo con repechaje.', 'danger')
-                return redirect(url_for('league.league_detail', league_id=league_id))
-            
-            # Top 6 get bye
-            bye_teams = [standings[i]['team'].id for i in range(6)]
-            
-            # Repechaje: 7 vs 10, 8 vs 9
-            playoff_matches.append({
-                'home': standings[6], 'away': standings[9], 'stage': 'repechaje',
-                'name': f"Repechaje 1: {standings[6]['team'].name} vs {standings[9]['team'].name}"
-            })
-            playoff_matches.append({
-                'home': standings[7], 'away': standings[8], 'stage': 'repechaje',
-                'name': f"Repechaje 2: {standings[7]['team'].name} vs {standings[8]['team'].name}"
-            })
-    
-    # Save bye teams
-    if bye_teams:
-        league.playoff_bye_teams = json.dumps(bye_teams)
-    
-    # Create matches
-    created_count = 0
-    for m in playoff_matches:
-        # Match 1 (Ida or Single)
-        match1 = Match(
-            league_id=league_id,
-            home_team_id=m['home']['team'].id,
-            away_team_id=m['away']['team'].id,
-            court_id=default_court_id,
-            match_date=datetime.now(timezone.utc),
-            stage=m['stage'],
-            match_name=m['name'] + (" (Ida)" if playoff_type == 'double' else "")
-        )
-        if league.auto_fill_prices:
-            match1.referee_cost_home = str(league.price_per_match)
-            match1.referee_cost_away = str(league.price_per_match)
-            match1.referee_cost = str(league.price_referee)
-        db.session.add(match1)
-        created_count += 1
-
-        # Match 2 (Vuelta) if double leg AND NOT FINAL (Final is always single)
-        if playoff_type == 'double' and m['stage'] != 'final':
-            match2 = Match(
-                league_id=league_id,
-                home_team_id=m['away']['team'].id, # Swapped
-                away_team_id=m['home']['team'].id, # Swapped
-                court_id=default_court_id,
-                match_date=datetime.now(timezone.utc), # Should ideally be later
-                stage=m['stage'],
-                match_name=m['name'].replace(m['home']['team'].name, "TEMP").replace(m['away']['team'].name, m['home']['team'].name).replace("TEMP", m['away']['team'].name) + " (Vuelta)"
-            )
-            if league.auto_fill_prices:
-                match2.referee_cost_home = str(league.price_per_match)
-                match2.referee_cost_away = str(league.price_per_match)
-                match2.referee_cost = str(league.price_referee)
-            db.session.add(match2)
-            created_count += 1
+
+    # Seeding is frozen here: later rounds follow the bracket, not the live standings
+    try:
+        _, created_count = create_bracket(league, standings, mode, playoff_type, group_qualifiers)
+    except PlayoffError as e:
+        db.session.rollback()
+        flash(str(e), 'danger')
+        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
     
     db.session.commit()
     flash(f'Liguilla generada ({mode} - {playoff_type}). {created_count} partidos creados.', 'success')
@@ -509,233 +478,28 @@ def generate_playoffs(league_id):
 @owner_required
 def advance_playoff_round(league_id):
     league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
-    
-    # Get all playoff matches
-    playoff_matches = Match.query.filter(
-        Match.league_id == league_id,
-        Match.stage.in_(['repechaje', 'round_of_16', 'quarterfinal', 'semifinal', 'tercer_lugar', 'final'])
-    ).all()
-    
-    if not playoff_matches:
-        flash('No hay partidos de liguilla.', 'danger')
-        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
-    
-    stages_order = ['repechaje', 'round_of_16', 'quarterfinal', 'semifinal', 'final']
-    active_stage = None
-    active_stage_matches = []
-    
-    # Scan stages to find the latest one that has matches
-    for stage in stages_order:
-        matches_in_stage = [m for m in playoff_matches if m.stage == stage]
-        if matches_in_stage:
-            active_stage = stage
-            active_stage_matches = matches_in_stage
-            
-            # Check if this stage is completed
-            if not all(m.is_completed for m in matches_in_stage):
-                flash(f'Completa todos los partidos de {stage} antes de avanzar.', 'warning')
-                return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
-    
-    if not active_stage:
-        flash('No se encontró una fase activa.', 'danger')
-        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
-    
-    # Check if tournament finished
-    if active_stage == 'final':
-        final = active_stage_matches[0]
-        winner = Team.query.get(final.home_team_id if final.home_score > final.away_score else final.away_team_id)
-        flash(f'¡El torneo ha terminado! Campeón: {winner.name} 🏆', 'success')
-        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
-    
-    # Calculate qualified teams for next round
-    winners = []
-    losers = []
-
-    if league.playoff_type == 'double' and active_stage != 'final':
-        # Double Leg Logic: Aggregate Score
-        # Group matches by teams playing each other
-        processed_pairs = set()
-        
-        for match in active_stage_matches:
-            # Create a sorted tuple of team IDs to identify the pair
-            pair_id = tuple(sorted([match.home_team_id, match.away_team_id]))
-            
-            if pair_id in processed_pairs:
-                continue
-                
-            # Find the other match for this pair
-            pair_matches = [m for m in active_stage_matches if tuple(sorted([m.home_team_id, m.away_team_id])) == pair_id]
-            
-            if len(pair_matches) != 2:
-                # Fallback if something is wrong, treat as single or error?
-                # For now, let's just take the winner of this match if only 1 exists
-                if match.home_score > match.away_score:
-                    winners.append(match.home_team_id)
-                    losers.append(match.away_team_id)
-                else:
-                    winners.append(match.away_team_id)
-                    losers.append(match.home_team_id)
-                continue
 
-            # Calculate aggregate
-            team1_id = pair_matches[0].home_team_id
-            team2_id = pair_matches[0].away_team_id
-            
-            team1_goals = 0
-            team2_goals = 0
-            
-            for m in pair_matches:
-                if m.home_team_id == team1_id:
-                    team1_goals += m.home_score
-                    team2_goals += m.away_score
-                else:
-                    team2_goals += m.home_score
-                    team1_goals += m.away_score
-            
-            if team1_goals > team2_goals:
-                winners.append(team1_id)
-                losers.append(team2_id)
-            elif team2_goals > team1_goals:
-                winners.append(team2_id)
-                losers.append(team1_id)
-            else:
-                winners.append(team1_id)
-                losers.append(team2_id)
-            
-            processed_pairs.add(pair_id)
-
-    else:
-        # Single Leg Logic
-        for match in active_stage_matches:
-            if match.home_score > match.away_score:
-                winners.append(match.home_team_id)
-                losers.append(match.away_team_id)
-            elif match.away_score > match.home_score:
-                winners.append(match.away_team_id)
-                losers.append(match.home_team_id)
-            else:
-                winners.append(match.home_team_id)
-                losers.append(match.away_team_id)
+    bracket = PlayoffBracket.query.filter_by(league_id=league_id).options(
+        selectinload(PlayoffBracket.ties).selectinload(PlayoffTie.legs)
+    ).first()
+    if bracket is None:
+        # Liguilla generated before brackets were stored
+        bracket = adopt_playoffs(league, calculate_standings(league_id))
+        if bracket is None:
+            flash('No hay partidos de liguilla.', 'danger')
+            return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
 
-    # Add byes if coming from repechaje
-    if active_stage == 'repechaje' and league.playoff_bye_teams:
-        try:
-            byes = json.loads(league.playoff_bye_teams)
-            winners.extend(byes)
-        except:
-            pass
-            
-    # Seeding
-    standings = calculate_standings(league_id)
-    seed_map = {s['team'].id: i for i, s in enumerate(standings)}
-    winners.sort(key=lambda tid: seed_map.get(tid, 999))
-    
-    num_qualified = len(winners)
-    if num_qualified < 2:
-        flash('No hay suficientes equipos para la siguiente ronda.', 'danger')
+    try:
+        result = advance_bracket(bracket, league)
+    except PlayoffError as e:
+        db.session.commit()
+        flash(str(e), 'warning')
         return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
-        
-    # Determine Next Stage
-    next_stage = 'quarterfinal'
-    if num_qualified == 2:
-        next_stage = 'final'
-    elif num_qualified <= 4:
-        next_stage = 'semifinal'
-        
-    # Check if next stage matches already exist
-    existing = Match.query.filter_by(league_id=league_id, stage=next_stage).first()
-    if existing:
-        flash(f'La siguiente ronda ({next_stage}) ya está generada.', 'warning')
-        return redirect(url_for('league.league_detail', league_id=league_id))
-        
-    # Generate Matches (Best vs Worst)
-    num_matches = num_qualified // 2
-    teams_dict = {t.id: t for t in Team.query.filter_by(league_id=league_id).all()}
-    
-    # Get default court
-    default_court = Court.query.filter_by(league_id=league_id).order_by(Court.created_at.asc()).first()
-    default_court_id = default_court.id if default_court else None
-    
-    created_count = 0
-    
-    for i in range(num_matches):
-        home_id = winners[i]
-        away_id = winners[num_qualified - 1 - i]
-        
-        
-        # Match 1 (Ida or Single) - Final is ALWAYS single
-        match1 = Match(
-            league_id=league_id,
-            home_team_id=home_id,
-            away_team_id=away_id,
-            court_id=default_court_id,
-            match_date=datetime.now(timezone.utc),
-            stage=next_stage,
-            match_name=f"{next_stage.capitalize()}: {teams_dict[home_id].name} vs {teams_dict[away_id].name}" + (" (Ida)" if (league.playoff_type == 'double' and next_stage != 'final') else "")
-        )
-        if league.auto_fill_prices:
-            match1.referee_cost_home = str(league.price_per_match)
-            match1.referee_cost_away = str(league.price_per_match)
-            match1.referee_cost = str(league.price_referee)
-        db.session.add(match1)
-        created_count += 1
-        
-        # Match 2 (Vuelta) - Only if double mode AND NO FINAL
-        if league.playoff_type == 'double' and next_stage != 'final':
-            match2 = Match(
-                league_id=league_id,
-                home_team_id=away_id,
-                away_team_id=home_id,
-                court_id=default_court_id,
-                match_date=datetime.now(timezone.utc),
-                stage=next_stage,
-                match_name=f"{next_stage.capitalize()}: {teams_dict[away_id].name} vs {teams_dict[home_id].name} (Vuelta)"
-            )
-            if league.auto_fill_prices:
-                match2.referee_cost_home = str(league.price_per_match)
-                match2.referee_cost_away = str(league.price_per_match)
-                match2.referee_cost = str(league.price_referee)
-            db.session.add(match2)
-            created_count += 1
-        
-    # Add Tercer Lugar if advancing to Final
-    if next_stage == 'final' and len(losers) >= 2:
-        third_home_id = losers[0]
-        third_away_id = losers[1]
-        
-        match_third = Match(
-            league_id=league_id,
-            home_team_id=third_home_id,
-            away_team_id=third_away_id,
-            court_id=default_court_id,
-            match_date=datetime.now(timezone.utc),
-            stage='tercer_lugar',
-            match_name=f"Tercer Lugar: {teams_dict[third_home_id].name} vs {teams_dict[third_away_id].name}" + (" (Ida)" if league.playoff_type == 'double' else "")
-        )
-        if league.auto_fill_prices:
-            match_third.referee_cost_home = str(league.price_per_match)
-            match_third.referee_cost_away = str(league.price_per_match)
-            match_third.referee_cost = str(league.price_referee)
-        db.session.add(match_third)
-        created_count += 1
-        
-        if league.playoff_type == 'double':
-            match_third_vuelta = Match(
-                league_id=league_id,
-                home_team_id=third_away_id,
-                away_team_id=third_home_id,
-                court_id=default_court_id,
-                match_date=datetime.now(timezone.utc),
-                stage='tercer_lugar',
-                match_name=f"Tercer Lugar: {teams_dict[third_away_id].name} vs {teams_dict[third_home_id].name} (Vuelta)"
-            )
-            if league.auto_fill_prices:
-                match_third_vuelta.referee_cost_home = str(league.price_per_match)
-                match_third_vuelta.referee_cost_away = str(league.price_per_match)
-                match_third_vuelta.referee_cost = str(league.price_referee)
-            db.session.add(match_third_vuelta)
-            created_count += 1
-            
     db.session.commit()
-    flash(f'Ronda generada: {next_stage} ({created_count} partidos).', 'success')
+
+    if result[0] == 'champion':
+        flash(f'¡El torneo ha terminado! Campeón: {result[1].name} 🏆', 'success')
+    else:
+        _, next_stage, created_count = result
+        flash(f'Ronda generada: {STAGE_TITLES[next_stage]} ({created_count} partidos).', 'success')
     return redirect(url_for('league.league_detail', league_id=league_id, _anchor='playoff'))
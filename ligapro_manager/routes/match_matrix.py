@@ -1,72 +1,87 @@
-from flask import Blueprint, request, redirect, url_for, flash
+from flask import Blueprint, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from extensions import db
-from models import Match, League
+from models import Match, League, Team
 from utils.decorators import owner_required
+from utils.standings import StandingsDelta
+from utils.matrix import matrix_rounds, matrix_payload
+from utils.groups import league_groups
+from utils.conflicts import find_conflicts, conflicts_message, conflicts_payload
+from sqlalchemy import or_, and_
 from datetime import datetime
 
 match_matrix_bp = Blueprint('match_matrix', __name__)
 
-@match_matrix_bp.route('/matches/matrix/save', methods=['POST'])
-@login_required
-@owner_required
-def save_match_matrix():
-    league_id = request.form.get('league_id')
-    home_team_id = request.form.get('home_team_id')
-    away_team_id = request.form.get('away_team_id')
-    match_id = request.form.get('match_id')
-    match_round = request.form.get('match_round', 1, type=int)
 
-    if not league_id or not home_team_id or not away_team_id:
-        flash('Faltan datos requeridos.', 'danger')
-        return redirect(request.referrer or url_for('main.dashboard'))
+class MatrixCellError(ValueError):
+    """A matrix cell that cannot be applied; the message is shown to the owner."""
 
-    # Verify League Ownership
-    league = League.query.get_or_404(league_id)
-    if league.user_id != current_user.id and current_user.role != 'admin':
-        flash('No tienes permiso para editar esta liga.', 'danger')
-        return redirect(url_for('main.dashboard'))
 
-    # Parse Date and Time
-    date_str = request.form.get('match_date')
-    time_str = request.form.get('match_time')
-    match_datetime = None
+class _LeagueMatches:
+    """Matches preloaded once, looked up the way matrix cells address them."""
 
-    if date_str and time_str:
-        try:
-            match_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-        except ValueError:
-            flash('Formato de fecha u hora inválido.', 'warning')
+    def __init__(self, matches):
+        self.by_id = {}
+        self.by_cell = {}
+        for match in matches:
+            self.add(match)
 
-    # Get Court
-    court_id = request.form.get('court_id')
-    if not court_id:
-        court_id = None
+    def add(self, match):
+        # A match created in this request has no id until the flush; it is
+        # only reachable through its cell
+        if match.id is not None:
+            self.by_id[match.id] = match
+        if match.stage == 'regular':
+            self.by_cell.setdefault((str(match.home_team_id), str(match.away_team_id), match.match_round), match)
 
-    # Get Scores
-    home_score_str = request.form.get('home_score')
-    away_score_str = request.form.get('away_score')
-    
-    home_score = int(home_score_str) if home_score_str and home_score_str.strip() else None
-    away_score = int(away_score_str) if away_score_str and away_score_str.strip() else None
+    def remove(self, match):
+        if match.id is not None:
+            self.by_id.pop(match.id, None)
+        key = (str(match.home_team_id), str(match.away_team_id), match.match_round)
+        if self.by_cell.get(key) is match:
+            del self.by_cell[key]
+
+    def get(self, match_id):
+        return self.by_id.get(match_id)
+
+    def find(self, home_team_id, away_team_id, match_round):
+        return self.by_cell.get((str(home_team_id), str(away_team_id), match_round))
+
+
+def _parse_score(value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return int(value)
+
+
+def _save_cell(league, cell, matches, standings_delta):
+    """Create or update the match behind one matrix cell.
+
+    `cell` holds home_team_id/away_team_id as seen from the clicked cell, so a
+    cell on the mirrored side carries the scores swapped.
+    """
+    home_team_id = cell['home_team_id']
+    away_team_id = cell['away_team_id']
+    match_round = cell['match_round']
+    match_datetime = cell['match_datetime']
+    court_id = cell['court_id']
+    home_score = cell['home_score']
+    away_score = cell['away_score']
+
+    # Snapshot the pair before any field changes
+    standings_delta.capture(home_team_id, away_team_id)
 
     # Find or Create Match
     match = None
-    if match_id:
-        match = Match.query.get(match_id)
-        if not match or match.league_id != league.id:
-            flash('Partido no encontrado o inválido.', 'danger')
-            return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
+    if cell['match_id']:
+        match = matches.get(cell['match_id'])
+        if not match:
+            raise MatrixCellError('Partido no encontrado o inválido.')
+        standings_delta.capture(match.home_team_id, match.away_team_id)
     else:
         # Check if exists (prevent duplicates if ID matches logic)
-        existing = Match.query.filter_by(
-            league_id=league_id,
-            home_team_id=home_team_id,
-            away_team_id=away_team_id,
-            stage='regular',
-            match_round=match_round
-        ).first()
-        
+        existing = matches.find(home_team_id, away_team_id, match_round)
+
         if existing:
             match = existing
             if league.auto_fill_prices and match.referee_cost_home == '0' and match.referee_cost_away == '0' and match.referee_cost == '0':
@@ -76,11 +91,10 @@ def save_match_matrix():
                     match.referee_cost = str(league.price_referee)
         else:
             if not match_datetime:
-                flash('Debes seleccionar una fecha y hora para programar el partido.', 'danger')
-                return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
+                raise MatrixCellError('Debes seleccionar una fecha y hora para programar el partido.')
 
             match = Match(
-                league_id=league_id,
+                league_id=league.id,
                 home_team_id=home_team_id,
                 away_team_id=away_team_id,
                 stage='regular',
@@ -92,23 +106,17 @@ def save_match_matrix():
                 match.referee_cost_away = str(league.price_per_match)
                 match.referee_cost = str(league.price_referee)
             db.session.add(match)
+            matches.add(match)
 
     # Update Fields
     if match_datetime:
         match.match_date = match_datetime
-    
-    if court_id:
-        match.court_id = court_id
-        
-    # Update Fields
-    if match_datetime:
-        match.match_date = match_datetime
-    
+
     if court_id:
         match.court_id = court_id
-        
+
     # Check for symmetric edit (Swap Detection)
-    # If the match's home team is the form's away team, we are editing from the mirrored side.
+    # If the match's home team is the cell's away team, we are editing from the mirrored side.
     if str(match.home_team_id) == str(away_team_id) and str(match.away_team_id) == str(home_team_id):
         # Swap scores to match the real database alignment
         match.home_score = away_score
@@ -117,13 +125,13 @@ def save_match_matrix():
         # Standard edit
         match.home_score = home_score
         match.away_score = away_score
-    
+
     # Auto-complete if scores are present
     if home_score is not None and away_score is not None:
         match.is_completed = True
-        
+
         if league.enable_shutdown_tiebreaker and match.home_score == match.away_score:
-            shutdown_winner_id = request.form.get('shutdown_winner_id')
+            shutdown_winner_id = cell['shutdown_winner_id']
             if shutdown_winner_id in [str(match.home_team_id), str(match.away_team_id)]:
                 match.shutdown_winner_id = shutdown_winner_id
             else:
@@ -135,33 +143,221 @@ def save_match_matrix():
         match.shutdown_winner_id = None
 
     # Practice Match
-    match.is_practice = request.form.get('is_practice') == 'on'
+    match.is_practice = cell['is_practice']
+    return match
+
+
+def _delete_cell(match_id, matches, standings_delta):
+    if not match_id:
+        raise MatrixCellError('Falta el partido a eliminar.')
+    match = matches.get(match_id)
+    if not match:
+        raise MatrixCellError('Partido no encontrado o inválido.')
+    standings_delta.capture(match.home_team_id, match.away_team_id)
+    db.session.delete(match)
+    matches.remove(match)
+    return match
+
+
+def _batch_cell(data):
+    """Normalize one JSON cell to the fields _save_cell expects."""
+    home_team_id = data.get('home_team_id')
+    away_team_id = data.get('away_team_id')
+    if not home_team_id or not away_team_id:
+        raise MatrixCellError('Faltan datos requeridos.')
+
+    match_datetime = None
+    date_str = data.get('match_date')
+    time_str = data.get('match_time')
+    if date_str and time_str:
+        try:
+            match_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+        except ValueError:
+            raise MatrixCellError('Formato de fecha u hora inválido.')
+
+    try:
+        match_round = int(data.get('match_round') or 1)
+        home_score = _parse_score(data.get('home_score'))
+        away_score = _parse_score(data.get('away_score'))
+    except (TypeError, ValueError):
+        raise MatrixCellError('Marcador o vuelta inválidos.')
 
+    return {
+        'home_team_id': str(home_team_id),
+        'away_team_id': str(away_team_id),
+        'match_id': data.get('match_id') or None,
+        'match_round': match_round,
+        'match_datetime': match_datetime,
+        'court_id': data.get('court_id') or None,
+        'home_score': home_score,
+        'away_score': away_score,
+        'shutdown_winner_id': data.get('shutdown_winner_id'),
+        'is_practice': bool(data.get('is_practice'))
+    }
+
+
+@match_matrix_bp.route('/matches/matrix/save', methods=['POST'])
+@login_required
+@owner_required
+def save_match_matrix():
+    league_id = request.form.get('league_id')
+    home_team_id = request.form.get('home_team_id')
+    away_team_id = request.form.get('away_team_id')
+    match_id = request.form.get('match_id')
+    match_round = request.form.get('match_round', 1, type=int)
+
+    if not league_id or not home_team_id or not away_team_id:
+        flash('Faltan datos requeridos.', 'danger')
+        return redirect(request.referrer or url_for('main.dashboard'))
+
+    # Verify League Ownership
+    league = League.query.get_or_404(league_id)
+    if league.user_id != current_user.id and current_user.role != 'admin':
+        flash('No tienes permiso para editar esta liga.', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    # Parse Date and Time
+    date_str = request.form.get('match_date')
+    time_str = request.form.get('match_time')
+    match_datetime = None
+
+    if date_str and time_str:
+        try:
+            match_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+        except ValueError:
+            flash('Formato de fecha u hora inválido.', 'warning')
+
+    # Get Scores
+    home_score = _parse_score(request.form.get('home_score'))
+    away_score = _parse_score(request.form.get('away_score'))
+
+    # Only the match this cell can address
+    matches = _LeagueMatches(Match.query.filter(
+        Match.league_id == league.id,
+        or_(Match.id == match_id, and_(
+            Match.home_team_id == home_team_id,
+            Match.away_team_id == away_team_id,
+            Match.stage == 'regular',
+            Match.match_round == match_round
+        ))
+    ))
+
+    cell = {
+        'home_team_id': home_team_id,
+        'away_team_id': away_team_id,
+        'match_id': match_id,
+        'match_round': match_round,
+        'match_datetime': match_datetime,
+        'court_id': request.form.get('court_id') or None,
+        'home_score': home_score,
+        'away_score': away_score,
+        'shutdown_winner_id': request.form.get('shutdown_winner_id'),
+        'is_practice': request.form.get('is_practice') == 'on'
+    }
+
+    standings_delta = StandingsDelta(league)
+    try:
+        match = _save_cell(league, cell, matches, standings_delta)
+    except MatrixCellError as e:
+        db.session.rollback()
+        flash(str(e), 'danger')
+        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
+
+    standings_delta.apply()
+    conflicts = conflicts_message(find_conflicts([match]))
     db.session.commit()
     flash('Partido actualizado correctamente.', 'success')
-    
+    if conflicts:
+        flash(conflicts, 'warning')
+
     return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
 
+@match_matrix_bp.route('/matches/matrix/batch', methods=['POST'])
+@login_required
+@owner_required
+def batch_match_matrix():
+    """Apply many matrix cells in one transaction.
+
+    Body: {"league_id": ..., "cells": [{"action": "save"|"delete", ...}]}, where a
+    save cell carries the same fields as the single-cell form. Either every
+    cell is applied or none is; the answer holds the current matrix entries of
+    every pair that was touched and the court double bookings they caused.
+    """
+    data = request.get_json(silent=True) or {}
+    cells = data.get('cells')
+    if not data.get('league_id') or not isinstance(cells, list) or not cells:
+        return jsonify({'error': 'Faltan datos requeridos.'}), 400
+
+    league = League.query.get_or_404(data['league_id'])
+    if league.user_id != current_user.id and current_user.role != 'admin':
+        return jsonify({'error': 'No tienes permiso para editar esta liga.'}), 403
+
+    # One query for every match the cells may address
+    matches = _LeagueMatches(Match.query.filter_by(league_id=league.id).all())
+    standings_delta = StandingsDelta(league)
+    touched = set()
+    saved = {}  # by object, since new matches get their id on flush
+
+    for index, raw in enumerate(cells):
+        try:
+            if not isinstance(raw, dict):
+                raise MatrixCellError('Celda inválida.')
+            if raw.get('action') == 'delete':
+                match = _delete_cell(raw.get('match_id'), matches, standings_delta)
+                saved.pop(id(match), None)
+            else:
+                match = _save_cell(league, _batch_cell(raw), matches, standings_delta)
+                saved[id(match)] = match
+        except MatrixCellError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'index': index}), 400
+        touched.add(tuple(sorted([str(match.home_team_id), str(match.away_team_id)])))
+
+    standings_delta.apply()
+    # Checked once for the whole batch, so cells that clash with each other are reported too
+    conflicts = find_conflicts(list(saved.values()))
+    conflicts_json = conflicts_payload(conflicts)
+    db.session.commit()
+
+    # Rounds are assigned by date order, so resend the whole of each touched pair
+    teams = [t for t in Team.query.filter_by(league_id=league.id) if not t.is_deleted and not t.is_hidden]
+    regular_matches = Match.query.filter(
+        Match.league_id == league.id,
+        or_(Match.stage == 'regular', Match.stage == None, Match.stage == '')
+    ).order_by(Match.match_date).all()
+    matrix = matrix_payload(teams, regular_matches, matrix_rounds(league), league_groups(league.id))
+
+    return jsonify({
+        'conflicts': conflicts_json,
+        'rounds': matrix['rounds'],
+        'pairs': sorted(list(pair) for pair in touched),
+        'matches': [entry for entry in matrix['matches']
+                    if tuple(sorted([entry['home_id'], entry['away_id']])) in touched]
+    })
+
 @match_matrix_bp.route('/matches/matrix/delete', methods=['POST'])
 @login_required
 @owner_required
 def delete_match_matrix():
     match_id = request.form.get('match_id')
     league_id = request.form.get('league_id')
-    
+
     if not match_id or not league_id:
         flash('Datos incompletos para eliminar.', 'danger')
         return redirect(request.referrer)
 
     match = Match.query.get_or_404(match_id)
-    
+
     # Security Check
     if match.league.user_id != current_user.id and current_user.role != 'admin':
         flash('No tienes permiso.', 'danger')
         return redirect(url_for('main.dashboard'))
-        
+
+    standings_delta = StandingsDelta(match.league)
+    standings_delta.capture(match.home_team_id, match.away_team_id)
     db.session.delete(match)
+    standings_delta.apply()
     db.session.commit()
-    
+
     flash('Partido eliminado.', 'info')
     return redirect(url_for('league.league_detail', league_id=league_id, _anchor='matches'))
@@ -10,6 +10,7 @@ from openpyxl.utils import get_column_letter
 from io import BytesIO
 from flask import send_file
 import hashlib
+from utils.conflicts import overlapping_pairs, match_duration, week_conflicts
 
 def process_archives(archived_finances, group_by, financial_data, court_totals, total_month_profit=None):
     for archive in archived_finances:
@@ -189,17 +190,11 @@ def global_schedule():
         grouped_schedule[court_name]['total_referee'] += exp_ref
         grouped_schedule[court_name]['total_profit'] += ((vis_home + vis_away) - exp_ref)
 
-    # Detect conflicts (same date+time in same court)
+    # Detect conflicts (overlapping matches on the same court name)
+    with_court = sorted((m for m in matches if m.court), key=lambda m: (m.court.name, m.match_date))
     conflicting_match_ids = set()
-    for court_name, data in grouped_schedule.items():
-        time_counts = {}
-        for match in data['matches']:
-            if not match.match_date: continue
-            time_counts[match.match_date] = time_counts.get(match.match_date, 0) + 1
-            
-        for match in data['matches']:
-            if match.match_date and time_counts[match.match_date] > 1:
-                conflicting_match_ids.add(match.id)
+    for earlier, later in overlapping_pairs(with_court, match_duration()):
+        conflicting_match_ids.update((earlier.id, later.id))
 
     # Sort groups by name
     sorted_schedule = dict(sorted(grouped_schedule.items()))
@@ -211,6 +206,37 @@ def global_schedule():
                          time_from=time_from_str,
                          time_to=time_to_str)
 
+@report_bp.route('/global-schedule/conflicts')
+@login_required
+def global_schedule_conflicts():
+    """Court double bookings of a whole week across all the owner's leagues."""
+    if not getattr(current_user, 'is_ultra', False):
+        flash('No tienes acceso a esta funcionalidad (Ultra Premium).', 'warning')
+        return redirect(url_for('report.index'))
+
+    date_str = request.args.get('date')
+    try:
+        selected_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else datetime.now().date()
+    except ValueError:
+        selected_date = datetime.now().date()
+
+    # Weeks start on Monday
+    week_start = datetime.combine(selected_date - timedelta(days=selected_date.weekday()), datetime.min.time())
+    conflicts = week_conflicts(current_user.id, week_start)
+
+    conflicts_by_day = {}
+    for earlier, later in conflicts:
+        conflicts_by_day.setdefault(later.match_date.date(), []).append((earlier, later))
+
+    return render_template('report/conflicts.html',
+                         conflicts_by_day=conflicts_by_day,
+                         total_conflicts=len(conflicts),
+                         week_start=week_start.date(),
+                         week_end=(week_start + timedelta(days=6)).date(),
+                         prev_week=(week_start - timedelta(days=7)).date(),
+                         next_week=(week_start + timedelta(days=7)).date(),
+                         duration_minutes=int(match_duration().total_seconds() // 60))
+
 @report_bp.route('/global-schedule/share')
 @login_required
 def share_global_schedule():
@@ -354,6 +380,10 @@ def update_match_costs():
     if not match:
         return jsonify({'error': 'Match not found'}), 404
         
+    from utils.standings import StandingsDelta
+    standings_delta = StandingsDelta(match.league)
+    standings_delta.capture(match.home_team_id, match.away_team_id)
+
     # Update cost fields if provided
     if cost_home is not None:
         match.referee_cost_home = str(cost_home)
@@ -381,6 +411,7 @@ def update_match_costs():
     else:
         match.is_completed = False
     
+    standings_delta.apply()
     db.session.commit()
     
     return jsonify({'success': True, 'match_id': match.id, 'is_completed': match.is_completed})
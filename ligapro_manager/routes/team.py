@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required, current_user
 from extensions import db, bcrypt
 from models import League, Team, Match, Player, TeamNote, User, SeasonStat
 from forms import TeamForm, PlayerForm
 from utils.decorators import owner_required
+from utils.cache import bump_revision
+from utils.pagination import match_keyset_page, team_matches_query
+from utils.groups import GroupError, draw_groups, assign_groups, clear_groups
+from utils.helpers import calculate_standings
 
 team_bp = Blueprint('team', __name__)
 
@@ -62,6 +66,56 @@ def create_team(league_id):
     return render_template('team_form.html', form=form, league=league, title='Nuevo Equipo')
 
 
+@team_bp.route('/leagues/<league_id>/groups', methods=['POST'])
+@login_required
+@owner_required
+def create_groups(league_id):
+    league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
+    count = request.form.get('group_count', type=int) or 0
+
+    # Dealt in snake order from the table (or shuffled), so groups come out balanced
+    teams = [s['team'] for s in calculate_standings(league_id)]
+    try:
+        groups = draw_groups(league, count, teams, shuffle=request.form.get('distribution') == 'random')
+    except GroupError as e:
+        db.session.rollback()
+        flash(str(e), 'danger')
+        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='teams'))
+
+    db.session.commit()
+    flash(f'Se crearon {len(groups)} grupos ({groups[0].name}-{groups[-1].name}).', 'success')
+    return redirect(url_for('league.league_detail', league_id=league_id, _anchor='teams'))
+
+
+@team_bp.route('/leagues/<league_id>/groups/assign', methods=['POST'])
+@login_required
+@owner_required
+def update_groups(league_id):
+    league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
+    assignments = {key[len('group_'):]: value for key, value in request.form.items() if key.startswith('group_')}
+    try:
+        assign_groups(league, assignments)
+    except GroupError as e:
+        db.session.rollback()
+        flash(str(e), 'danger')
+        return redirect(url_for('league.league_detail', league_id=league_id, _anchor='teams'))
+
+    db.session.commit()
+    flash('Grupos actualizados.', 'success')
+    return redirect(url_for('league.league_detail', league_id=league_id, _anchor='teams'))
+
+
+@team_bp.route('/leagues/<league_id>/groups/delete', methods=['POST'])
+@login_required
+@owner_required
+def delete_groups(league_id):
+    league = League.query.filter_by(id=league_id, user_id=current_user.id).first_or_404()
+    clear_groups(league)
+    db.session.commit()
+    flash('Grupos eliminados. Los equipos vuelven a una sola tabla.', 'success')
+    return redirect(url_for('league.league_detail', league_id=league_id, _anchor='teams'))
+
+
 @team_bp.route('/teams/<team_id>')
 @login_required
 def team_detail(team_id):
@@ -86,9 +140,7 @@ def team_detail(team_id):
         notes_query = notes_query.filter_by(is_public=True)
     
     notes = notes_query.order_by(TeamNote.created_at.desc()).all()
-    matches = Match.query.filter(
-        (Match.home_team_id == team_id) | (Match.away_team_id == team_id)
-    ).order_by(Match.match_date.desc()).all()
+    matches_page = match_keyset_page(team_matches_query(team))
     
     teams_dict = {t.id: t for t in Team.query.filter_by(league_id=league.id).all()}
     
@@ -99,11 +151,30 @@ def team_detail(team_id):
                           league=league,
                           players=players,
                           notes=notes,
-                          matches=matches,
+                          matches_page=matches_page,
                           teams_dict=teams_dict,
                           team_scorers=team_scorers)
 
 
+@team_bp.route('/teams/<team_id>/matches')
+@login_required
+def team_matches(team_id):
+    """Next page of team_detail's match list ("Cargar más")."""
+    team = Team.query.get_or_404(team_id)
+    league = team.league
+
+    if current_user.role == 'captain':
+        if current_user.team_id != team_id:
+            abort(403)
+    elif league.user_id != current_user.id:
+        abort(403)
+
+    matches_page = match_keyset_page(team_matches_query(team), request.args.get('cursor'))
+    teams_dict = {t.id: t for t in Team.query.filter_by(league_id=league.id).all()}
+    return render_template('team_matches_fragment.html', team=team, league=league,
+                           matches_page=matches_page, teams_dict=teams_dict)
+
+
 @team_bp.route('/teams/<team_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_team(team_id):
@@ -145,7 +216,9 @@ def delete_team(team_id):
     league_id = team.league_id
     
     # Soft Delete: Mark as deleted, preserve COMPLETED matches
-    # remove UPCOMING matches as they cannot be played
+    # remove UPCOMING matches as they cannot be played.
+    # Persisted standings need no delta: only unplayed matches go away, and the
+    # team's own row is simply skipped once it is marked as deleted.
     Match.query.filter(
         (Match.home_team_id == team_id) | (Match.away_team_id == team_id),
         Match.is_completed == False
@@ -171,6 +244,9 @@ def delete_team(team_id):
     
     # Do NOT delete the team record itself
     # db.session.delete(team) 
+
+    # Bulk deletes bypass the flush hook
+    bump_revision(league_id)
     
     db.session.commit()
     flash('Equipo eliminado de la competencia. Sus partidos históricos se conservan.', 'success')
@@ -22,3 +22,25 @@ document.addEventListener('DOMContentLoaded', () => {
         document.querySelectorAll('.fixed.top-4 > div').forEach(el => el.remove());
     }, 5000);
 });
+
+// "Cargar más" buttons: swap the button's wrapper (.load-more) for the next page fragment
+function loadMore(button) {
+    const wrapper = button.closest('.load-more');
+    button.disabled = true;
+
+    fetch(button.dataset.url)
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            return response.text();
+        })
+        .then(html => {
+            const template = document.createElement('template');
+            template.innerHTML = html;
+            // Pages with their own widget setup (league_detail) wire up the new rows too
+            if (typeof initFragment === 'function') initFragment(template.content);
+            wrapper.replaceWith(template.content);
+        })
+        .catch(() => {
+            button.disabled = false;
+        });
+}
@@ -1,5 +1,59 @@
 document.addEventListener('DOMContentLoaded', function () {
-    const teamSelects = document.querySelectorAll('.team-select');
+    initFragment(document);
+
+    // Initialize tab from URL hash on load
+    if (window.location.hash) {
+        const tab = window.location.hash.substring(1);
+        if (document.getElementById(tab)) {
+            showTab(tab);
+        }
+    }
+
+    // Wire up Delete Button for Matrix
+    const btnDeleteMatrix = document.getElementById('btn-delete-matrix-match');
+    if (btnDeleteMatrix) {
+        btnDeleteMatrix.addEventListener('click', function () {
+            const matchId = document.getElementById('matrix_match_id').value;
+            if (matchId) {
+                document.getElementById('delete_matrix_match_id').value = matchId;
+                document.getElementById('deleteMatrixForm').submit();
+            }
+        });
+    }
+
+    // Modal matrix scores match tiebreaker dynamic logic
+    const matrixHomeInput = document.getElementById('matrix_home_score');
+    const matrixAwayInput = document.getElementById('matrix_away_score');
+    const matrixShutdownSection = document.getElementById('matrix_shutdown_section');
+    const matrixRadios = document.querySelectorAll('input[name="shutdown_winner_id"]');
+
+    function toggleMatrixShutdownSection() {
+        if (!matrixShutdownSection) return;
+        const homeScore = matrixHomeInput.value;
+        const awayScore = matrixAwayInput.value;
+        
+        if (homeScore !== '' && awayScore !== '' && homeScore === awayScore) {
+            matrixShutdownSection.classList.remove('hidden');
+        } else {
+            matrixShutdownSection.classList.add('hidden');
+            matrixRadios.forEach(radio => radio.checked = false);
+        }
+    }
+
+    if (matrixHomeInput && matrixAwayInput && matrixShutdownSection) {
+        matrixHomeInput.addEventListener('input', toggleMatrixShutdownSection);
+        matrixAwayInput.addEventListener('input', toggleMatrixShutdownSection);
+    }
+
+    const matrixForm = document.getElementById('matrixMatchForm');
+    if (matrixForm) {
+        matrixForm.addEventListener('submit', submitMatrixScore);
+    }
+});
+
+// Wire up the controls inside `root` (the document, or a tab fragment just inserted)
+function initFragment(root) {
+    const teamSelects = root.querySelectorAll('.team-select');
 
     teamSelects.forEach(select => {
         select.addEventListener('change', function () {
@@ -26,27 +80,8 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     });
 
-    // Initialize tab from URL hash on load
-    if (window.location.hash) {
-        const tab = window.location.hash.substring(1);
-        if (document.getElementById(tab)) {
-            showTab(tab);
-        }
-    }
-
-    // Restore match/playoff preference on load
-    const pref = localStorage.getItem('matchView');
-    if (pref) {
-        toggleMatchView(pref);
-    }
-
-    const playoffPref = localStorage.getItem('playoffView');
-    if (playoffPref) {
-        togglePlayoffView(playoffPref);
-    }
-
     // Toggle highlight settings visibility
-    const highlightToggle = document.getElementById('toggle-highlight');
+    const highlightToggle = root.querySelector('#toggle-highlight');
     if (highlightToggle) {
         highlightToggle.addEventListener('change', function () {
             const box = document.getElementById('highlight-settings-box');
@@ -59,7 +94,7 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // Toggle custom color settings visibility
-    const customColorToggle = document.getElementById('toggle-custom-color');
+    const customColorToggle = root.querySelector('#toggle-custom-color');
     if (customColorToggle) {
         customColorToggle.addEventListener('change', function () {
             const box = document.getElementById('custom-color-box');
@@ -72,7 +107,7 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // Toggle player limit visibility
-    const playerLimitToggle = document.getElementById('toggle-player-limit');
+    const playerLimitToggle = root.querySelector('#toggle-player-limit');
     if (playerLimitToggle) {
         playerLimitToggle.addEventListener('change', function () {
             const box = document.getElementById('player-limit-box');
@@ -85,8 +120,8 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // Validate highlight range
-    const hStart = document.getElementById('h-start');
-    const hEnd = document.getElementById('h-end');
+    const hStart = root.querySelector('#h-start');
+    const hEnd = root.querySelector('#h-end');
 
     if (hStart && hEnd) {
         function validateRange() {
@@ -104,22 +139,10 @@ document.addEventListener('DOMContentLoaded', function () {
         hEnd.addEventListener('change', validateRange);
     }
 
-    // Wire up Delete Button for Matrix
-    const btnDeleteMatrix = document.getElementById('btn-delete-matrix-match');
-    if (btnDeleteMatrix) {
-        btnDeleteMatrix.addEventListener('click', function () {
-            const matchId = document.getElementById('matrix_match_id').value;
-            if (matchId) {
-                document.getElementById('delete_matrix_match_id').value = matchId;
-                document.getElementById('deleteMatrixForm').submit();
-            }
-        });
-    }
-
     // Global Form Submission Loader
     const loadingOverlay = document.getElementById('loadingOverlay');
     if (loadingOverlay) {
-        document.querySelectorAll('form').forEach(form => {
+        root.querySelectorAll('form').forEach(form => {
             // Skip forms that open in new tabs (like some reports)
             if (form.target === '_blank') return;
 
@@ -132,31 +155,7 @@ document.addEventListener('DOMContentLoaded', function () {
             });
         });
     }
-
-    // Modal matrix scores match tiebreaker dynamic logic
-    const matrixHomeInput = document.getElementById('matrix_home_score');
-    const matrixAwayInput = document.getElementById('matrix_away_score');
-    const matrixShutdownSection = document.getElementById('matrix_shutdown_section');
-    const matrixRadios = document.querySelectorAll('input[name="shutdown_winner_id"]');
-
-    function toggleMatrixShutdownSection() {
-        if (!matrixShutdownSection) return;
-        const homeScore = matrixHomeInput.value;
-        const awayScore = matrixAwayInput.value;
-        
-        if (homeScore !== '' && awayScore !== '' && homeScore === awayScore) {
-            matrixShutdownSection.classList.remove('hidden');
-        } else {
-            matrixShutdownSection.classList.add('hidden');
-            matrixRadios.forEach(radio => radio.checked = false);
-        }
-    }
-
-    if (matrixHomeInput && matrixAwayInput && matrixShutdownSection) {
-        matrixHomeInput.addEventListener('input', toggleMatrixShutdownSection);
-        matrixAwayInput.addEventListener('input', toggleMatrixShutdownSection);
-    }
-});
+}
 
 function showTab(tabId) {
     // Hide all tab contents
@@ -184,6 +183,21 @@ function showTab(tabId) {
     // Update URL hash without jumping
     history.pushState(null, null, `#${tabId}`);
 
+    loadTabFragment(selectedContent).then(firstLoad => {
+        if (tabId === 'standings') {
+            loadStandingsTimeline();
+        }
+        if (!firstLoad) return;
+
+        // Restore match/playoff view preference once the tab is in the page
+        if (tabId === 'matches' && localStorage.getItem('matchView')) {
+            toggleMatchView(localStorage.getItem('matchView'));
+        }
+        if (tabId === 'playoff' && localStorage.getItem('playoffView')) {
+            togglePlayoffView(localStorage.getItem('playoffView'));
+        }
+    });
+
     // Toggle header buttons based on active tab
     const btnModificar = document.getElementById('btn-modificar-puntajes');
     const btnAnadir = document.getElementById('btn-anadir-equipo');
@@ -227,6 +241,39 @@ function togglePlayoffView(view) {
     localStorage.setItem('playoffView', view);
 }
 
+// --- Lazy Tab Fragments ---
+// Containers with data-fragment are filled from league.league_tab the first time they are shown.
+// Resolves to true when the fragment was inserted by this call.
+async function loadTabFragment(container) {
+    if (!container || !container.dataset.fragment || container.dataset.loaded) return false;
+    container.dataset.loaded = 'loading';
+
+    try {
+        const response = await fetch(container.dataset.fragment);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        container.innerHTML = await response.text();
+    } catch (error) {
+        console.error('Fragment error:', error);
+        delete container.dataset.loaded;
+        container.innerHTML = '<p class="text-center text-red-400 py-12">No se pudo cargar esta sección. Intenta de nuevo.</p>';
+        return false;
+    }
+
+    runFragmentScripts(container);
+    initFragment(container);
+    container.dataset.loaded = 'true';
+    return true;
+}
+
+// Scripts inserted through innerHTML do not run; replace them with live copies
+function runFragmentScripts(root) {
+    root.querySelectorAll('script').forEach(oldScript => {
+        const script = document.createElement('script');
+        script.textContent = oldScript.textContent;
+        oldScript.replaceWith(script);
+    });
+}
+
 // Note: openShareModal, closeShareModal, toggleDateInputs, toggleUpcomingDateInputs removed from here
 // as they are already defined in share_modal.js and included via share_modal_fragment.html.
 
@@ -238,6 +285,8 @@ function toggleMatchView(view) {
     const btnMatrix = document.getElementById('btn-view-matrix');
     const btnDates = document.getElementById('btn-view-dates');
 
+    if (!listView || !matrixView || !datesView) return;
+
     // Reset all views
     listView.classList.add('hidden');
     matrixView.classList.add('hidden');
@@ -256,10 +305,12 @@ function toggleMatchView(view) {
         btnList.classList.remove('text-white/60', 'hover:text-white');
         btnList.classList.add('bg-primary', 'text-white');
     } else if (view === 'matrix') {
+        loadTabFragment(matrixView);
         matrixView.classList.remove('hidden');
         btnMatrix.classList.remove('text-white/60', 'hover:text-white');
         btnMatrix.classList.add('bg-primary', 'text-white');
     } else if (view === 'dates') {
+        loadTabFragment(datesView);
         datesView.classList.remove('hidden');
         btnDates.classList.remove('text-white/60', 'hover:text-white');
         btnDates.classList.add('bg-primary', 'text-white');
@@ -281,7 +332,59 @@ function toggleDateCollapse(id) {
     }
 }
 
+// Index of window.matrixData (sparse list of placed matches), rebuilt when the matrix tab reloads
+let matrixIndex = null;
+let matrixIndexSource = null;
+
+function matrixCell(round, homeId, awayId) {
+    const data = window.matrixData;
+    if (matrixIndexSource !== data) {
+        matrixIndex = new Map();
+        (data ? data.matches : []).forEach(entry => {
+            matrixIndex.set(`${entry.round}|${entry.home_id}|${entry.away_id}`, [entry, false]);
+            // Mirror cell: same match seen from the away side
+            matrixIndex.set(`${entry.round}|${entry.away_id}|${entry.home_id}`, [entry, true]);
+        });
+        matrixIndexSource = data;
+    }
+
+    const placed = matrixIndex.get(`${round}|${homeId}|${awayId}`);
+    if (!placed) {
+        return { status: 'empty', home_id: homeId, away_id: awayId, round: round };
+    }
+
+    const [entry, swapped] = placed;
+    return {
+        status: entry.is_completed ? 'completed' : 'scheduled',
+        swapped: swapped,
+        match: {
+            id: entry.id,
+            home_score: swapped ? entry.away_score : entry.home_score,
+            away_score: swapped ? entry.home_score : entry.away_score,
+            match_date_iso: entry.match_date_iso,
+            match_date_display: entry.match_date_display,
+            match_time_display: entry.match_time_display,
+            court_id: entry.court_id,
+            is_completed: entry.is_completed,
+            shutdown_winner_id: entry.shutdown_winner_id,
+            is_practice: entry.is_practice
+        },
+        home_id: homeId,
+        away_id: awayId
+    };
+}
+
+// Cells reference teams by their position in matrixData.teams to keep the markup small
+function openMatrixCell(round, homeIndex, awayIndex) {
+    const teams = window.matrixData.teams;
+    openMatrixModal(matrixCell(round, teams[homeIndex], teams[awayIndex]));
+}
+
+// Cell the matrix modal was opened for
+let matrixModalCell = null;
+
 function openMatrixModal(cellData) {
+    matrixModalCell = cellData;
     const modal = document.getElementById('matrixMatchModal');
     const home = window.teamsData[cellData.home_id];
     const away = window.teamsData[cellData.away_id];
@@ -423,6 +526,200 @@ function closeMatrixModal() {
     document.getElementById('matrixMatchModal').classList.remove('flex');
 }
 
+// Scores of a placed match are saved through match.record_score and patched into the page;
+// new matches and date/court changes still go through the regular form post.
+async function submitMatrixScore(event) {
+    const form = event.target;
+    const cell = matrixModalCell;
+    if (!cell || !cell.match || !form.dataset.scoreUrl) return;
+
+    const [date, time] = cell.match.match_date_iso.split('T');
+    const rescheduled = form.match_date.value !== date
+        || form.match_time.value !== time.substring(0, 5)
+        || form.court_id.value !== (cell.match.court_id || '');
+    if (rescheduled) return;
+
+    event.preventDefault();
+    let homeScore = form.home_score.value;
+    let awayScore = form.away_score.value;
+    if (cell.swapped) {
+        // The cell shows the match from the away side
+        [homeScore, awayScore] = [awayScore, homeScore];
+    }
+    const winner = form.querySelector('input[name="shutdown_winner_id"]:checked');
+
+    let response;
+    try {
+        response = await fetch(form.dataset.scoreUrl.replace('__MATCH_ID__', cell.match.id), {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                home_score: homeScore,
+                away_score: awayScore,
+                shutdown_winner_id: winner ? winner.value : null,
+                is_practice: form.is_practice.checked
+            })
+        });
+    } catch (error) {
+        form.submit();
+        return;
+    }
+
+    const result = await response.json().catch(() => ({}));
+    if (!response.ok) {
+        alert(result.error || 'No se pudo guardar el resultado.');
+        return;
+    }
+
+    applyMatchResult(result);
+    closeMatrixModal();
+}
+
+function applyMatchResult(result) {
+    const entry = result.match;
+    const data = window.matrixData;
+    if (data && entry.round) {
+        const index = data.matches.findIndex(m => m.id === entry.id);
+        if (index >= 0) data.matches[index] = entry;
+        else data.matches.push(entry);
+        matrixIndexSource = null;
+
+        const homeIndex = data.teams.indexOf(entry.home_id);
+        const awayIndex = data.teams.indexOf(entry.away_id);
+        if (homeIndex >= 0 && awayIndex >= 0) {
+            renderMatrixCell(entry.round, homeIndex, awayIndex);
+            renderMatrixCell(entry.round, awayIndex, homeIndex);
+        }
+    }
+
+    patchStandings(result);
+
+    // Other loaded views show the old result; fetch them again next time they are opened
+    // Group tables are not patched in place either
+    document.querySelectorAll('[data-fragment][data-loaded="true"]').forEach(container => {
+        if (!container.querySelector('.matrix-round-container') &&
+            (!container.querySelector('#standings-rows') || container.querySelector('[data-group-table]'))) {
+            delete container.dataset.loaded;
+        }
+    });
+}
+
+// Same markup as a cell of league_tabs/matrix.html
+function renderMatrixCell(round, homeIndex, awayIndex) {
+    // Each group has its own table; cells only exist for pairs inside one group
+    const groups = window.matrixData.groups || [{ start: 0, size: window.matrixData.teams.length }];
+    const group = groups.findIndex(g => homeIndex >= g.start && homeIndex < g.start + g.size);
+    if (group < 0) return;
+    const { start, size } = groups[group];
+    if (awayIndex < start || awayIndex >= start + size) return;
+
+    const button = document.querySelector(
+        `#matrix-round-${round} table[data-group="${group}"] tbody tr:nth-child(${homeIndex - start + 1}) td:nth-of-type(${awayIndex - start + 1}) button`);
+    if (!button) return;
+
+    const teams = window.matrixData.teams;
+    const cell = matrixCell(round, teams[homeIndex], teams[awayIndex]);
+    const practice = cell.match && cell.match.is_practice
+        ? '<span class="text-[10px] text-yellow-500 font-bold uppercase tracking-tighter"><i class="fas fa-dumbbell mr-0.5"></i>Práctica</span>'
+        : '';
+
+    if (cell.status === 'completed') {
+        const m = cell.match;
+        const scoreColor = m.home_score > m.away_score ? 'text-green-400' : m.home_score < m.away_score ? 'text-red-400' : 'text-white';
+        button.innerHTML = `<span class="font-bold text-lg ${scoreColor} group-hover:scale-110 transition-transform">${m.home_score} - ${m.away_score}</span>`
+            + '<span class="text-[10px] text-green-400">Finalizado</span>'
+            + practice
+            + `<span class="text-xs text-white/40 mt-1">${m.match_date_display}</span>`;
+    } else if (cell.status === 'scheduled') {
+        const m = cell.match;
+        let html = `<span class="text-sm text-blue-400 font-bold group-hover:text-blue-300">${m.match_date_display}</span>`;
+        if (m.match_time_display && !m.match_time_display.includes('00:00')) {
+            html += `<span class="text-[10px] text-white/40">${m.match_time_display}</span>`;
+        }
+        button.innerHTML = html + practice
+            + '<i class="fas fa-pencil-alt text-[10px] text-white/0 group-hover:text-white/40 mt-1 transition-colors"></i>';
+    } else {
+        button.innerHTML = '<span class="text-white/20 text-2xl group-hover:text-white/60 transition-colors">-</span>';
+    }
+}
+
+// Update the standings table (if loaded) and the panel's top five from a record_score answer
+// Same markup as the form cell of league_tabs/standings.html
+function patchForm(body, teamId, entry) {
+    const tr = body.querySelector(`tr[data-team-id="${teamId}"]`);
+    if (!tr) return;
+    const cell = tr.querySelector('[data-stat="form"] div');
+    if (cell) {
+        cell.replaceChildren(...entry.form.map(result => {
+            const span = document.createElement('span');
+            span.className = `form-result form-${result}`;
+            span.textContent = result;
+            return span;
+        }));
+    }
+    ['unbeaten', 'winless'].forEach(field => {
+        const td = tr.querySelector(`[data-stat="${field}"]`);
+        if (td) td.textContent = entry[field];
+    });
+}
+
+function patchStandings(result) {
+    const body = document.getElementById('standings-rows');
+    if (body) {
+        result.standings.forEach(row => {
+            const tr = body.querySelector(`tr[data-team-id="${row.team_id}"]`);
+            if (!tr) return;
+            tr.querySelectorAll('[data-stat]').forEach(td => {
+                if (td.dataset.stat in row) td.textContent = row[td.dataset.stat];
+            });
+        });
+        result.order.forEach((teamId, index) => {
+            const tr = body.querySelector(`tr[data-team-id="${teamId}"]`);
+            if (!tr) return;
+            body.appendChild(tr);
+            tr.querySelector('[data-stat="position"]').textContent = index + 1;
+        });
+        Object.entries(result.ratings || {}).forEach(([teamId, rating]) => {
+            const cell = body.querySelector(`tr[data-team-id="${teamId}"] [data-stat="rating"]`);
+            if (cell) cell.textContent = rating;
+        });
+        Object.keys(result.form || {}).forEach(teamId => patchForm(body, teamId, result.form[teamId]));
+    }
+
+    const leaders = document.getElementById('panel-leaders');
+    if (leaders && result.leaders) {
+        leaders.replaceChildren(...result.leaders.map(row => {
+            const tr = document.createElement('tr');
+            tr.className = 'border-b border-white/5 hover:bg-white/5';
+
+            const position = document.createElement('td');
+            position.className = 'py-2 text-primary font-bold';
+            position.textContent = row.position;
+
+            const team = document.createElement('td');
+            team.className = 'py-2 flex items-center gap-2';
+            if (row.shield_url) {
+                const img = document.createElement('img');
+                img.src = row.shield_url;
+                img.className = 'w-6 h-6 rounded object-cover';
+                team.appendChild(img);
+            }
+            team.appendChild(document.createTextNode(row.name));
+
+            const played = document.createElement('td');
+            played.className = 'text-center py-2';
+            played.textContent = row.played;
+
+            const points = document.createElement('td');
+            points.className = 'text-center py-2 font-bold';
+            points.textContent = row.points;
+
+            tr.append(position, team, played, points);
+            return tr;
+        }));
+    }
+}
+
 function showMatrixRound(round) {
     // Hide all rounds
     document.querySelectorAll('.matrix-round-container').forEach(el => el.classList.add('hidden'));
@@ -446,3 +743,164 @@ function showMatrixRound(round) {
         activeBtn.classList.add('bg-primary', 'text-white');
     }
 }
+
+
+// --- Standings Timeline ---
+let timelineData = null;
+let timelineChart = null;
+let timelineMetric = 'positions';
+
+function loadScript(src) {
+    return new Promise((resolve, reject) => {
+        const script = document.createElement('script');
+        script.src = src;
+        script.onload = resolve;
+        script.onerror = reject;
+        document.head.appendChild(script);
+    });
+}
+
+async function loadStandingsTimeline() {
+    const container = document.getElementById('standings-timeline');
+    if (!container || timelineData) return;
+
+    try {
+        const [response] = await Promise.all([
+            fetch(container.dataset.url),
+            window.Chart ? Promise.resolve() : loadScript('https://cdn.jsdelivr.net/npm/chart.js')
+        ]);
+        timelineData = await response.json();
+    } catch (error) {
+        console.error('Timeline error:', error);
+        return;
+    }
+
+    if (!timelineData.steps || timelineData.steps.length === 0) {
+        document.getElementById('standingsTimelineChart').parentElement.classList.add('hidden');
+        document.getElementById('standings-timeline-empty').classList.remove('hidden');
+        return;
+    }
+    renderStandingsTimeline();
+}
+
+async function loadSeasonProbabilities() {
+    const container = document.getElementById('season-probabilities');
+    const summary = document.getElementById('season-probabilities-summary');
+    const mode = document.getElementById('season-probabilities-mode').value;
+    summary.textContent = 'Simulando...';
+
+    let data;
+    try {
+        const response = await fetch(`${container.dataset.url}?mode=${encodeURIComponent(mode)}`);
+        data = await response.json();
+    } catch (error) {
+        console.error('Probabilities error:', error);
+        summary.textContent = 'No se pudo calcular la proyección.';
+        return;
+    }
+
+    const percent = value => value === null ? '-' : `${(value * 100).toFixed(1)}%`;
+    summary.textContent = `${data.runs.toLocaleString('es-MX')} simulaciones de ${data.remaining} partidos pendientes.`
+        + (data.qualified ? ` Clasifican ${data.qualified}${data.byes ? `, descansan en repechaje los ${data.byes} primeros` : ''}.` : ' La liga no alcanza para liguilla en este formato.');
+
+    const table = document.getElementById('season-probabilities-table');
+    table.querySelector('[data-column="playoffs"]').classList.toggle('hidden', !data.qualified);
+    table.querySelector('[data-column="bye"]').classList.toggle('hidden', !data.byes);
+    table.querySelector('tbody').replaceChildren(...data.teams.map(team => {
+        const tr = document.createElement('tr');
+        tr.className = 'border-b border-white/5';
+
+        const name = document.createElement('td');
+        name.className = 'p-2 font-medium';
+        name.textContent = team.name;
+        tr.appendChild(name);
+
+        [['title', true], ['playoffs', !!data.qualified], ['bye', !!data.byes]].forEach(([key, shown]) => {
+            if (!shown) return;
+            const td = document.createElement('td');
+            td.className = 'p-2 text-center';
+            td.textContent = percent(team[key]);
+            tr.appendChild(td);
+        });
+
+        // One bar per final position, opacity by probability
+        const positions = document.createElement('td');
+        positions.className = 'p-2';
+        const bars = document.createElement('div');
+        bars.className = 'flex gap-px';
+        team.positions.forEach((p, index) => {
+            const bar = document.createElement('div');
+            bar.className = 'w-3 h-4 rounded-sm bg-primary';
+            bar.style.opacity = Math.max(p, 0.04);
+            bar.title = `${index + 1}º: ${percent(p)}`;
+            bars.appendChild(bar);
+        });
+        positions.appendChild(bars);
+        tr.appendChild(positions);
+        return tr;
+    }));
+    table.classList.remove('hidden');
+}
+
+function setTimelineMetric(metric) {
+    timelineMetric = metric;
+    document.querySelectorAll('.timeline-metric-btn').forEach(btn => {
+        const active = btn.dataset.metric === metric;
+        btn.classList.toggle('bg-primary', active);
+        btn.classList.toggle('text-white', active);
+        btn.classList.toggle('text-white/60', !active);
+    });
+    if (timelineData) renderStandingsTimeline();
+}
+
+function renderStandingsTimeline() {
+    const ctx = document.getElementById('standingsTimelineChart').getContext('2d');
+    if (timelineChart) {
+        timelineChart.destroy();
+    }
+
+    const isPosition = timelineMetric === 'positions';
+    timelineChart = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: timelineData.steps.map(step => step.label),
+            datasets: timelineData.teams.map((team, index) => {
+                const color = `hsl(${Math.round(index * 360 / timelineData.teams.length)}, 70%, 60%)`;
+                return {
+                    label: team.name,
+                    data: team[timelineMetric],
+                    borderColor: color,
+                    backgroundColor: color,
+                    borderWidth: 2,
+                    pointRadius: 3,
+                    tension: 0.2
+                };
+            })
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            interaction: { mode: 'index', intersect: false },
+            plugins: {
+                legend: { labels: { color: 'rgba(255,255,255,0.7)', boxWidth: 12 } },
+                tooltip: {
+                    callbacks: {
+                        title: items => {
+                            const step = timelineData.steps[items[0].dataIndex];
+                            return `${step.label} (${step.date})`;
+                        }
+                    }
+                }
+            },
+            scales: {
+                x: { ticks: { color: 'rgba(255,255,255,0.5)' }, grid: { color: 'rgba(255,255,255,0.05)' } },
+                y: {
+                    reverse: isPosition,
+                    min: isPosition ? 1 : undefined,
+                    ticks: { color: 'rgba(255,255,255,0.5)', precision: 0 },
+                    grid: { color: 'rgba(255,255,255,0.05)' }
+                }
+            }
+        }
+    });
+}
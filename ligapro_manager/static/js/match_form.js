@@ -1,16 +1,37 @@
+// Filled from window.headToHeadUrl once the page loads
+window.teamsHistory = null;
+
+const HISTORY_MONTHS = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic'];
+
+// YYYY-MM-DD -> "5 ene 2025"
+function formatHistoryDate(isoDate) {
+    const [year, month, day] = isoDate.split('-').map(Number);
+    return `${day} ${HISTORY_MONTHS[month - 1]} ${year}`;
+}
+
+function loadHeadToHead() {
+    if (!window.headToHeadUrl) return Promise.resolve();
+    return fetch(window.headToHeadUrl)
+        .then(response => response.ok ? response.json() : {})
+        .catch(() => ({}))
+        .then(data => {
+            window.teamsHistory = data;
+        });
+}
+
 function updateHistory(selectId, outputId) {
     const select = document.getElementById(selectId);
     const output = document.getElementById(outputId);
     const teamId = select.value;
 
-    if (!teamId) {
+    if (!teamId || !window.teamsHistory) {
         output.textContent = '';
         checkLastEncounter();
         return;
     }
 
     const history = window.teamsHistory[teamId];
-    if (!history || Object.keys(history).length === 0) {
+    if (!history || !Object.keys(history).some(oppId => oppId in window.teamsMap)) {
         output.textContent = 'Sin partidos previos.';
         checkLastEncounter();
         return;
@@ -18,7 +39,9 @@ function updateHistory(selectId, outputId) {
 
     const opponents = [];
     for (const [oppId, data] of Object.entries(history)) {
-        const name = window.teamsMap[oppId] || 'Desconocido';
+        // Only teams that can be scheduled (hidden/deleted opponents are left out)
+        if (!(oppId in window.teamsMap)) continue;
+        const name = window.teamsMap[oppId];
         const count = data.count || 0;
         const countStr = count > 1 ? ` x${count}` : '';
         opponents.push(`${name}${countStr}`);
@@ -39,10 +62,10 @@ function checkLastEncounter() {
     const homeId = homeSelect.value;
     const awayId = awaySelect.value;
 
-    if (homeId && awayId && homeId !== awayId) {
+    if (homeId && awayId && homeId !== awayId && window.teamsHistory) {
         const history = window.teamsHistory[homeId];
         if (history && history[awayId] && history[awayId].last_date) {
-            let text = history[awayId].last_date;
+            let text = formatHistoryDate(history[awayId].last_date);
             if (history[awayId].last_time && history[awayId].last_court_name) {
                 text += ` - ${history[awayId].last_time} (${history[awayId].last_court_name})`;
             }
@@ -66,9 +89,11 @@ document.addEventListener('DOMContentLoaded', function () {
         awayTeamSelect.addEventListener('change', () => updateHistory('away_team_id', 'away_history'));
     }
 
-    // Initial update
+    // Initial update, once the head-to-head index has arrived
     if (homeTeamSelect || awayTeamSelect) {
-        updateHistory('home_team_id', 'home_history');
-        updateHistory('away_team_id', 'away_history');
+        loadHeadToHead().then(() => {
+            updateHistory('home_team_id', 'home_history');
+            updateHistory('away_team_id', 'away_history');
+        });
     }
 });
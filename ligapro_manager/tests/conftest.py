@@ -0,0 +1,59 @@
+import os
+import sys
+import pytest
+
+# Import the app modules the way bootstrap.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path):
+    from config import Config
+    from ligapro_manager import create_app
+    from extensions import db
+
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        FRAGMENT_CACHE_DIR = None
+        QUERY_COUNT_HEADER = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_league(app):
+    """make_league(teams=4, premium=True, shutdown=False) -> (owner, league, teams), committed."""
+    from extensions import db, bcrypt
+    from models import User, League, Team
+
+    def make(teams=4, premium=True, shutdown=False):
+        owner = User(email=f'owner{User.query.count()}@ligapro.com', name='Owner', role='owner',
+                     password=bcrypt.generate_password_hash('secret').decode('utf-8'),
+                     is_premium=premium, is_ultra=premium)
+        db.session.add(owner)
+        db.session.flush()
+        league = League(name='Liga de prueba', user_id=owner.id, num_vueltas=1,
+                        enable_shutdown_tiebreaker=shutdown)
+        db.session.add(league)
+        db.session.flush()
+        members = [Team(name=f'Equipo {i + 1}', league_id=league.id) for i in range(teams)]
+        db.session.add_all(members)
+        db.session.commit()
+        return owner, league, members
+
+    return make
+
+
+def login(client, owner):
+    return client.post('/login', data={'email': owner.email, 'password': 'secret'})
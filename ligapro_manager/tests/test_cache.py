@@ -0,0 +1,35 @@
+"""The per-league data cache stays bounded and forgets values of past revisions."""
+import pytest
+from extensions import db
+from utils import cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    cache.clear_league_cache()
+    yield
+    cache.configure_league_cache(1024)
+    cache.clear_league_cache()
+
+
+def test_newer_revision_drops_older_entries(app, make_league):
+    _, league, _ = make_league()
+    cache.league_cached(league, 'a', lambda: 1)
+    cache.league_cached(league, 'b', lambda: 2)
+    cache.bump_revision(league.id)
+    db.session.commit()
+
+    assert cache.league_cached(league, 'a', lambda: 3) == 3
+    assert set(cache._store) == {(league.id, 'a')}
+
+
+def test_store_is_lru_bounded(app, make_league):
+    cache.configure_league_cache(2)
+    leagues = [make_league()[1] for _ in range(3)]
+    cache.league_cached(leagues[0], 'x', lambda: 0)
+    cache.league_cached(leagues[1], 'x', lambda: 1)
+    cache.league_cached(leagues[0], 'x', lambda: 'miss')  # hit, now most recent
+    cache.league_cached(leagues[2], 'x', lambda: 2)
+
+    assert set(cache._store) == {(leagues[0].id, 'x'), (leagues[2].id, 'x')}
+    assert cache._league_keys == {leagues[0].id: {(leagues[0].id, 'x')}, leagues[2].id: {(leagues[2].id, 'x')}}
@@ -0,0 +1,91 @@
+"""ClinchSolver flags checked against every outcome of small leagues."""
+import random
+from itertools import product
+import pytest
+from utils.clinch import ClinchSolver
+
+
+def outcomes(win_points, draw_points, shutdown_enabled):
+    """(home_points, away_points) of every way a match can end."""
+    results = [(win_points, 0), (0, win_points), (draw_points, draw_points)]
+    if shutdown_enabled:
+        results += [(2, 1), (1, 2)]
+    return results
+
+
+def final_tables(points, fixtures, results):
+    for played in product(results, repeat=len(fixtures)):
+        final = dict(points)
+        for (home, away), (home_points, away_points) in zip(fixtures, played):
+            if home in final:
+                final[home] += home_points
+            if away in final:
+                final[away] += away_points
+        yield final
+
+
+def random_league(rng, hidden):
+    teams = list(range(rng.randint(3, 5)))
+    rivals = teams + (['oculto'] if hidden else [])
+    pairs = [(h, a) for h in rivals for a in rivals if h != a and h in teams]
+    fixtures = rng.sample(pairs, min(len(pairs), rng.randint(1, 6)))
+    points = {t: rng.randint(0, 12) for t in teams}
+    return points, fixtures
+
+
+@pytest.mark.parametrize('win_points,draw_points,shutdown_enabled', [
+    (3, 1, False), (2, 1, False), (3, 1, True), (2, 1, True), (3, 2, True), (1, 1, True)
+])
+@pytest.mark.parametrize('hidden', [False, True])
+def test_flags_hold_in_every_outcome(win_points, draw_points, shutdown_enabled, hidden):
+    rng = random.Random(f'{win_points}{draw_points}{shutdown_enabled}{hidden}')
+    results = outcomes(win_points, draw_points, shutdown_enabled)
+    for _ in range(80):
+        points, fixtures = random_league(rng, hidden)
+        solver = ClinchSolver(points, fixtures, win_points, draw_points, shutdown_enabled)
+        tables = list(final_tables(points, fixtures, results))
+        for team_id in points:
+            for spots in range(1, len(points)):
+                if solver.is_eliminated(team_id, spots):
+                    assert all(sum(1 for t, p in final.items() if t != team_id and p > final[team_id]) >= spots
+                               for final in tables), (points, fixtures, team_id, spots)
+                if solver.has_clinched(team_id, spots):
+                    assert all(sum(1 for t, p in final.items() if t != team_id and p >= final[team_id]) < spots
+                               for final in tables), (points, fixtures, team_id, spots)
+
+
+def test_plain_draw_keeps_shutdown_team_alive():
+    # A draw saved without a shootout winner leaves 0 and 2 level with team 1
+    solver = ClinchSolver({0: 2, 1: 3, 2: 2}, [(0, 2)], 3, 1, True)
+    assert not solver.is_eliminated(1, 1)
+
+
+def test_games_against_hidden_teams_count():
+    points = {0: 0, 1: 3}
+    solver = ClinchSolver(points, [(0, 'oculto')], 3, 1, False)
+    assert solver.best(0) == 3
+    assert not solver.is_eliminated(0, 1)
+
+
+def test_pending_matches_against_hidden_teams_are_kept(app, make_league):
+    from datetime import datetime
+    from extensions import db
+    from models import Match
+    from utils.helpers import calculate_standings
+    from utils.standings import remaining_fixtures
+    from utils.simulation import season_model, simulate
+
+    _, league, (first, second, hidden) = make_league(teams=3)
+    hidden.is_hidden = True
+    db.session.add_all([
+        Match(league_id=league.id, home_team_id=first.id, away_team_id=hidden.id, match_date=datetime(2026, 1, 1)),
+        Match(league_id=league.id, home_team_id=hidden.id, away_team_id=second.id, match_date=datetime(2026, 1, 2)),
+    ])
+    db.session.commit()
+
+    fixtures = remaining_fixtures(league, [first.id, second.id], [])
+    assert fixtures == [(first.id, hidden.id), (hidden.id, second.id)]
+
+    standings = calculate_standings(league.id)
+    counts = simulate(season_model(league, standings), runs=50, seed=1)
+    assert counts.shape == (2, 2) and counts.sum() == 100
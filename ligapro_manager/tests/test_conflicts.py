@@ -0,0 +1,22 @@
+"""Weekly double-booking report across the edges of the week."""
+from datetime import datetime, timedelta
+from extensions import db
+from models import Match, Court
+from utils.conflicts import week_conflicts
+
+
+def test_pair_across_week_start_is_reported_once(app, make_league):
+    owner, league, teams = make_league()
+    court = Court(name='Cancha 1', league_id=league.id)
+    db.session.add(court)
+    db.session.flush()
+    sunday = Match(league_id=league.id, home_team_id=teams[0].id, away_team_id=teams[1].id, court_id=court.id,
+                   stage='regular', match_round=1, match_date=datetime(2026, 3, 1, 23, 30))
+    monday = Match(league_id=league.id, home_team_id=teams[2].id, away_team_id=teams[3].id, court_id=court.id,
+                   stage='regular', match_round=1, match_date=datetime(2026, 3, 2, 0, 10))
+    db.session.add_all([sunday, monday])
+    db.session.commit()
+
+    week_start = datetime(2026, 3, 2)
+    assert [(a.id, b.id) for a, b in week_conflicts(owner.id, week_start)] == [(sunday.id, monday.id)]
+    assert week_conflicts(owner.id, week_start - timedelta(days=7)) == []
@@ -0,0 +1,61 @@
+"""Cached page fragments skip building their data on a hit."""
+from datetime import datetime
+import pytest
+from extensions import db, bcrypt
+from models import User, Match, SeasonStat
+from utils import cache
+from utils.fragment_cache import fragment_cache
+import routes.main
+import routes.league
+from conftest import login
+
+
+def played_league(make_league):
+    owner, league, (home, away) = make_league(teams=2)
+    league.show_stats = True
+    db.session.add(Match(league_id=league.id, home_team_id=home.id, away_team_id=away.id, stage='regular',
+                         match_date=datetime(2026, 7, 1), home_score=2, away_score=1, is_completed=True))
+    db.session.add(SeasonStat(league_id=league.id, team_id=home.id, player_name='Goleador', stat_type='goals', value=2))
+    db.session.commit()
+    fragment_cache.clear()
+    cache.clear_league_cache()
+    return owner, league, home
+
+
+def fail(*args, **kwargs):
+    pytest.fail('built on a cache hit')
+
+
+def test_captain_dashboard_hit_skips_standings(app, client, make_league, monkeypatch):
+    _, league, home = played_league(make_league)
+    captain = User(email='delegado@ligapro.com', name='Delegado', role='captain', team_id=home.id,
+                   password=bcrypt.generate_password_hash('secret').decode('utf-8'))
+    db.session.add(captain)
+    db.session.commit()
+    login(client, captain)
+
+    first = client.get('/captain')
+    assert first.status_code == 200 and 'Goleador' in first.get_data(as_text=True)
+
+    monkeypatch.setattr(routes.main, 'calculate_standings', fail)
+    monkeypatch.setattr(routes.main, 'cached_clinch_status', fail)
+    monkeypatch.setattr(routes.main, '_captain_leaders', fail)
+    second = client.get('/captain')
+    assert second.status_code == 200
+    page = second.get_data(as_text=True)
+    assert 'Goleador' in page and 'Victorias' in page and home.name in page
+
+
+def test_share_report_hit_skips_standings(app, client, make_league, monkeypatch):
+    owner, league, home = played_league(make_league)
+    login(client, owner)
+    url = f'/leagues/{league.id}/share?include_standings=on'
+
+    first = client.get(url)
+    assert first.status_code == 200 and home.name in first.get_data(as_text=True)
+
+    monkeypatch.setattr(routes.league, 'calculate_standings', fail)
+    monkeypatch.setattr(routes.league, 'cached_clinch_status', fail)
+    second = client.get(url)
+    assert second.status_code == 200
+    assert home.name in second.get_data(as_text=True)
@@ -0,0 +1,32 @@
+"""Group tables count only the matches played inside the group."""
+from datetime import datetime
+import pytest
+from extensions import db
+from models import Match
+from utils.groups import draw_groups
+from utils.standings import group_standings
+
+
+def result(league, home, away, home_score, away_score, day):
+    return Match(league_id=league.id, home_team_id=home.id, away_team_id=away.id, home_score=home_score,
+                 away_score=away_score, is_completed=True, match_date=datetime(2026, 3, day))
+
+
+@pytest.mark.parametrize('tiebreakers', [None, 'points,head_to_head,goal_difference'])
+def test_cross_group_results_stay_out_of_group_tables(app, make_league, tiebreakers):
+    _, league, teams = make_league(teams=4)
+    league.tiebreakers = tiebreakers
+    groups = draw_groups(league, 2, teams)
+    # Snake order: A gets teams 1 and 4, B gets teams 2 and 3
+    first, second, third, fourth = teams
+    db.session.add_all([
+        result(league, first, fourth, 2, 0, 1),
+        result(league, second, third, 1, 1, 2),
+        result(league, first, second, 5, 0, 3),  # across groups
+    ])
+    db.session.commit()
+
+    tables = {group.name: rows for group, rows in group_standings(league, groups)}
+    assert [row['team'].id for row in tables['A']] == [first.id, fourth.id]
+    assert [(row['played'], row['points'], row['goals_for']) for row in tables['A']] == [(1, 3, 2), (1, 0, 0)]
+    assert [(row['played'], row['points'], row['goals_against']) for row in tables['B']] == [(1, 1, 1), (1, 1, 1)]
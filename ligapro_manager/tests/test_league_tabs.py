@@ -0,0 +1,22 @@
+"""Cached league tab fragments."""
+from datetime import datetime, timedelta
+from extensions import db
+from models import Match
+from utils.pagination import encode_cursor
+from conftest import login
+
+
+def test_matches_tab_cache_keeps_cursor_pages_apart(app, client, make_league):
+    owner, league, (home, away) = make_league(teams=2)
+    matches = [Match(league_id=league.id, home_team_id=home.id, away_team_id=away.id, stage='regular',
+                     match_date=datetime(2026, 5, 1) + timedelta(days=day)) for day in range(3)]
+    db.session.add_all(matches)
+    db.session.commit()
+    login(client, owner)
+
+    first_page = client.get(f'/leagues/{league.id}/tabs/matches').get_data(as_text=True)
+    cursor = encode_cursor(max(matches, key=lambda m: m.match_date))
+    next_page = client.get(f'/leagues/{league.id}/tabs/matches?cursor={cursor}').get_data(as_text=True)
+
+    assert '03/05/2026' in first_page
+    assert '03/05/2026' not in next_page and '02/05/2026' in next_page
@@ -0,0 +1,33 @@
+"""Batch edits from the results matrix."""
+from models import Match
+from conftest import login
+
+
+def test_delete_without_match_id_is_rejected(app, client, make_league):
+    owner, league, (home, away) = make_league(teams=2)
+    login(client, owner)
+
+    response = client.post('/matches/matrix/batch', json={'league_id': league.id, 'cells': [
+        {'home_team_id': home.id, 'away_team_id': away.id, 'match_round': 1,
+         'match_date': '2026-04-01', 'match_time': '20:00', 'home_score': 1, 'away_score': 0},
+        {'action': 'delete'},
+    ]})
+
+    assert response.status_code == 400
+    assert response.get_json()['index'] == 1
+    assert Match.query.count() == 0
+
+
+def test_new_cell_saved_in_the_same_batch(app, client, make_league):
+    owner, league, (home, away) = make_league(teams=2)
+    login(client, owner)
+
+    response = client.post('/matches/matrix/batch', json={'league_id': league.id, 'cells': [
+        {'home_team_id': home.id, 'away_team_id': away.id, 'match_round': 1,
+         'match_date': '2026-04-01', 'match_time': '20:00'},
+        {'home_team_id': home.id, 'away_team_id': away.id, 'match_round': 1, 'home_score': 2, 'away_score': 0},
+    ]})
+
+    assert response.status_code == 200
+    match = Match.query.one()
+    assert (match.home_score, match.away_score, match.is_completed) == (2, 0, True)
@@ -0,0 +1,68 @@
+"""league_detail and its tabs run the same number of SQL statements whatever the size of the league."""
+from datetime import datetime, timedelta
+from itertools import combinations
+import pytest
+from extensions import db
+from models import Match, Court, Player, SeasonStat
+from routes.league import LEAGUE_TABS
+from utils import cache
+from utils.fragment_cache import fragment_cache
+from conftest import login
+
+
+def seeded_league(client, make_league, team_count):
+    """A league with courts, players, scorers, a played regular season and a playoff bracket."""
+    owner, league, teams = make_league(teams=team_count)
+    courts = [Court(name=f'Cancha {i + 1}', league_id=league.id) for i in range(2)]
+    db.session.add_all(courts)
+    db.session.flush()
+    for team in teams:
+        for number in range(1, 4):
+            db.session.add(Player(name=f'{team.name} Jugador {number}', team_id=team.id, number=number))
+        db.session.add(SeasonStat(league_id=league.id, team_id=team.id, player_name=f'{team.name} Jugador 1',
+                                  stat_type='goals', value=team_count))
+        db.session.add(SeasonStat(league_id=league.id, team_id=team.id, player_name=f'{team.name} Jugador 3',
+                                  stat_type='conceded', value=2))
+
+    start = datetime(2026, 2, 1, 20)
+    for index, (home, away) in enumerate(combinations(teams, 2)):
+        completed = index % 3 != 0
+        db.session.add(Match(
+            league_id=league.id, home_team_id=home.id, away_team_id=away.id, court_id=courts[index % 2].id,
+            stage='regular', match_round=1, match_date=start + timedelta(days=index),
+            home_score=index % 3 if completed else None, away_score=index % 2 if completed else None,
+            is_completed=completed))
+    db.session.commit()
+
+    login(client, owner)
+    response = client.post(f'/leagues/{league.id}/playoffs/generate', data={'mode': 'corte_directo'})
+    assert response.status_code == 302
+    assert Match.query.filter(Match.league_id == league.id, Match.stage != 'regular').count()
+    return league
+
+
+def page_queries(client, league):
+    """{page: statements} for league_detail and every tab, each on a cold cache."""
+    counts = {}
+    for page in ['detail'] + list(LEAGUE_TABS):
+        fragment_cache.clear()
+        cache.clear_league_cache()
+        url = f'/leagues/{league.id}' if page == 'detail' else f'/leagues/{league.id}/tabs/{page}'
+        response = client.get(url)
+        assert response.status_code == 200, page
+        counts[page] = int(response.headers['X-Query-Count'])
+    return counts
+
+
+@pytest.fixture
+def counted_pages(app, client, make_league):
+    def count(team_count):
+        league = seeded_league(client, make_league, team_count)
+        counts = page_queries(client, league)
+        client.get('/logout')
+        return counts
+    return count
+
+
+def test_league_pages_query_count_is_constant(counted_pages):
+    assert counted_pages(6) == counted_pages(20)
@@ -0,0 +1,49 @@
+"""Elo ratings stay current through the writes; reads never store them."""
+from datetime import datetime
+from extensions import db
+from models import Match, TeamRating
+from utils.ratings import team_ratings, rebuild_ratings, ratings_signature, _replay_leagues
+from conftest import login
+
+
+def replayed(league):
+    teams, ratings, _, _ = _replay_leagues([league])
+    return {team_id: round(float(ratings[i]), 6) for i, (team_id, _) in enumerate(teams)}
+
+
+def stored(league):
+    return {row.team_id: round(row.rating, 6) for row in TeamRating.query.filter_by(league_id=league.id)}
+
+
+def test_back_dated_result_replays_in_the_write(app, client, make_league):
+    owner, league, (first, second, third) = make_league(teams=3)
+    played = Match(league_id=league.id, home_team_id=first.id, away_team_id=second.id, stage='regular',
+                   match_date=datetime(2026, 6, 10), home_score=2, away_score=0, is_completed=True)
+    earlier = Match(league_id=league.id, home_team_id=second.id, away_team_id=third.id, stage='regular',
+                    match_date=datetime(2026, 6, 3))
+    db.session.add_all([played, earlier])
+    db.session.commit()
+    rebuild_ratings([league])
+    db.session.commit()
+    login(client, owner)
+
+    response = client.post(f'/matches/{earlier.id}/score', json={'home_score': 1, 'away_score': 1})
+    assert response.status_code == 200
+
+    db.session.expire_all()
+    assert league.ratings_signature == ratings_signature()
+    assert stored(league) == replayed(league)
+
+
+def test_stale_ratings_are_read_without_writing(app, make_league):
+    _, league, (first, second) = make_league(teams=2)
+    db.session.add(Match(league_id=league.id, home_team_id=first.id, away_team_id=second.id, stage='regular',
+                         match_date=datetime(2026, 6, 10), home_score=3, away_score=1, is_completed=True))
+    db.session.commit()
+
+    ratings = team_ratings(league)
+
+    assert {team_id: round(rating, 6) for team_id, rating in ratings.items()} == replayed(league)
+    assert ratings[first.id] > ratings[second.id]
+    assert not db.session.dirty and not db.session.new
+    assert league.ratings_signature is None and TeamRating.query.count() == 0
@@ -0,0 +1,135 @@
+"""League revision tracking and revision-keyed caching.
+
+Every flush that touches a league's teams, groups, matches, courts, players,
+season stats, playoff bracket or settings bumps `League.revision`, so
+`(league_id, revision)` is a safe cache key: a cached value can never
+outlive the data it was built from.
+
+The per-process value store keeps at most `max_entries` values, least
+recently used out first, and drops a league's entries as soon as a value
+for a newer revision of it is stored.
+"""
+import threading
+from collections import OrderedDict
+from itertools import chain
+from sqlalchemy import event
+from extensions import db
+from models import League, Team, Match, Court, Player, SeasonStat, PlayoffBracket, PlayoffTie, Group
+
+# League columns that are derived data and must not invalidate caches
+_IGNORED_LEAGUE_FIELDS = {'revision', 'standings_signature', 'ratings_signature', 'ratings_last_date', 'ratings_last_id'}
+
+# (league_id, name) -> (revision, value), least recently used first
+_store = OrderedDict()
+_league_keys = {}  # league_id -> keys of its entries in _store
+_lock = threading.Lock()
+_max_entries = 1024
+
+
+def _league_id_of(session, obj):
+    if isinstance(obj, League):
+        return obj.id
+    if isinstance(obj, (Team, Match, Court, SeasonStat, PlayoffBracket, Group)):
+        return obj.league_id
+    if isinstance(obj, PlayoffTie):
+        return obj.bracket.league_id if obj.bracket else None
+    if isinstance(obj, Player) and obj.team_id:
+        team = session.get(Team, obj.team_id)
+        return team.league_id if team else None
+    return None
+
+
+def _league_changed(session, league):
+    if league in session.new or league in session.deleted:
+        return False
+    state = db.inspect(league)
+    return any(attr.history.has_changes() for attr in state.attrs if attr.key not in _IGNORED_LEAGUE_FIELDS)
+
+
+def _bump_on_flush(session, flush_context, instances):
+    league_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, League) and not _league_changed(session, obj):
+            continue
+        league_id = _league_id_of(session, obj)
+        if league_id:
+            league_ids.add(league_id)
+
+    for league_id in league_ids:
+        league = session.get(League, league_id)
+        if league is not None and league not in session.deleted:
+            # Evaluated by the database, so concurrent writers never lose a bump
+            league.revision = League.revision + 1
+
+
+def init_revision_tracking():
+    if not event.contains(db.session, 'before_flush', _bump_on_flush):
+        event.listen(db.session, 'before_flush', _bump_on_flush)
+
+
+def bump_revision(league_id):
+    """Bump explicitly; needed after bulk query updates/deletes, which skip the flush hook."""
+    League.query.filter_by(id=league_id).update(
+        {League.revision: League.revision + 1}, synchronize_session=False)
+    league = db.session.get(League, league_id)
+    if league is not None:
+        db.session.expire(league, ['revision'])
+
+
+def configure_league_cache(max_entries):
+    global _max_entries
+    with _lock:
+        _max_entries = max_entries
+        _evict()
+
+
+def clear_league_cache():
+    with _lock:
+        _store.clear()
+        _league_keys.clear()
+
+
+def _evict():
+    while len(_store) > _max_entries:
+        key, _ = _store.popitem(last=False)
+        _forget(key)
+
+
+def _forget(key):
+    keys = _league_keys.get(key[0])
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del _league_keys[key[0]]
+
+
+def _put(key, revision, value):
+    keys = _league_keys.setdefault(key[0], set())
+    # Entries of an older revision can never be hit again, whatever their name
+    for old in [k for k in keys if _store[k][0] < revision]:
+        del _store[old]
+        keys.discard(old)
+    _store[key] = (revision, value)
+    _store.move_to_end(key)
+    keys.add(key)
+    _evict()
+
+
+def league_cached(league, name, builder):
+    """Return `builder()` for this league, reusing it until the revision changes.
+
+    Values are shared across requests, so they must be plain data (no ORM objects).
+    """
+    revision = league.revision or 0
+    key = (league.id, name)
+    with _lock:
+        entry = _store.get(key)
+        if entry is not None and entry[0] == revision:
+            _store.move_to_end(key)
+            return entry[1]
+    value = builder()
+    with _lock:
+        _put(key, revision, value)
+    return value
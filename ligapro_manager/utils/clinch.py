@@ -0,0 +1,203 @@
+"""Clinch and elimination flags for the standings (title and playoff cut).
+
+Uses the baseball-elimination max-flow formulation over the remaining
+fixtures: games are flow sources, teams are sinks capped by the points
+they may still take. Football scoring is not zero-sum (a win hands out 3
+points, a draw 2, a shootout 3), so every game is relaxed to "at least the
+smallest total, at most `max_side` to one team" when proving elimination,
+and to "at most the largest total" when proving a clinch. A relaxation can
+only miss a flag, never set a wrong one.
+
+A team level on points may still win or lose the tiebreak, so ties never
+count in favour of a flag. Points include manual_points_modifier through
+the standings rows; later modifier changes cannot be foreseen.
+"""
+from collections import deque
+from itertools import combinations
+from math import comb
+from sqlalchemy import select
+from extensions import db
+from utils.standings import scoring_rules, counted_matches_select, remaining_fixtures
+from utils.playoffs import playoff_format, PlayoffError
+
+# Escaper/contender subsets tried per team and check; past this the flag is left unset
+MAX_SCENARIOS = 500
+
+
+def max_flow(node_count, edges, source, sink):
+    """Dinic's algorithm on a small graph; `edges` are (from, to, capacity)."""
+    graph = [[] for _ in range(node_count)]
+    for u, v, capacity in edges:
+        graph[u].append([v, capacity, len(graph[v])])
+        graph[v].append([u, 0, len(graph[u]) - 1])
+
+    def levels():
+        level = [-1] * node_count
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for v, capacity, _ in graph[u]:
+                if capacity > 0 and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level if level[sink] >= 0 else None
+
+    def push(u, limit, level, cursor):
+        if u == sink:
+            return limit
+        while cursor[u] < len(graph[u]):
+            edge = graph[u][cursor[u]]
+            v, capacity, back = edge
+            if capacity > 0 and level[v] == level[u] + 1:
+                pushed = push(v, min(limit, capacity), level, cursor)
+                if pushed:
+                    edge[1] -= pushed
+                    graph[v][back][1] += pushed
+                    return pushed
+            cursor[u] += 1
+        return 0
+
+    flow = 0
+    level = levels()
+    while level:
+        cursor = [0] * node_count
+        pushed = push(source, float('inf'), level, cursor)
+        while pushed:
+            flow += pushed
+            pushed = push(source, float('inf'), level, cursor)
+        level = levels()
+    return flow
+
+
+def _game_flow(games, caps, supply, max_side):
+    """Most points `games` can hand out (`supply` each, `max_side` per team) within `caps`."""
+    teams = list(caps)
+    team_node = {team: 2 + len(games) + i for i, team in enumerate(teams)}
+    edges = []
+    for g, (home, away) in enumerate(games):
+        edges.append((0, 2 + g, supply))
+        edges.append((2 + g, team_node[home], max_side))
+        edges.append((2 + g, team_node[away], max_side))
+    for team in teams:
+        edges.append((team_node[team], 1, caps[team]))
+    return max_flow(2 + len(games) + len(teams), edges, 0, 1)
+
+
+class ClinchSolver:
+    """Current points and remaining games of a league, with the clinch/elimination checks."""
+
+    def __init__(self, points, fixtures, win_points, draw_points, shutdown_enabled):
+        self.points = points  # {team_id: points}
+        self.fixtures = fixtures  # [(home_id, away_id)]
+        # A shutdown league can still save a draw without a shootout winner,
+        # so the plain draw is always a possible outcome
+        totals = [win_points, 2 * draw_points] + ([3] if shutdown_enabled else [])
+        self.min_total = min(totals)
+        self.max_total = max(totals)
+        self.max_side = max([win_points, draw_points] + ([2] if shutdown_enabled else []))
+        # Rivals outside `points` (hidden teams) act as a sink: their games
+        # count for the team but they never take a place in the table
+        self.games = {team_id: 0 for team_id in points}
+        for home, away in fixtures:
+            for team_id in (home, away):
+                if team_id in self.games:
+                    self.games[team_id] += 1
+
+    def best(self, team_id):
+        return self.points[team_id] + self.max_side * self.games[team_id]
+
+    def is_eliminated(self, team_id, spots):
+        """True when `spots` other teams finish above `team_id` whatever happens."""
+        target = self.best(team_id)
+        others = [t for t in self.points if t != team_id]
+        above = [t for t in others if self.points[t] > target]
+        needed = spots - len(above)
+        if needed <= 0:
+            return True
+
+        rest = [t for t in others if self.points[t] <= target]
+        # Only teams able to pass `target` can be among the ones allowed above it
+        contenders = [t for t in rest if self.best(t) > target]
+        if len(contenders) < needed:
+            return False
+        if comb(len(contenders), needed - 1) > MAX_SCENARIOS:
+            return False
+
+        for escaped in combinations(contenders, needed - 1):
+            # `team_id` wins its games and the escaped teams win against everyone else
+            below = set(rest) - set(escaped)
+            games = [(h, a) for h, a in self.fixtures if h in below and a in below]
+            caps = {t: target - self.points[t] for t in below}
+            if _game_flow(games, caps, self.min_total, self.max_side) == self.min_total * len(games):
+                return False
+        return True
+
+    def has_clinched(self, team_id, spots):
+        """True when `team_id` finishes within the first `spots` whatever happens."""
+        floor = self.points[team_id]
+        others = [t for t in self.points if t != team_id]
+        level = [t for t in others if self.points[t] >= floor]
+        needed = spots - len(level)
+        if needed <= 0:
+            return False
+
+        contenders = [t for t in others if self.points[t] < floor <= self.best(t)]
+        if len(contenders) < needed:
+            return True
+        if comb(len(contenders), needed) > MAX_SCENARIOS:
+            return False
+
+        for group in combinations(contenders, needed):
+            # The group wins every game against the rest; can its own games cover what is left?
+            members = set(group)
+            games = [(h, a) for h, a in self.fixtures if h in members and a in members]
+            caps = {}
+            for t in group:
+                inside = sum(1 for h, a in games if t in (h, a))
+                outside = self.games[t] - inside
+                caps[t] = max(0, floor - self.points[t] - self.max_side * outside)
+            if _game_flow(games, caps, self.max_total, self.max_side) == sum(caps.values()):
+                return False
+        return True
+
+
+def clinch_status(league, standings):
+    """{team_id: {'title': ..., 'playoffs': ...}} with 'clinched', 'eliminated' or None.
+
+    `standings` is calculate_standings(league.id). Playoff flags are left out
+    when the league is too small for a bracket or every team qualifies.
+    """
+    if not standings:
+        return {}
+    win_points, draw_points = scoring_rules(league)
+    points = {s['team'].id: s['points'] for s in standings}
+    counted = db.session.execute(select(counted_matches_select(league))).all()
+    fixtures = remaining_fixtures(league, list(points), counted)
+    solver = ClinchSolver(points, fixtures, win_points, draw_points, league.enable_shutdown_tiebreaker)
+
+    try:
+        qualified, _ = playoff_format(len(standings), league.playoff_mode or 'corte_directo')
+    except PlayoffError:
+        qualified = None
+    if qualified and qualified >= len(standings):
+        qualified = None
+
+    def flag(team_id, spots):
+        if solver.has_clinched(team_id, spots):
+            return 'clinched'
+        if solver.is_eliminated(team_id, spots):
+            return 'eliminated'
+        return None
+
+    return {
+        team_id: {'title': flag(team_id, 1), 'playoffs': flag(team_id, qualified) if qualified else None}
+        for team_id in points
+    }
+
+
+def cached_clinch_status(league, standings):
+    """clinch_status, solved once per league revision."""
+    from utils.cache import league_cached
+    from utils.standings import standings_signature
+    return league_cached(league, f'clinch:{standings_signature(league)}', lambda: clinch_status(league, standings))
@@ -0,0 +1,135 @@
+"""Court double-booking checks across all of an owner's leagues.
+
+Courts belong to a league, but owners running several leagues on the same
+venue give its courts the same name in each of them, so a physical court is
+(owner, court name), the same grouping report.global_schedule uses. Two
+matches on it conflict when their starts are closer than
+MATCH_DURATION_MINUTES.
+"""
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy.orm import contains_eager, selectinload
+from extensions import db
+from models import Match, Court, League
+
+
+def match_duration():
+    return timedelta(minutes=current_app.config['MATCH_DURATION_MINUTES'])
+
+
+def owner_court_matches(owner_id, start, end, court_names=None, with_teams=False):
+    """Matches with a court in any league of the owner, starting in [start, end).
+
+    One range query (ix_matches_court_date), sorted by court name and start.
+    """
+    query = Match.query.join(Court, Court.id == Match.court_id).join(League, League.id == Match.league_id).filter(
+        League.user_id == owner_id,
+        Match.match_date >= start,
+        Match.match_date < end
+    )
+    if court_names is not None:
+        query = query.filter(Court.name.in_(court_names))
+    if with_teams:
+        query = query.options(selectinload(Match.home_team), selectinload(Match.away_team))
+    return query.options(contains_eager(Match.court), contains_eager(Match.league)).order_by(
+        Court.name, Match.match_date, Match.id).all()
+
+
+def overlapping_pairs(matches, duration):
+    """(earlier, later) pairs on the same court name whose starts are closer than `duration`.
+
+    `matches` must be sorted by court name and start, as owner_court_matches returns them.
+    """
+    pairs = []
+    court_name = None
+    running = []  # earlier matches on this court that are still being played
+    for match in matches:
+        if match.court.name != court_name:
+            court_name, running = match.court.name, []
+        running = [m for m in running if match.match_date - m.match_date < duration]
+        pairs.extend((m, match) for m in running)
+        running.append(match)
+    return pairs
+
+
+def find_conflicts(matches):
+    """{match_id: [conflicting Match, ...]} for matches just written by one owner.
+
+    Pending changes are flushed first; a single range query covers the span
+    of all their dates, so a bulk write is checked as cheaply as one match.
+    """
+    db.session.flush()
+    placed = [m for m in matches if m.court_id and m.match_date]
+    if not placed:
+        return {}
+
+    duration = match_duration()
+    wanted = {m.id for m in placed}
+    candidates = owner_court_matches(
+        placed[0].league.user_id,
+        min(m.match_date for m in placed) - duration,
+        max(m.match_date for m in placed) + duration,
+        {m.court.name for m in placed}
+    )
+
+    conflicts = {}
+    for earlier, later in overlapping_pairs(candidates, duration):
+        if earlier.id in wanted:
+            conflicts.setdefault(earlier.id, []).append(later)
+        if later.id in wanted:
+            conflicts.setdefault(later.id, []).append(earlier)
+    return conflicts
+
+
+def describe_conflict(match):
+    """'Cancha 1 · 05/01 10:00 · Liga Norte: A vs B' for flash messages."""
+    return (f"{match.court.name} · {match.match_date.strftime('%d/%m %H:%M')} · "
+            f"{match.league.name}: {match.home_team.name} vs {match.away_team.name}")
+
+
+def conflicts_message(conflicts, limit=3):
+    """Flash text for the result of find_conflicts, or None when there is none."""
+    others = []
+    seen = set()
+    for matches in conflicts.values():
+        for match in matches:
+            if match.id not in seen:
+                seen.add(match.id)
+                others.append(match)
+    if not others:
+        return None
+    others.sort(key=lambda m: m.match_date)
+    text = 'Cancha ocupada en ese horario: ' + '; '.join(describe_conflict(m) for m in others[:limit])
+    if len(others) > limit:
+        text += f' (y {len(others) - limit} más)'
+    return text
+
+
+def conflicts_payload(conflicts):
+    """JSON form of find_conflicts for API responses."""
+    return [
+        {
+            'match_id': match_id,
+            'conflicting_match_id': other.id,
+            'league_id': other.league_id,
+            'league_name': other.league.name,
+            'court_name': other.court.name,
+            'match_date_iso': other.match_date.isoformat()
+        }
+        for match_id, others in conflicts.items()
+        for other in others
+    ]
+
+
+def week_conflicts(owner_id, week_start):
+    """Double bookings of the owner in the 7 days from `week_start`, earliest first.
+
+    A pair belongs to the week its later match starts in, so the range reaches
+    back one match duration to catch matches still running when the week opens.
+    """
+    duration = match_duration()
+    end = week_start + timedelta(days=7)
+    matches = owner_court_matches(owner_id, week_start - duration, end, with_teams=True)
+    pairs = [pair for pair in overlapping_pairs(matches, duration) if pair[1].match_date >= week_start]
+    pairs.sort(key=lambda pair: (pair[1].match_date, pair[1].court.name))
+    return pairs
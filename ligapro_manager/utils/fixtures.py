@@ -0,0 +1,163 @@
+"""Round-robin season fixtures (circle method).
+
+The teams rotate one place per matchday around a fixed centre, so every
+pair meets exactly once per vuelta. Even vueltas repeat the first
+one with home and away flipped. Matches are placed on a slot template
+(time slots x courts) and inserted in bulk. In a league split into groups
+each group plays its own round robin and the groups share the matchdays.
+"""
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert, or_
+from extensions import db
+from models import Match, Team
+from utils.cache import bump_revision
+from utils.matrix import matrix_rounds
+from utils.groups import match_group_id
+
+
+class FixtureError(ValueError):
+    """The fixture cannot be generated; the message is shown to the owner."""
+
+
+def circle_rounds(team_ids):
+    """Matchdays of a single round robin: [[(home_id, away_id), ...], ...].
+
+    Teams sit on a polygon that turns one place per matchday; with an even
+    count the last team stays in the centre and faces whoever would rest.
+    Sides alternate so every team hosts half of its matches (one more or
+    less when it plays an odd number).
+    """
+    teams = list(team_ids)
+    n = len(teams)
+    polygon = n if n % 2 else n - 1
+
+    rounds = []
+    for day in range(polygon):
+        pairs = []
+        for k in range(1, (polygon + 1) // 2):
+            a, b = teams[(day + k) % polygon], teams[(day - k) % polygon]
+            pairs.append((a, b) if k % 2 else (b, a))
+        if not n % 2:
+            rest, centre = teams[day], teams[-1]
+            pairs.append((rest, centre) if day % 2 else (centre, rest))
+        rounds.append(pairs)
+    return rounds
+
+
+def group_rounds(team_ids, group_of):
+    """Matchdays of one round robin per group, matchday k of every group played together.
+
+    Teams without a group form a group of their own.
+    """
+    sections = {}
+    for team_id in team_ids:
+        sections.setdefault(group_of.get(team_id), []).append(team_id)
+    per_group = [circle_rounds(section) for section in sections.values()]
+    days = max((len(rounds) for rounds in per_group), default=0)
+    return [[pair for rounds in per_group if day < len(rounds) for pair in rounds[day]] for day in range(days)]
+
+
+def parse_slot_times(text):
+    """'09:00, 10:30' -> [time(9, 0), time(10, 30)] in the given order."""
+    times = []
+    for chunk in (text or '').replace(';', ',').split(','):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        try:
+            times.append(datetime.strptime(chunk, '%H:%M').time())
+        except ValueError:
+            raise FixtureError(f'Horario inválido: "{chunk}". Usa el formato HH:MM.')
+    if not times:
+        raise FixtureError('Indica al menos un horario.')
+    return times
+
+
+def fixture_rows(league, team_ids, start_date, slot_times, court_ids, days_between=7, vueltas=1, group_of=None):
+    """Match rows for a whole season, ready for a bulk insert.
+
+    Matchday k is played on start_date + (k - 1) * days_between. Its matches
+    take the slots in order (every court at the first time, then the next
+    time...); when they do not fit in one day they continue the next day
+    with the same template, as long as that stays before the next matchday.
+    With `group_of` (team_id -> group_id) teams only meet their own group.
+    """
+    group_of = group_of or {}
+    rounds = group_rounds(team_ids, group_of) if group_of else circle_rounds(team_ids)
+    slots = [(slot_time, court_id) for slot_time in slot_times for court_id in (court_ids or [None])]
+    per_matchday = max((len(pairs) for pairs in rounds), default=0)
+    days_needed = -(-per_matchday // len(slots))
+    if days_needed > days_between:
+        raise FixtureError(f'Cada jornada tiene {per_matchday} partidos y solo hay {len(slots)} espacios por día. '
+                           'Agrega horarios o canchas, o separa más las jornadas.')
+
+    if league.auto_fill_prices:
+        prices = {
+            'referee_cost_home': str(league.price_per_match),
+            'referee_cost_away': str(league.price_per_match),
+            'referee_cost': str(league.price_referee)
+        }
+    else:
+        prices = {'referee_cost_home': '0', 'referee_cost_away': '0', 'referee_cost': '0'}
+
+    rows = []
+    matchday = 0
+    for vuelta in range(1, vueltas + 1):
+        for pairs in rounds:
+            matchday += 1
+            day = start_date + timedelta(days=(matchday - 1) * days_between)
+            for index, (home_id, away_id) in enumerate(pairs):
+                if vuelta % 2 == 0:
+                    home_id, away_id = away_id, home_id
+                extra_days, slot = divmod(index, len(slots))
+                slot_time, court_id = slots[slot]
+                rows.append({
+                    'league_id': league.id,
+                    'home_team_id': home_id,
+                    'away_team_id': away_id,
+                    'court_id': court_id,
+                    'stage': 'regular',
+                    'match_round': vuelta,
+                    'match_name': f'Jornada {matchday}',
+                    'match_date': datetime.combine(day + timedelta(days=extra_days), slot_time),
+                    'is_completed': False,
+                    'is_practice': False,
+                    'group_id': match_group_id(group_of, home_id, away_id),
+                    **prices
+                })
+    return rows
+
+
+def generate_fixture(league, start_date, slot_times, court_ids=None, days_between=7, shuffle=False):
+    """Insert the regular season of `league` in one bulk INSERT; returns the number of matches.
+
+    Hidden and deleted teams are left out. The caller commits.
+    """
+    has_regular = db.session.query(Match.query.filter(
+        Match.league_id == league.id,
+        or_(Match.stage == 'regular', Match.stage == None, Match.stage == '')
+    ).exists()).scalar()
+    if has_regular:
+        raise FixtureError('La liga ya tiene partidos de temporada regular. Elimínalos antes de generar el calendario.')
+
+    teams = Team.query.filter_by(league_id=league.id).order_by(Team.created_at).all()
+    team_ids = [t.id for t in teams if not t.is_deleted and not t.is_hidden]
+    if len(team_ids) < 2:
+        raise FixtureError('Se necesitan al menos 2 equipos para generar el calendario.')
+    if shuffle:
+        random.shuffle(team_ids)
+
+    if court_ids:
+        # Free leagues schedule on their first court only
+        courts = league.courts if league.owner.is_active_premium else league.courts[:1]
+        valid_courts = {c.id for c in courts}
+        court_ids = [c for c in court_ids if c in valid_courts]
+
+    rows = fixture_rows(league, team_ids, start_date, slot_times, court_ids,
+                        days_between=days_between, vueltas=matrix_rounds(league),
+                        group_of={t.id: t.group_id for t in teams if t.group_id})
+    db.session.execute(insert(Match), rows)
+    # Bulk inserts skip the flush hook
+    bump_revision(league.id)
+    return len(rows)
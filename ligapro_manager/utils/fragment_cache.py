@@ -0,0 +1,165 @@
+"""Rendered HTML fragment cache for league pages.
+
+Entries are keyed by (league id, fragment name, variant...) and tagged with
+the league fingerprint (`League.revision` plus the owner's plan, which
+changes what premium-only markup is drawn). A lookup with a different
+fingerprint is a miss and the entry is overwritten, so each key holds at
+most one rendering and stale HTML is never served.
+
+The cache lives in-process with LRU eviction by size. When
+FRAGMENT_CACHE_DIR is set, entries are also written there so every
+gunicorn worker can reuse what another one rendered.
+
+CSRF tokens are per session: they are swapped for a marker before storing
+and the current request's token is put back when serving.
+"""
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from markupsafe import Markup
+
+CSRF_MARKER = '__FRAGMENT_CSRF_TOKEN__'
+
+
+class FragmentCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()  # key -> (fingerprint, html, size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def configure(self, max_bytes, directory=None):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.directory = directory
+            self._evict()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.html')
+
+    def _store(self, key, fingerprint, html):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        size = len(html.encode('utf-8'))
+        self._entries[key] = (fingerprint, html, size)
+        self._bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+    def _read_disk(self, key, fingerprint):
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                stored_fingerprint = f.readline().rstrip('\n')
+                if stored_fingerprint != fingerprint:
+                    return None
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, fingerprint, html):
+        # Write then rename, so other workers never read a half-written file
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(f'{fingerprint}\n')
+                f.write(html)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key, fingerprint):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        html = self._read_disk(key, fingerprint) if self.directory else None
+        with self._lock:
+            if html is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, fingerprint, html)
+        return html
+
+    def set(self, key, fingerprint, html):
+        with self._lock:
+            self._store(key, fingerprint, html)
+        if self.directory:
+            self._write_disk(key, fingerprint, html)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'directory': self.directory
+            }
+
+
+fragment_cache = FragmentCache()
+
+
+def league_fingerprint(league):
+    return f'{league.revision or 0}:{int(bool(league.owner and league.owner.is_active_premium))}'
+
+
+def _current_csrf_token():
+    from flask_wtf.csrf import generate_csrf
+    return generate_csrf()
+
+
+def cached_fragment(league, name, render, *vary):
+    """Return the HTML of `render()` for this league, reusing it until the league changes.
+
+    `vary` holds whatever else the markup depends on (viewer role, team, page...).
+    """
+    key = (league.id, name) + vary
+    fingerprint = league_fingerprint(league)
+    html = fragment_cache.get(key, fingerprint)
+    if html is None:
+        html = str(render())
+        if 'name="csrf_token"' in html:
+            html = html.replace(_current_csrf_token(), CSRF_MARKER)
+        fragment_cache.set(key, fingerprint, html)
+    if CSRF_MARKER in html:
+        html = html.replace(CSRF_MARKER, _current_csrf_token())
+    return Markup(html)
+
+
+def _cached_block(league, name, *vary, caller):
+    """Template form: {% call cached_fragment(league, 'name', ...) %}...{% endcall %}"""
+    return cached_fragment(league, name, caller, *vary)
+
+
+def init_fragment_cache(app):
+    fragment_cache.configure(app.config['FRAGMENT_CACHE_MAX_BYTES'], app.config.get('FRAGMENT_CACHE_DIR'))
+    app.jinja_env.globals['cached_fragment'] = _cached_block
@@ -0,0 +1,135 @@
+"""Groups (divisions) inside a league.
+
+Teams belong to at most one group, and a regular match between two teams of
+the same group is tagged with it (Match.group_id). Matches created through
+the ORM are tagged on flush; bulk writes and group reassignments retag the
+whole league with one UPDATE (see tag_group_matches).
+"""
+import random
+from sqlalchemy import event, select, case, and_, or_
+from extensions import db
+from models import Group, Team, Match
+from utils.cache import bump_revision
+
+GROUP_NAMES = 'ABCDEFGH'
+
+MIN_GROUPS = 2
+MAX_GROUPS = len(GROUP_NAMES)
+
+
+class GroupError(ValueError):
+    """The groups cannot be drawn or changed; the message is shown to the owner."""
+
+
+def league_groups(league_id):
+    return Group.query.filter_by(league_id=league_id).order_by(Group.position).all()
+
+
+def grouped_teams(groups, teams):
+    """[(group, teams)] in group order, keeping the order of `teams` inside each group.
+
+    Teams without a group come last under None (only when there are any).
+    """
+    by_group = {group.id: [] for group in groups}
+    ungrouped = []
+    for team in teams:
+        by_group.get(team.group_id, ungrouped).append(team)
+    sections = [(group, by_group[group.id]) for group in groups]
+    if ungrouped:
+        sections.append((None, ungrouped))
+    return sections
+
+
+def match_group_id(group_of, home_team_id, away_team_id):
+    """Group of a regular match between the two teams, or None when they are in different groups."""
+    group_id = group_of.get(home_team_id)
+    return group_id if group_id and group_id == group_of.get(away_team_id) else None
+
+
+def draw_groups(league, count, teams, shuffle=False):
+    """Replace the league's groups with `count` new ones and share `teams` among them.
+
+    Teams are dealt in snake order (A, B, C, C, B, A...), so with `teams`
+    sorted by the table every group gets a similar mix of strong and weak
+    sides. Returns the new groups. The caller commits.
+    """
+    if not MIN_GROUPS <= count <= MAX_GROUPS:
+        raise GroupError(f'El número de grupos debe estar entre {MIN_GROUPS} y {MAX_GROUPS}.')
+    if len(teams) < 2 * count:
+        raise GroupError('Se necesitan al menos 2 equipos por grupo.')
+
+    clear_groups(league)
+    groups = [Group(league_id=league.id, name=GROUP_NAMES[i], position=i) for i in range(count)]
+    db.session.add_all(groups)
+    db.session.flush()
+
+    teams = list(teams)
+    if shuffle:
+        random.shuffle(teams)
+    for index, team in enumerate(teams):
+        row, column = divmod(index, count)
+        team.group_id = groups[column if row % 2 == 0 else count - 1 - column].id
+
+    db.session.flush()
+    tag_group_matches(league.id)
+    return groups
+
+
+def assign_groups(league, assignments):
+    """Move teams between the league's groups; `assignments` maps team_id -> group_id or None.
+
+    The caller commits.
+    """
+    valid_groups = {group.id for group in league_groups(league.id)}
+    teams = {team.id: team for team in Team.query.filter_by(league_id=league.id, is_deleted=False)}
+    for team_id, group_id in assignments.items():
+        team = teams.get(team_id)
+        if team is None:
+            continue
+        if group_id and group_id not in valid_groups:
+            raise GroupError('Grupo inválido.')
+        team.group_id = group_id or None
+
+    db.session.flush()
+    tag_group_matches(league.id)
+
+
+def clear_groups(league):
+    """Delete the league's groups; teams and matches keep playing without one. The caller commits."""
+    Team.query.filter_by(league_id=league.id).update({Team.group_id: None}, synchronize_session=False)
+    Match.query.filter_by(league_id=league.id).update({Match.group_id: None}, synchronize_session=False)
+    Group.query.filter_by(league_id=league.id).delete(synchronize_session=False)
+    db.session.expire_all()
+    # Bulk writes skip the flush hook
+    bump_revision(league.id)
+
+
+def tag_group_matches(league_id):
+    """Retag every match of the league from its teams' groups in one UPDATE."""
+    home_group = select(Team.group_id).where(Team.id == Match.home_team_id).scalar_subquery()
+    away_group = select(Team.group_id).where(Team.id == Match.away_team_id).scalar_subquery()
+    regular = or_(Match.stage == 'regular', Match.stage == None, Match.stage == '')
+    Match.query.filter(Match.league_id == league_id).update(
+        {Match.group_id: case((and_(regular, home_group == away_group), home_group), else_=None)},
+        synchronize_session=False)
+    bump_revision(league_id)
+
+
+def _tag_on_flush(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Match):
+            continue
+        if obj in session.dirty:
+            state = db.inspect(obj)
+            if not any(state.attrs[key].history.has_changes() for key in ('home_team_id', 'away_team_id', 'stage')):
+                continue
+        home = session.get(Team, obj.home_team_id) if obj.home_team_id else None
+        away = session.get(Team, obj.away_team_id) if obj.away_team_id else None
+        regular = obj.stage in ('regular', None, '')
+        obj.group_id = home.group_id if (regular and home and away and home.group_id
+                                         and home.group_id == away.group_id) else None
+
+
+def init_group_tagging():
+    if not event.contains(db.session, 'before_flush', _tag_on_flush):
+        event.listen(db.session, 'before_flush', _tag_on_flush)
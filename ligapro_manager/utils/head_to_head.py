@@ -0,0 +1,54 @@
+"""Head-to-head index: how many times each pair of teams has met, and when last.
+
+Shared by the match form (served as JSON) and the league matrix modal. It is
+built with one windowed query and cached per league revision.
+"""
+from sqlalchemy import select, case, func
+from extensions import db
+from models import Match, Court
+from utils.cache import league_cached
+
+
+def build_head_to_head(league_id, include_practice=False):
+    """{team_id: {opponent_id: {'count', 'last_date', 'last_time', 'last_court_name'}}} of completed matches."""
+    # Unordered pair, normalized with CASE (portable LEAST/GREATEST)
+    low = case((Match.home_team_id < Match.away_team_id, Match.home_team_id), else_=Match.away_team_id)
+    high = case((Match.home_team_id < Match.away_team_id, Match.away_team_id), else_=Match.home_team_id)
+
+    ranked = select(
+        low.label('team_a'),
+        high.label('team_b'),
+        func.count().over(partition_by=(low, high)).label('meetings'),
+        func.row_number().over(partition_by=(low, high),
+                               order_by=(Match.match_date.desc(), Match.id.desc())).label('recency'),
+        Match.match_date,
+        Match.court_id
+    ).where(Match.league_id == league_id, Match.is_completed == True)
+    if not include_practice:
+        ranked = ranked.where(Match.is_practice == False)
+    ranked = ranked.subquery()
+
+    # Only the latest meeting of each pair, with its court
+    rows = db.session.execute(
+        select(ranked.c.team_a, ranked.c.team_b, ranked.c.meetings, ranked.c.match_date, Court.name)
+        .outerjoin(Court, Court.id == ranked.c.court_id)
+        .where(ranked.c.recency == 1)
+    ).all()
+
+    history = {}
+    for team_a, team_b, meetings, match_date, court_name in rows:
+        entry = {
+            'count': meetings,
+            'last_date': match_date.strftime('%Y-%m-%d'),
+            'last_time': match_date.strftime('%I:%M %p'),
+            'last_court_name': court_name or '-- Sin Cancha --'
+        }
+        history.setdefault(team_a, {})[team_b] = entry
+        history.setdefault(team_b, {})[team_a] = entry
+    return history
+
+
+def head_to_head(league, include_practice=False):
+    """Cached build_head_to_head; reused until the league's revision changes."""
+    return league_cached(league, f'head_to_head:{int(include_practice)}',
+                         lambda: build_head_to_head(league.id, include_practice))
@@ -1,117 +1,25 @@
 from models import League, Team, Match
-import unicodedata
+from utils.text import normalize_name
 
-def normalize_name(name):
-    """Normalize name by removing accents and converting to lowercase."""
-    if not name:
-        return ""
-    return ''.join(c for c in unicodedata.normalize('NFD', name)
-                  if unicodedata.category(c) != 'Mn').lower().strip()
+def calculate_standings(league_id, include_playoffs=False, include_form=False):
+    """Calculate standings for a league
+
+    With include_form, rows also carry the last results ('form') and the
+    current 'unbeaten'/'winless' streaks of the regular season.
+    """
+    from utils.standings import compute_standings, read_standings, attach_form
 
-def calculate_standings(league_id, include_playoffs=False):
-    """Calculate standings for a league"""
     league = League.query.get_or_404(league_id)
-    # Only show active teams in standings
-    # Only show active (visible) teams in standings
-    teams = Team.query.filter_by(league_id=league_id, is_deleted=False, is_hidden=False).all()
-    
-    # Get completed matches (only regular season by default, never practice matches)
     if include_playoffs:
-        matches_query = Match.query.filter(
-            Match.league_id == league_id,
-            Match.is_completed == True,
-            Match.is_practice == False
-        )
-    else:
-        matches_query = Match.query.filter(
-            Match.league_id == league_id,
-            Match.is_completed == True,
-            Match.is_practice == False,
-            Match.stage.in_(['regular', None, ''])
-        )
-    
-    all_matches = matches_query.all()
-    
-    # If not premium, only count the first match between any pair (Round 1)
-    if not league.owner.is_active_premium:
-        filtered_matches = []
-        pairs_seen = set()
-        # Sort matches by date to ensure we pick the first one chronologically
-        sorted_matches = sorted(all_matches, key=lambda x: x.match_date)
-        for m in sorted_matches:
-            pair = tuple(sorted([m.home_team_id, m.away_team_id]))
-            if pair not in pairs_seen:
-                filtered_matches.append(m)
-                pairs_seen.add(pair)
-        matches = filtered_matches
+        # Playoff results are not persisted; compute them from the matches
+        # Only show active (visible) teams in standings
+        teams = Team.query.filter_by(league_id=league_id, is_deleted=False, is_hidden=False).all()
+        standings = compute_standings(league, teams, include_playoffs=True)
     else:
-        matches = all_matches
-    
-    standings = []
-    
-    # Points configuration (Enforce defaults for non-premium)
-    is_premium = league.owner.is_active_premium
-    win_points = league.win_points if is_premium else 3
-    draw_points = league.draw_points if is_premium else 1
-    for team in teams:
-        stats = {
-            'team': team,
-            'played': 0,
-            'won': 0,
-            'drawn': 0,
-            'lost': 0,
-            'goals_for': 0,
-            'goals_against': 0,
-            'goal_difference': 0,
-            'points': (team.manual_points_modifier or 0)
-        }
-        
-        for match in matches:
-            if match.home_team_id == team.id:
-                stats['played'] += 1
-                stats['goals_for'] += match.home_score or 0
-                stats['goals_against'] += match.away_score or 0
-                
-                if match.home_score > match.away_score:
-                    stats['won'] += 1
-                    stats['points'] += win_points
-                elif match.home_score == match.away_score:
-                    stats['drawn'] += 1
-                    if league.enable_shutdown_tiebreaker and getattr(match, 'shutdown_winner_id', None):
-                        if match.shutdown_winner_id == team.id:
-                            stats['points'] += 2
-                        else:
-                            stats['points'] += 1
-                    else:
-                        stats['points'] += draw_points
-                else:
-                    stats['lost'] += 1
-                    
-            elif match.away_team_id == team.id:
-                stats['played'] += 1
-                stats['goals_for'] += match.away_score or 0
-                stats['goals_against'] += match.home_score or 0
-                
-                if match.away_score > match.home_score:
-                    stats['won'] += 1
-                    stats['points'] += win_points
-                elif match.away_score == match.home_score:
-                    stats['drawn'] += 1
-                    if league.enable_shutdown_tiebreaker and getattr(match, 'shutdown_winner_id', None):
-                        if match.shutdown_winner_id == team.id:
-                            stats['points'] += 2
-                        else:
-                            stats['points'] += 1
-                    else:
-                        stats['points'] += draw_points
-                else:
-                    stats['lost'] += 1
-        
-        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
-        standings.append(stats)
-    
-    # Sort by points, goal difference, goals for
-    standings.sort(key=lambda x: (x['points'], x['goal_difference'], x['goals_for']), reverse=True)
+        standings = read_standings(league)
+
+    if include_form:
+        attach_form(league, standings)
     return standings
 
 def is_league_accessible(user_id, league_id):
@@ -0,0 +1,89 @@
+"""Match matrix data shared by the league page and the matrix batch endpoint."""
+from sqlalchemy import or_, and_
+from models import Match
+from utils.groups import grouped_teams
+
+
+def matrix_rounds(league):
+    """Rounds (vueltas) drawn in the matrix; only premium owners get more than one."""
+    return league.num_vueltas if (league.num_vueltas and league.owner.is_active_premium) else 1
+
+
+def matrix_entry(match, round_num):
+    """One placed match of the sparse matrix (see matrix_payload)."""
+    return {
+        'round': round_num,
+        'id': match.id,
+        'home_id': match.home_team_id,
+        'away_id': match.away_team_id,
+        'home_score': match.home_score,
+        'away_score': match.away_score,
+        'match_date_iso': match.match_date.isoformat(),
+        'match_date_display': match.match_date.strftime('%d-%b'),
+        'match_time_display': match.match_date.strftime('%I:%M %p'),
+        'court_id': match.court_id,
+        'is_completed': match.is_completed,
+        'shutdown_winner_id': match.shutdown_winner_id,
+        'is_practice': match.is_practice
+    }
+
+
+def matrix_round_of(match):
+    """Round of a regular match in the matrix: its position among the pair's matches by date."""
+    if match.stage not in ('regular', None, ''):
+        return None
+    pair_ids = Match.query.with_entities(Match.id).filter(
+        Match.league_id == match.league_id,
+        or_(Match.stage == 'regular', Match.stage == None, Match.stage == ''),
+        or_(
+            and_(Match.home_team_id == match.home_team_id, Match.away_team_id == match.away_team_id),
+            and_(Match.home_team_id == match.away_team_id, Match.away_team_id == match.home_team_id)
+        )
+    ).order_by(Match.match_date).all()
+    return [row.id for row in pair_ids].index(match.id) + 1
+
+
+def matrix_payload(teams, matches, num_vueltas, groups=None):
+    """Sparse matrix data: team order plus one entry per placed match.
+
+    The n-th match of a pair (by date) belongs to round n; matches beyond
+    num_vueltas are left out. The mirror cell (away, home) is not stored,
+    it is the same match seen from the other side.
+
+    With `groups` the teams are laid out group by group and each group gets
+    its own square ('groups' holds where each one starts in 'teams'), so
+    only pairs inside a group have cells.
+    """
+    sections = grouped_teams(groups, teams) if groups else [(None, list(teams))]
+    section_of = {}
+    layout = []
+    ordered = []
+    for index, (group, section_teams) in enumerate(sections):
+        layout.append({'name': group.name if group else None, 'start': len(ordered), 'size': len(section_teams)})
+        for team in section_teams:
+            section_of[team.id] = index
+            ordered.append(team.id)
+
+    matches_by_pair = {}
+    for m in matches:
+        pair = tuple(sorted([m.home_team_id, m.away_team_id]))
+        matches_by_pair.setdefault(pair, []).append(m)
+
+    entries = []
+    for pair, pair_matches in matches_by_pair.items():
+        # Skip pairs with a hidden/deleted team or across groups; their cells are not drawn
+        if pair[0] not in section_of or section_of[pair[0]] != section_of.get(pair[1]):
+            continue
+        for round_num, m in enumerate(pair_matches[:num_vueltas], start=1):
+            entries.append(matrix_entry(m, round_num))
+
+    return {'rounds': num_vueltas, 'teams': ordered, 'groups': layout, 'matches': entries}
+
+
+def matrix_cells(matrix):
+    """(round, row_team_id, col_team_id) -> (entry, swapped) for the template."""
+    cells = {}
+    for entry in matrix['matches']:
+        cells[(entry['round'], entry['home_id'], entry['away_id'])] = (entry, False)
+        cells[(entry['round'], entry['away_id'], entry['home_id'])] = (entry, True)
+    return cells
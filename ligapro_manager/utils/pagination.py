@@ -0,0 +1,65 @@
+"""Keyset ("load more") paging for match lists.
+
+Matches are listed newest first, ordered by (match_date, id). A page is
+fetched with `WHERE (match_date, id) < cursor ... LIMIT n`, so a deep page
+costs the same index range scan as the first one, unlike OFFSET.
+"""
+import base64
+from datetime import datetime
+from sqlalchemy import or_, and_
+from models import Match
+
+MATCHES_PER_PAGE = 30
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(match):
+    raw = f"{match.match_date.isoformat()}|{match.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """(match_date, id) from a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        date_str, match_id = raw.split('|', 1)
+        return datetime.fromisoformat(date_str), match_id
+    except (ValueError, UnicodeError):
+        return None
+
+
+def match_keyset_page(query, cursor=None, per_page=MATCHES_PER_PAGE):
+    """Newest-first page of a Match query, starting after `cursor`."""
+    key = decode_cursor(cursor)
+    if key:
+        match_date, match_id = key
+        query = query.filter(or_(
+            Match.match_date < match_date,
+            and_(Match.match_date == match_date, Match.id < match_id)
+        ))
+
+    # One extra row tells whether another page exists
+    items = query.order_by(Match.match_date.desc(), Match.id.desc()).limit(per_page + 1).all()
+    if len(items) > per_page:
+        items = items[:per_page]
+        return KeysetPage(items, encode_cursor(items[-1]))
+    return KeysetPage(items, None)
+
+
+def team_matches_query(team):
+    """Matches of a team within its own league."""
+    return Match.query.filter(
+        Match.league_id == team.league_id,
+        or_(Match.home_team_id == team.id, Match.away_team_id == team.id)
+    )
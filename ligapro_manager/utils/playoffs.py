@@ -0,0 +1,338 @@
+"""Persisted playoff brackets (PlayoffBracket / PlayoffTie).
+
+The whole bracket is drawn when the liguilla is generated: seeds are the
+regular season positions at that moment, and every tie knows the tie that
+receives its winner, so advancing a round only walks the ties of the
+current stage. Each round pairs its entries best against worst (1-8, 2-7,
+3-6, 4-5) and the next one pairs their winners the same way, so while the
+favourites win every round stays best against worst.
+"""
+import json
+from datetime import datetime, timezone
+from extensions import db
+from models import Match, Court, Team, PlayoffBracket, PlayoffTie
+
+PLAYOFF_STAGES = ['repechaje', 'round_of_16', 'quarterfinal', 'semifinal', 'tercer_lugar', 'final']
+
+# Stages a bracket goes through, in order (tercer lugar is played alongside the final)
+ROUNDS = ['repechaje', 'round_of_16', 'quarterfinal', 'semifinal', 'final']
+
+# Stage of a round by the number of teams that enter it
+STAGE_BY_SIZE = {16: 'round_of_16', 8: 'quarterfinal', 4: 'semifinal', 2: 'final'}
+
+# Match names: "Cuarto 2: A vs B"
+STAGE_LABELS = {
+    'repechaje': 'Repechaje',
+    'round_of_16': 'Octavo',
+    'quarterfinal': 'Cuarto',
+    'semifinal': 'Semifinal',
+    'tercer_lugar': 'Tercer Lugar',
+    'final': 'Final'
+}
+
+STAGE_TITLES = {
+    'repechaje': 'Repechaje',
+    'round_of_16': 'Octavos de Final',
+    'quarterfinal': 'Cuartos de Final',
+    'semifinal': 'Semifinales',
+    'tercer_lugar': 'Tercer Lugar',
+    'final': 'Final'
+}
+
+
+# Liguilla seeded from the group tables
+GROUP_MODE = 'grupos'
+
+
+class PlayoffError(ValueError):
+    """The bracket cannot be generated or advanced; the message is shown to the owner."""
+
+
+def _add_tie(bracket, stage, position):
+    tie = PlayoffTie(stage=stage, position=position)
+    bracket.ties.append(tie)
+    return tie
+
+
+def _new_tie(bracket, stage, position, entries, team_of_seed):
+    """Tie fed by two entries: a seed (int) or an earlier tie whose winner moves on."""
+    tie = _add_tie(bracket, stage, position)
+    for entry in entries:
+        if isinstance(entry, PlayoffTie):
+            entry.next_tie = tie
+        else:
+            tie.place(team_of_seed[entry], entry)
+    return tie
+
+
+def _build_rounds(bracket, entries, team_of_seed):
+    """Draw every round from `entries` (best first) up to the final, plus the tercer lugar."""
+    while len(entries) > 1:
+        stage = STAGE_BY_SIZE.get(len(entries))
+        if stage is None:
+            raise PlayoffError('El número de equipos clasificados no forma una llave válida.')
+        n = len(entries)
+        entries = [_new_tie(bracket, stage, k + 1, (entries[k], entries[n - 1 - k]), team_of_seed)
+                   for k in range(n // 2)]
+
+    semifinals = [t for t in bracket.ties if t.stage == 'semifinal']
+    if len(semifinals) == 2 and not any(t.stage == 'tercer_lugar' for t in bracket.ties):
+        third = _add_tie(bracket, 'tercer_lugar', 1)
+        for tie in semifinals:
+            tie.loser_tie = third
+
+
+def _default_court_id(league_id):
+    court = Court.query.filter_by(league_id=league_id).order_by(Court.created_at.asc()).first()
+    return court.id if court else None
+
+
+def _tie_name(tie, home, away):
+    label = STAGE_LABELS[tie.stage]
+    if tie.stage in ('final', 'tercer_lugar'):
+        return f"{label}: {home.name} vs {away.name}"
+    return f"{label} {tie.position}: {home.name} vs {away.name}"
+
+
+def _create_legs(tie, league, teams, court_id):
+    """Matches of a tie whose two teams are known; the better seed hosts the first leg."""
+    if tie.away_seed is not None and (tie.home_seed is None or tie.away_seed < tie.home_seed):
+        tie.home_team_id, tie.away_team_id = tie.away_team_id, tie.home_team_id
+        tie.home_seed, tie.away_seed = tie.away_seed, tie.home_seed
+
+    home, away = teams[tie.home_team_id], teams[tie.away_team_id]
+    # Final is always a single match
+    double = league.playoff_type == 'double' and tie.stage != 'final'
+    legs = [(home, away, _tie_name(tie, home, away) + (" (Ida)" if double else ""))]
+    if double:
+        legs.append((away, home, _tie_name(tie, away, home) + " (Vuelta)"))
+
+    for leg_home, leg_away, name in legs:
+        match = Match(
+            league_id=league.id,
+            home_team_id=leg_home.id,
+            away_team_id=leg_away.id,
+            court_id=court_id,
+            match_date=datetime.now(timezone.utc),
+            stage=tie.stage,
+            match_name=name,
+            playoff_tie=tie
+        )
+        if league.auto_fill_prices:
+            match.referee_cost_home = str(league.price_per_match)
+            match.referee_cost_away = str(league.price_per_match)
+            match.referee_cost = str(league.price_referee)
+        db.session.add(match)
+    return len(legs)
+
+
+def playoff_format(total_teams, mode):
+    """(qualified, byes) of a liguilla for a league of `total_teams` teams.
+
+    The top `qualified` teams enter; with byes, the top `byes` wait for the
+    repechaje winners (the next four play it). Group liguillas are sized by
+    group_seeds instead.
+    """
+    if mode == GROUP_MODE:
+        raise PlayoffError('La liguilla por grupos se siembra con las tablas de cada grupo.')
+    if total_teams < 5:
+        raise PlayoffError('Se necesitan al menos 5 equipos para la liguilla.')
+    if total_teams <= 7:
+        if mode == 'corte_directo':
+            return 4, 0
+        if total_teams < 6:
+            raise PlayoffError('Se necesitan al menos 6 equipos para modo con repechaje.')
+        # Top 2 get bye; repechaje 3 vs 6, 4 vs 5
+        return 6, 2
+    if total_teams >= 16:
+        # Top 16 -> Round of 16 in both modes
+        return 16, 0
+    if mode == 'corte_directo':
+        return 8, 0
+    if total_teams < 10:
+        raise PlayoffError('Se necesitan al menos 10 equipos para modo con repechaje.')
+    # Top 6 get bye; repechaje 7 vs 10, 8 vs 9
+    return 10, 6
+
+
+def group_seeds(tables, per_group):
+    """Seed order for a group liguilla: the top `per_group` of every group.
+
+    `tables` is [(group, rows)] (see group_standings). Seeds go by position
+    and then by group, so with best-against-worst pairing every tie crosses
+    groups: with two groups 1A-2B and 1B-2A, with four 1A-2D, 1B-2C...
+    """
+    if len(tables) < 2:
+        raise PlayoffError('Se necesitan al menos 2 grupos para sembrar la liguilla por grupos.')
+    if any(len(rows) < per_group for _, rows in tables):
+        raise PlayoffError(f'Cada grupo necesita al menos {per_group} equipos para clasificar.')
+    if per_group * len(tables) not in STAGE_BY_SIZE:
+        raise PlayoffError('Los clasificados por grupo no forman una llave válida (2, 4, 8 o 16 equipos).')
+    return [rows[position] for position in range(per_group) for _, rows in tables]
+
+
+def seed_label(bracket, groups, seed):
+    """How a seed is shown in the bracket: '3', or '1A' in a group liguilla."""
+    if seed is None or bracket is None or bracket.mode != GROUP_MODE or not groups:
+        return seed
+    position, column = divmod(seed - 1, len(groups))
+    return f"{position + 1}{groups[column].name}"
+
+
+def create_bracket(league, standings, mode, playoff_type, group_qualifiers=None):
+    """Draw the bracket from the current standings and create the first round's matches.
+
+    In a group liguilla `standings` is already the seed order (group_seeds)
+    and every team in it qualifies. Returns (bracket, matches created). The
+    caller commits.
+    """
+    if mode == GROUP_MODE:
+        qualified, byes = len(standings), 0
+    else:
+        qualified, byes = playoff_format(len(standings), mode)
+    team_of_seed = {i + 1: s['team'].id for i, s in enumerate(standings)}
+    bracket = PlayoffBracket(league_id=league.id, mode=mode, playoff_type=playoff_type,
+                             group_qualifiers=group_qualifiers)
+    db.session.add(bracket)
+
+    if byes:
+        seeds = list(range(byes + 1, qualified + 1))
+        repechaje = [_new_tie(bracket, 'repechaje', k + 1, (seeds[k], seeds[-1 - k]), team_of_seed) for k in range(2)]
+        entries = list(range(1, byes + 1)) + repechaje
+    else:
+        entries = list(range(1, qualified + 1))
+    _build_rounds(bracket, entries, team_of_seed)
+
+    teams = {s['team'].id: s['team'] for s in standings}
+    court_id = _default_court_id(league.id)
+    created = sum(_create_legs(tie, league, teams, court_id)
+                  for tie in bracket.ties if tie.home_team_id and tie.away_team_id)
+    return bracket, created
+
+
+def adopt_playoffs(league, standings):
+    """Bracket for a liguilla generated before brackets were stored.
+
+    It starts at the latest stage that has matches (those become its legs),
+    seeded with the current standings. Returns None when the matches do not
+    form a bracket. The caller commits.
+    """
+    matches = Match.query.filter(
+        Match.league_id == league.id,
+        Match.stage.in_(PLAYOFF_STAGES)
+    ).order_by(Match.created_at).all()
+    seed_of = {s['team'].id: i + 1 for i, s in enumerate(standings)}
+
+    # Legs of each stage grouped by pair, best seeded pair first
+    pairs_by_stage = {}
+    for m in matches:
+        pairs = pairs_by_stage.setdefault(m.stage, {})
+        pairs.setdefault(frozenset((m.home_team_id, m.away_team_id)), []).append(m)
+    for stage, pairs in pairs_by_stage.items():
+        pairs_by_stage[stage] = sorted(pairs.values(), key=lambda legs: min(
+            seed_of.get(legs[0].home_team_id, 999), seed_of.get(legs[0].away_team_id, 999)))
+
+    played_rounds = [stage for stage in ROUNDS if stage in pairs_by_stage]
+    if not played_rounds:
+        return None
+    stage = played_rounds[-1]
+
+    byes = []
+    if stage == 'repechaje' and league.playoff_bye_teams:
+        try:
+            byes = sorted(seed_of[t] for t in json.loads(league.playoff_bye_teams) if t in seed_of)
+        except ValueError:
+            pass
+    entry_count = len(byes) + len(pairs_by_stage[stage])
+    if entry_count > 1 and entry_count not in STAGE_BY_SIZE:
+        return None
+
+    bracket = PlayoffBracket(league_id=league.id, mode=league.playoff_mode or 'corte_directo',
+                             playoff_type=league.playoff_type or 'single')
+    db.session.add(bracket)
+
+    def adopt_stage(stage_name):
+        ties = []
+        for position, legs in enumerate(pairs_by_stage[stage_name], start=1):
+            tie = _add_tie(bracket, stage_name, position)
+            for team_id in sorted((legs[0].home_team_id, legs[0].away_team_id), key=lambda t: seed_of.get(t, 999)):
+                tie.place(team_id, seed_of.get(team_id))
+            tie.legs = legs
+            ties.append(tie)
+        return ties
+
+    entries = byes + adopt_stage(stage)
+    if stage == 'final' and 'tercer_lugar' in pairs_by_stage:
+        adopt_stage('tercer_lugar')
+    team_of_seed = {seed: team_id for team_id, seed in seed_of.items()}
+    _build_rounds(bracket, entries, team_of_seed)
+    return bracket
+
+
+def _decide_tie(tie):
+    """Store the aggregate and the winner; a draw goes to the better seed (home)."""
+    home_goals, away_goals = tie.goals()
+    tie.home_aggregate, tie.away_aggregate = home_goals, away_goals
+    tie.winner_team_id = tie.home_team_id if home_goals >= away_goals else tie.away_team_id
+
+
+def advance_bracket(bracket, league):
+    """Decide the ties of the current stage and move their teams on.
+
+    Returns ('champion', Team) once the final is decided, otherwise
+    ('round', next stage, matches created). Only the ties of the current
+    stage and the ties they feed are touched. The caller commits.
+    """
+    ties = bracket.ties
+    teams = {t.id: t for t in Team.query.filter_by(league_id=league.id).all()}
+    court_id = _default_court_id(league.id)
+
+    # Ties that are set but lost their matches (or were drawn without them) get them back
+    for tie in ties:
+        if tie.home_team_id and tie.away_team_id and not tie.legs and not tie.is_decided:
+            _create_legs(tie, league, teams, court_id)
+
+    open_ties = [t for t in ties if t.stage != 'tercer_lugar' and not t.is_decided and t.home_team_id and t.away_team_id]
+    if not open_ties:
+        final = next((t for t in ties if t.stage == 'final'), None)
+        if final is not None and final.is_decided:
+            return 'champion', db.session.get(Team, final.winner_team_id)
+        raise PlayoffError('No se encontró una fase activa.')
+
+    stage = min((t.stage for t in open_ties), key=ROUNDS.index)
+    current = [t for t in open_ties if t.stage == stage]
+    if not all(t.is_played for t in current):
+        raise PlayoffError(f'Completa todos los partidos de {STAGE_TITLES[stage]} antes de avanzar.')
+
+    if stage == 'final':
+        third = next((t for t in ties if t.stage == 'tercer_lugar'), None)
+        if third is not None and not third.is_decided and third.is_played:
+            _decide_tie(third)
+
+    ready = []
+    for tie in current:
+        _decide_tie(tie)
+        if tie.winner_team_id == tie.home_team_id:
+            moves = ((tie.next_tie, tie.home_team_id, tie.home_seed), (tie.loser_tie, tie.away_team_id, tie.away_seed))
+        else:
+            moves = ((tie.next_tie, tie.away_team_id, tie.away_seed), (tie.loser_tie, tie.home_team_id, tie.home_seed))
+        for target, team_id, seed in moves:
+            if target is None:
+                continue
+            target.place(team_id, seed)
+            if target.home_team_id and target.away_team_id and not target.legs and target not in ready:
+                ready.append(target)
+
+    if stage == 'final':
+        return 'champion', db.session.get(Team, current[0].winner_team_id)
+
+    created = sum(_create_legs(tie, league, teams, court_id) for tie in ready)
+    next_stage = min((t.stage for t in ready if t.stage != 'tercer_lugar'), key=ROUNDS.index, default=stage)
+    return 'round', next_stage, created
+
+
+def delete_bracket(league_id):
+    """Bulk delete the league's bracket; its matches must be deleted first."""
+    bracket_ids = db.session.query(PlayoffBracket.id).filter_by(league_id=league_id).scalar_subquery()
+    PlayoffTie.query.filter(PlayoffTie.bracket_id.in_(bracket_ids)).delete(synchronize_session=False)
+    PlayoffBracket.query.filter_by(league_id=league_id).delete(synchronize_session=False)
@@ -0,0 +1,32 @@
+"""Per-request SQL statement counter, exposed as the X-Query-Count header.
+
+Enabled with QUERY_COUNT_HEADER=true. Meant for development: pages such as
+league_detail should report the same count whatever the size of the league
+(tests/test_query_count.py checks it).
+"""
+from flask import g, has_request_context
+from sqlalchemy import event
+from extensions import db
+
+
+def init_query_counter(app):
+    if not app.config.get('QUERY_COUNT_HEADER'):
+        return
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.query_count = g.get('query_count', 0) + 1
+
+    @app.before_request
+    def reset_query_count():
+        # `g` lives on the app context, which an outer one (tests, CLI) keeps across requests
+        g.query_count = 0
+
+    @app.after_request
+    def add_query_count_header(response):
+        response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+        return response
@@ -0,0 +1,250 @@
+"""Elo power ratings replayed from the completed matches of a league.
+
+Ratings are persisted in TeamRating and kept current incrementally: a new
+result dated after every result already applied (League.ratings_last_*) is
+folded in with one Elo step for its two teams (see RatingDelta, driven by
+StandingsDelta). Any other change, such as an edited or deleted result or
+one dated before the last applied, replays the league from scratch within
+the same write. Reads never write: rows built with other Elo settings are
+replayed in memory until the next write or `flask rebuild-ratings`.
+
+Replays go through `replay_ratings`, which runs many leagues at once with
+NumPy: leagues never share teams, so the k-th match of every league is
+applied in the same vectorized step.
+"""
+import numpy as np
+from sqlalchemy import select, insert, func
+from extensions import db
+from models import Team, Match, TeamRating
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+
+# Added to the home side's rating; teams of a league usually share the courts
+HOME_ADVANTAGE = 0.0
+
+# Bump when the formula changes so every league replays on its next read
+RATING_VERSION = 1
+
+
+def ratings_signature():
+    """Fingerprint of the Elo settings; stored ratings built with others are replayed."""
+    return f"{RATING_VERSION}:{K_FACTOR:g}:{HOME_ADVANTAGE:g}:{INITIAL_RATING:g}"
+
+
+def goal_multiplier(goal_difference):
+    """Wider wins move ratings more (World Football Elo weighting)."""
+    margin = abs(goal_difference)
+    if margin <= 1:
+        return 1.0
+    if margin == 2:
+        return 1.5
+    return (11 + margin) / 8
+
+
+def elo_change(home_rating, away_rating, home_score, away_score):
+    """Points the home side gains (the away side loses the same) for one result."""
+    expected = 1 / (1 + 10 ** ((away_rating - home_rating - HOME_ADVANTAGE) / 400))
+    actual = 1.0 if home_score > away_score else 0.5 if home_score == away_score else 0.0
+    return K_FACTOR * goal_multiplier(home_score - away_score) * (actual - expected)
+
+
+def replay_ratings(team_count, home, away, home_scores, away_scores, step):
+    """Final (ratings, played) per team index after replaying the given matches.
+
+    `home`/`away` are team indexes, `step` the position of each match in its
+    league's chronological order. Matches sharing a step belong to different
+    leagues, so each step is one vectorized Elo update.
+    """
+    ratings = np.full(team_count, INITIAL_RATING)
+    played = np.bincount(home, minlength=team_count) + np.bincount(away, minlength=team_count)
+    if not len(step):
+        return ratings, played
+
+    order = np.argsort(step, kind='stable')
+    bounds = np.searchsorted(step[order], np.arange(step.max() + 2))
+    margin = np.abs(home_scores - away_scores)
+    weight = np.where(margin <= 1, 1.0, np.where(margin == 2, 1.5, (11 + margin) / 8))
+    actual = np.where(home_scores > away_scores, 1.0, np.where(home_scores == away_scores, 0.5, 0.0))
+
+    for k in range(len(bounds) - 1):
+        batch = order[bounds[k]:bounds[k + 1]]
+        h, a = home[batch], away[batch]
+        expected = 1 / (1 + 10 ** ((ratings[a] - ratings[h] - HOME_ADVANTAGE) / 400))
+        change = K_FACTOR * weight[batch] * (actual[batch] - expected)
+        ratings[h] += change
+        ratings[a] -= change
+    return ratings, played
+
+
+def _rated_matches_select():
+    """Completed, non-practice matches of every stage, in replay order."""
+    return select(
+        Match.league_id, Match.id, Match.match_date, Match.home_team_id, Match.away_team_id,
+        func.coalesce(Match.home_score, 0).label('home_score'), func.coalesce(Match.away_score, 0).label('away_score')
+    ).where(
+        Match.is_completed == True,
+        Match.is_practice == False,
+        Match.home_team_id != Match.away_team_id
+    ).order_by(Match.league_id, Match.match_date, Match.id)
+
+
+def _replay_leagues(leagues):
+    """(teams, ratings, played, last) of `leagues` replayed from their matches.
+
+    `teams` are (team_id, league_id) rows indexing `ratings`/`played`, and
+    `last` maps league_id to its last applied match.
+    """
+    league_ids = [league.id for league in leagues]
+    teams = db.session.execute(select(Team.id, Team.league_id).where(Team.league_id.in_(league_ids))).all()
+    index = {team_id: i for i, (team_id, _) in enumerate(teams)}
+    matches = [m for m in db.session.execute(_rated_matches_select().where(Match.league_id.in_(league_ids))).all()
+               if m.home_team_id in index and m.away_team_id in index]
+
+    # Position of each match within its league (rows come sorted by league)
+    count = len(matches)
+    league_col, _, _, home_col, away_col, home_scores, away_scores = zip(*matches) if matches else ((),) * 7
+    codes = np.array(league_col, dtype=object)
+    starts = np.r_[0, np.flatnonzero(codes[1:] != codes[:-1]) + 1] if count else np.zeros(0, dtype=np.intp)
+    step = np.arange(count) - np.repeat(starts, np.diff(np.r_[starts, count]))
+
+    ratings, played = replay_ratings(
+        len(teams),
+        np.fromiter(map(index.__getitem__, home_col), dtype=np.intp, count=count),
+        np.fromiter(map(index.__getitem__, away_col), dtype=np.intp, count=count),
+        np.fromiter(home_scores, dtype=np.int64, count=count),
+        np.fromiter(away_scores, dtype=np.int64, count=count),
+        step
+    )
+    last = {matches[end - 1].league_id: matches[end - 1] for end in np.r_[starts[1:], count]} if count else {}
+    return teams, ratings, played, last
+
+
+def rebuild_ratings(leagues):
+    """Replay every match of `leagues` and rewrite their TeamRating rows in bulk."""
+    league_ids = [league.id for league in leagues]
+    if not league_ids:
+        return
+
+    teams, ratings, played, last = _replay_leagues(leagues)
+    TeamRating.query.filter(TeamRating.league_id.in_(league_ids)).delete(synchronize_session=False)
+    if teams:
+        db.session.execute(insert(TeamRating), [
+            {'league_id': league_id, 'team_id': team_id, 'rating': float(ratings[i]), 'played': int(played[i])}
+            for i, (team_id, league_id) in enumerate(teams)
+        ])
+
+    signature = ratings_signature()
+    for league in leagues:
+        league.ratings_signature = signature
+        league.ratings_last_date = last[league.id].match_date if league.id in last else None
+        league.ratings_last_id = last[league.id].id if league.id in last else None
+    db.session.flush()
+
+
+def team_ratings(league):
+    """{team_id: rating} for every team of the league.
+
+    Stale rows are replayed in memory only; a read never writes, so it
+    cannot expire the objects the caller already loaded.
+    """
+    if league.ratings_signature != ratings_signature():
+        teams, ratings, _, _ = _replay_leagues([league])
+        return {team_id: float(ratings[i]) for i, (team_id, _) in enumerate(teams)}
+
+    rows = db.session.execute(
+        select(Team.id, func.coalesce(TeamRating.rating, INITIAL_RATING))
+        .outerjoin(TeamRating, TeamRating.team_id == Team.id)
+        .where(Team.league_id == league.id)
+    ).all()
+    return {team_id: rating for team_id, rating in rows}
+
+
+def fixture_difficulty(standings, ratings, fixtures):
+    """Remaining schedule of each standings team, hardest first.
+
+    `fixtures` are (home_id, away_id) pairs (see remaining_fixtures). Each
+    entry holds the team, its pending matches and their average rival rating.
+    """
+    rivals = {s['team'].id: [] for s in standings}
+    for home, away in fixtures:
+        if home in rivals:
+            rivals[home].append(ratings.get(away, INITIAL_RATING))
+        if away in rivals:
+            rivals[away].append(ratings.get(home, INITIAL_RATING))
+
+    schedule = [{
+        'team': s['team'],
+        'rating': ratings.get(s['team'].id, INITIAL_RATING),
+        'remaining': len(rivals[s['team'].id]),
+        'rival_rating': sum(rivals[s['team'].id]) / len(rivals[s['team'].id]) if rivals[s['team'].id] else None
+    } for s in standings]
+    return sorted(schedule, key=lambda entry: entry['rival_rating'] or 0, reverse=True)
+
+
+class RatingDelta:
+    """Keeps the persisted ratings current across a write; used by StandingsDelta.
+
+    The completed matches of every captured pair are compared before and
+    after the write. Results added after the last applied one get one Elo
+    step each; an edited, deleted or back-dated result, or rows built with
+    other Elo settings, replay the whole league instead. The caller commits.
+    """
+
+    def __init__(self, league):
+        self.league = league
+        self._before = {}
+
+    def capture(self, pair):
+        if pair not in self._before:
+            self._before[pair] = self._snapshot(pair)
+
+    def apply(self):
+        before, self._before = self._before, {}
+        league = self.league
+        if not before:
+            return
+
+        db.session.flush()
+        if league.ratings_signature != ratings_signature():
+            rebuild_ratings([league])
+            return
+
+        added = []
+        for pair, old in before.items():
+            new = self._snapshot(pair)
+            if any(new.get(match_id) != row for match_id, row in old.items()):
+                rebuild_ratings([league])
+                return
+            added.extend(row for match_id, row in new.items() if match_id not in old)
+
+        added.sort(key=lambda m: (m.match_date, m.id))
+        if added and league.ratings_last_date is not None and \
+                (added[0].match_date, added[0].id) <= (league.ratings_last_date, league.ratings_last_id):
+            rebuild_ratings([league])
+            return
+
+        for match in added:
+            home, away = self._row(match.home_team_id), self._row(match.away_team_id)
+            change = elo_change(home.rating, away.rating, match.home_score, match.away_score)
+            home.rating += change
+            away.rating -= change
+            home.played = (home.played or 0) + 1
+            away.played = (away.played or 0) + 1
+            league.ratings_last_date, league.ratings_last_id = match.match_date, match.id
+
+    def _snapshot(self, pair):
+        team_a, team_b = pair
+        rows = db.session.execute(_rated_matches_select().where(
+            Match.league_id == self.league.id,
+            ((Match.home_team_id == team_a) & (Match.away_team_id == team_b)) |
+            ((Match.home_team_id == team_b) & (Match.away_team_id == team_a))
+        )).all()
+        return {m.id: m for m in rows}
+
+    def _row(self, team_id):
+        row = TeamRating.query.filter_by(team_id=team_id).first()
+        if row is None:
+            row = TeamRating(league_id=self.league.id, team_id=team_id, rating=INITIAL_RATING, played=0)
+            db.session.add(row)
+        return row
@@ -0,0 +1,215 @@
+"""Monte Carlo projection of the rest of the regular season.
+
+The remaining fixtures are played thousands of times at once with NumPy:
+the goals of each side follow a Poisson law whose mean is the league
+average scaled by the side's attack rate and the rival's defense rate,
+both estimated from the completed matches. Every run is scored with the
+league's rules (scoring_rules, shutdown points) and ranked with the
+configured tiebreak chain, then the final positions are counted.
+
+The model is plain arrays, so chunks of runs can go to a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sqlalchemy import select
+from extensions import db
+from utils.standings import scoring_rules, counted_matches_select, remaining_fixtures
+from utils.standings_engine import StandingsEngine
+from utils.playoffs import playoff_format, PlayoffError
+
+# Matches at the league average added to every team's record, so a team
+# with one or two results does not get extreme rates
+PRIOR_MATCHES = 3
+
+# Goals per team and match assumed before any result exists
+DEFAULT_GOALS = 1.5
+
+
+class SeasonModel:
+    """Everything a simulation run needs, as NumPy arrays indexed by table position."""
+
+    def __init__(self, points, goals_for, goals_against, shutdown_wins, manual, fixtures_home, fixtures_away,
+                 expected_home, expected_away, win_points, draw_points, shutdown_enabled, tiebreakers):
+        self.points = points
+        self.goals_for = goals_for
+        self.goals_against = goals_against
+        self.shutdown_wins = shutdown_wins
+        self.manual = manual
+        self.fixtures_home = fixtures_home
+        self.fixtures_away = fixtures_away
+        self.expected_home = expected_home
+        self.expected_away = expected_away
+        self.win_points = win_points
+        self.draw_points = draw_points
+        self.shutdown_enabled = shutdown_enabled
+        self.tiebreakers = tiebreakers
+
+    @property
+    def team_count(self):
+        return len(self.points)
+
+
+def season_model(league, standings):
+    """Build the model from the current table (calculate_standings order) and the match table."""
+    engine = StandingsEngine.for_league(league)
+    win_points, draw_points = scoring_rules(league)
+    index = {s['team'].id: i for i, s in enumerate(standings)}
+    n = len(standings)
+
+    counted = db.session.execute(select(counted_matches_select(league))).all()
+    fixtures = remaining_fixtures(league, list(index), counted)
+
+    # Attack/defense rates from the counted results, home and away averages apart
+    played = np.zeros(n)
+    scored = np.zeros(n)
+    conceded = np.zeros(n)
+    shutdown_wins = np.zeros(n)
+    home_goals = away_goals = 0
+    for m in counted:
+        home_score, away_score = m.home_score or 0, m.away_score or 0
+        home_goals += home_score
+        away_goals += away_score
+        for team_id, gf, ga in ((m.home_team_id, home_score, away_score), (m.away_team_id, away_score, home_score)):
+            i = index.get(team_id)
+            if i is not None:
+                played[i] += 1
+                scored[i] += gf
+                conceded[i] += ga
+        if league.enable_shutdown_tiebreaker and home_score == away_score and m.shutdown_winner_id in index:
+            shutdown_wins[index[m.shutdown_winner_id]] += 1
+
+    if counted:
+        average_home = (home_goals + PRIOR_MATCHES * DEFAULT_GOALS) / (len(counted) + PRIOR_MATCHES)
+        average_away = (away_goals + PRIOR_MATCHES * DEFAULT_GOALS) / (len(counted) + PRIOR_MATCHES)
+    else:
+        average_home = average_away = DEFAULT_GOALS
+    average = (average_home + average_away) / 2
+    attack = (scored + PRIOR_MATCHES * average) / ((played + PRIOR_MATCHES) * average)
+    defense = (conceded + PRIOR_MATCHES * average) / ((played + PRIOR_MATCHES) * average)
+
+    # Rivals outside the table (hidden teams) share one sink slot past the
+    # last position, playing at the league average
+    attack = np.append(attack, 1.0)
+    defense = np.append(defense, 1.0)
+    fixtures_home = np.array([index.get(home, n) for home, _ in fixtures], dtype=np.intp)
+    fixtures_away = np.array([index.get(away, n) for _, away in fixtures], dtype=np.intp)
+    return SeasonModel(
+        points=np.array([s['points'] for s in standings], dtype=np.int64),
+        goals_for=np.array([s['goals_for'] for s in standings], dtype=np.int64),
+        goals_against=np.array([s['goals_against'] for s in standings], dtype=np.int64),
+        shutdown_wins=shutdown_wins.astype(np.int64),
+        manual=np.array([s['team'].manual_points_modifier or 0 for s in standings], dtype=np.int64),
+        fixtures_home=fixtures_home,
+        fixtures_away=fixtures_away,
+        expected_home=average_home * attack[fixtures_home] * defense[fixtures_away],
+        expected_away=average_away * attack[fixtures_away] * defense[fixtures_home],
+        win_points=win_points,
+        draw_points=draw_points,
+        shutdown_enabled=bool(league.enable_shutdown_tiebreaker),
+        tiebreakers=engine.tiebreakers
+    )
+
+
+def simulate(model, runs, seed=None):
+    """Play the remaining fixtures `runs` times; returns counts[team, position] (T x T)."""
+    rng = np.random.default_rng(seed)
+    n = model.team_count
+    home_goals = rng.poisson(model.expected_home[:, None], size=(len(model.expected_home), runs))
+    away_goals = rng.poisson(model.expected_away[:, None], size=(len(model.expected_away), runs))
+    home_won = home_goals > away_goals
+    drawn = home_goals == away_goals
+    away_won = ~home_won & ~drawn
+
+    if model.shutdown_enabled:
+        # Shootout after a draw: 2 points for the winner, 1 for the loser
+        home_shootout = drawn & (rng.random(home_goals.shape) < 0.5)
+        away_shootout = drawn & ~home_shootout
+        home_points = np.where(home_won, model.win_points, 0) + np.where(home_shootout, 2, 0) + np.where(away_shootout, 1, 0)
+        away_points = np.where(away_won, model.win_points, 0) + np.where(away_shootout, 2, 0) + np.where(home_shootout, 1, 0)
+    else:
+        home_shootout = away_shootout = np.zeros(home_goals.shape, dtype=bool)
+        home_points = np.where(home_won, model.win_points, 0) + np.where(drawn, model.draw_points, 0)
+        away_points = np.where(away_won, model.win_points, 0) + np.where(drawn, model.draw_points, 0)
+
+    # Fold the fixtures into per-team totals with two incidence matrices (T x F);
+    # the sink row of hidden rivals is dropped
+    home_of = np.zeros((n + 1, len(model.fixtures_home)))
+    home_of[model.fixtures_home, np.arange(len(model.fixtures_home))] = 1
+    away_of = np.zeros((n + 1, len(model.fixtures_away)))
+    away_of[model.fixtures_away, np.arange(len(model.fixtures_away))] = 1
+    home_of, away_of = home_of[:n], away_of[:n]
+
+    def totals(base, home_values, away_values):
+        return base[:, None] + (home_of @ home_values + away_of @ away_values).astype(np.int64)
+
+    points = totals(model.points, home_points, away_points)
+    goals_for = totals(model.goals_for, home_goals, away_goals)
+    goals_against = totals(model.goals_against, away_goals, home_goals)
+    values = {
+        'points': points,
+        'goal_difference': goals_for - goals_against,
+        'goals_for': goals_for,
+        'shutdown_wins': totals(model.shutdown_wins, home_shootout, away_shootout),
+        'manual_modifier': np.broadcast_to(model.manual[:, None], points.shape)
+    }
+
+    # lexsort takes its primary key last; head-to-head is not simulated and
+    # whatever is still tied keeps the current table order
+    keys = [np.broadcast_to(np.arange(n)[:, None], points.shape)]
+    keys += [-values[rule] for rule in reversed(model.tiebreakers) if rule in values]
+    order = np.lexsort(keys, axis=0)  # order[position, run] = team
+
+    counts = np.zeros((n, n), dtype=np.int64)
+    for position in range(n):
+        counts[:, position] = np.bincount(order[position], minlength=n)
+    return counts
+
+
+def run_simulation(model, runs, workers=1, seed=None):
+    """Counts of `runs` simulations, split over `workers` processes when more than one."""
+    if workers <= 1 or runs < 2 * workers:
+        return simulate(model, runs, seed)
+
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    chunks = [runs // workers + (1 if k < runs % workers else 0) for k in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(simulate, [model] * workers, chunks, seeds))
+
+
+def season_probabilities(league, standings, runs, mode=None, workers=1, seed=None):
+    """Plain data for the probabilities view (positions, playoff cut line and byes).
+
+    `standings` is calculate_standings(league.id); `mode` defaults to the
+    league's playoff mode.
+    """
+    mode = mode or league.playoff_mode or 'corte_directo'
+    model = season_model(league, standings)
+    counts = run_simulation(model, runs, workers, seed) if len(standings) else np.zeros((0, 0), dtype=np.int64)
+    probabilities = counts / runs
+
+    try:
+        qualified, byes = playoff_format(len(standings), mode)
+    except PlayoffError:
+        qualified = byes = None
+
+    teams = []
+    for i, stats in enumerate(standings):
+        row = probabilities[i]
+        teams.append({
+            'id': stats['team'].id,
+            'name': stats['team'].name,
+            'shield_url': stats['team'].shield_url,
+            'points': stats['points'],
+            'positions': [round(float(p), 4) for p in row],
+            'title': round(float(row[0]), 4) if len(row) else 0,
+            'playoffs': round(float(row[:qualified].sum()), 4) if qualified else None,
+            'bye': round(float(row[:byes].sum()), 4) if byes else None
+        })
+    return {
+        'runs': runs,
+        'remaining': len(model.fixtures_home),
+        'mode': mode,
+        'qualified': qualified,
+        'byes': byes,
+        'teams': teams
+    }
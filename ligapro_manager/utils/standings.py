@@ -0,0 +1,532 @@
+from flask import current_app
+from extensions import db
+from models import Team, Match, TeamStanding
+from sqlalchemy import or_, and_, select, union_all, case, func, literal
+from sqlalchemy.exc import IntegrityError
+from utils.standings_engine import StandingsEngine, DEFAULT_TIEBREAKERS, parse_tiebreakers
+from utils.ratings import RatingDelta
+
+# Order of the per-team counters kept in TeamStanding
+STAT_FIELDS = ('played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'points')
+
+# Results shown in the form guide ("últimos 5")
+FORM_LENGTH = 5
+
+
+def scoring_rules(league):
+    """Return (win_points, draw_points), enforcing defaults for non-premium owners."""
+    is_premium = league.owner.is_active_premium
+    win_points = league.win_points if is_premium else 3
+    draw_points = league.draw_points if is_premium else 1
+    return win_points, draw_points
+
+
+def tiebreak_rules(league):
+    """Tiebreak chain of the league; non-premium owners get the app default."""
+    default = current_app.config.get('STANDINGS_TIEBREAKERS') or DEFAULT_TIEBREAKERS
+    if league.tiebreakers and league.owner.is_active_premium:
+        return parse_tiebreakers(league.tiebreakers)
+    return parse_tiebreakers(default)
+
+
+def standings_signature(league):
+    """Fingerprint of every league setting that changes how a result is scored."""
+    win_points, draw_points = scoring_rules(league)
+    return f"{win_points}:{draw_points}:{int(bool(league.enable_shutdown_tiebreaker))}:{int(league.owner.is_active_premium)}"
+
+
+def counted_matches_query(league_id, include_playoffs=False):
+    """Completed matches that count for the table (never practice matches)."""
+    query = Match.query.filter(
+        Match.league_id == league_id,
+        Match.is_completed == True,
+        Match.is_practice == False
+    )
+    if not include_playoffs:
+        query = query.filter(Match.stage.in_(['regular', None, '']))
+    return query
+
+
+def match_contribution(match, win_points, draw_points, shutdown_enabled):
+    """Return {team_id: [played, won, drawn, lost, gf, ga, points]} for a completed match."""
+    home_score = match.home_score or 0
+    away_score = match.away_score or 0
+    result = {}
+    for team_id, gf, ga in ((match.home_team_id, home_score, away_score),
+                            (match.away_team_id, away_score, home_score)):
+        row = [1, 0, 0, 0, gf, ga, 0]
+        if gf > ga:
+            row[1] = 1
+            row[6] = win_points
+        elif gf == ga:
+            row[2] = 1
+            if shutdown_enabled and match.shutdown_winner_id:
+                row[6] = 2 if match.shutdown_winner_id == team_id else 1
+            else:
+                row[6] = draw_points
+        else:
+            row[3] = 1
+        result[team_id] = row
+    return result
+
+
+def counted_matches_select(league, include_playoffs=False, group_ids=None):
+    """Core subquery with the plain columns of the matches that count.
+
+    Rows come back as lightweight tuples; no Match objects are hydrated.
+    With `group_ids` only the matches tagged with one of those groups are
+    kept, and their group_id is added as a last column.
+    """
+    stmt = select(
+        Match.id, Match.home_team_id, Match.away_team_id,
+        Match.home_score, Match.away_score, Match.shutdown_winner_id, Match.match_date
+    ).where(
+        Match.league_id == league.id,
+        Match.is_completed == True,
+        Match.is_practice == False
+    )
+    if not include_playoffs:
+        stmt = stmt.where(Match.stage.in_(['regular', None, '']))
+    if group_ids is not None:
+        stmt = stmt.add_columns(Match.group_id).where(Match.group_id.in_(group_ids))
+
+    # If not premium, only count the first match between any pair (Round 1)
+    if not league.owner.is_active_premium:
+        ranked = stmt.add_columns(first_of_pair_rank().label('pair_rank')).subquery()
+        return select(*[column for column in ranked.c if column.key != 'pair_rank']).where(
+            ranked.c.pair_rank == 1).subquery()
+    return stmt.subquery()
+
+
+def remaining_fixtures(league, team_ids, counted):
+    """(home_id, away_id) of the regular matches of `team_ids` still to be played that will count.
+
+    A rival outside `team_ids` (a hidden team) is kept as it is: the match
+    still counts for the listed side, and consumers treat the other id as a
+    sink. Free leagues only count the first match of a pair, so pairs that
+    already have a counted result are skipped and only their first pending
+    match is kept.
+    """
+    pending = Match.query.with_entities(Match.home_team_id, Match.away_team_id).filter(
+        Match.league_id == league.id,
+        or_(Match.stage == 'regular', Match.stage == None, Match.stage == ''),
+        Match.is_completed == False,
+        Match.is_practice == False,
+        or_(Match.home_team_id.in_(team_ids), Match.away_team_id.in_(team_ids))
+    ).order_by(Match.match_date, Match.id).all()
+
+    if league.owner.is_active_premium:
+        return [(m.home_team_id, m.away_team_id) for m in pending]
+
+    seen = {frozenset((m.home_team_id, m.away_team_id)) for m in counted}
+    fixtures = []
+    for m in pending:
+        pair = frozenset((m.home_team_id, m.away_team_id))
+        if pair not in seen:
+            seen.add(pair)
+            fixtures.append((m.home_team_id, m.away_team_id))
+    return fixtures
+
+
+def first_of_pair_rank():
+    """ROW_NUMBER() of a match within its unordered team pair, oldest first.
+
+    The pair is normalized with CASE (portable LEAST/GREATEST) so home/away
+    order does not matter; ties on the date are broken by id.
+    """
+    low = case((Match.home_team_id < Match.away_team_id, Match.home_team_id), else_=Match.away_team_id)
+    high = case((Match.home_team_id < Match.away_team_id, Match.away_team_id), else_=Match.home_team_id)
+    return func.row_number().over(partition_by=(low, high), order_by=(Match.match_date, Match.id))
+
+
+def aggregate_standings_sql(league, include_playoffs=False, group_ids=None):
+    """Per-team totals computed by the database, as {team_id: row}.
+
+    The home and away perspectives of every counted match are stacked with
+    UNION ALL and grouped by team; the scoring rules are pushed into CASE
+    expressions. Only portable SQL is used so SQLite and PostgreSQL agree.
+    With `group_ids` only the group matches count and the totals are
+    grouped by (group_id, team_id), keyed the same way.
+    """
+    win_points, draw_points = scoring_rules(league)
+    counted = counted_matches_select(league, include_playoffs, group_ids)
+
+    def perspective(team_id, goals_for, goals_against):
+        columns = [
+            team_id.label('team_id'),
+            func.coalesce(goals_for, 0).label('gf'),
+            func.coalesce(goals_against, 0).label('ga'),
+            counted.c.shutdown_winner_id.label('shutdown_winner_id')
+        ]
+        if group_ids is not None:
+            columns.append(counted.c.group_id.label('group_id'))
+        return select(*columns)
+
+    sides = union_all(
+        perspective(counted.c.home_team_id, counted.c.home_score, counted.c.away_score),
+        perspective(counted.c.away_team_id, counted.c.away_score, counted.c.home_score)
+    ).subquery()
+
+    if league.enable_shutdown_tiebreaker:
+        draw_points_expr = case(
+            (or_(sides.c.shutdown_winner_id == None, sides.c.shutdown_winner_id == ''), draw_points),
+            (sides.c.shutdown_winner_id == sides.c.team_id, 2),
+            else_=1
+        )
+    else:
+        draw_points_expr = literal(draw_points)
+
+    won = sides.c.gf > sides.c.ga
+    drawn = sides.c.gf == sides.c.ga
+    keys = [sides.c.team_id] if group_ids is None else [sides.c.group_id, sides.c.team_id]
+    stmt = select(
+        *keys,
+        func.count().label('played'),
+        func.sum(case((won, 1), else_=0)).label('won'),
+        func.sum(case((drawn, 1), else_=0)).label('drawn'),
+        func.sum(case((sides.c.gf < sides.c.ga, 1), else_=0)).label('lost'),
+        func.sum(sides.c.gf).label('goals_for'),
+        func.sum(sides.c.ga).label('goals_against'),
+        func.sum(case((won, win_points), (drawn, draw_points_expr), else_=0)).label('points')
+    ).group_by(*keys)
+
+    if group_ids is not None:
+        return {(row.group_id, row.team_id): row for row in db.session.execute(stmt)}
+    return {row.team_id: row for row in db.session.execute(stmt)}
+
+
+def compute_standings(league, teams, include_playoffs=False):
+    """Build the standings rows for `teams` straight from the match table."""
+    engine = StandingsEngine.for_league(league)
+    if engine.needs_matches:
+        # Head-to-head and shutdown wins need the individual results
+        matches = db.session.execute(select(counted_matches_select(league, include_playoffs))).all()
+        return engine.standings(teams, matches)
+
+    totals = aggregate_standings_sql(league, include_playoffs)
+    standings = []
+    for team in teams:
+        stats = engine.new_row(team)
+        total = totals.get(team.id)
+        if total:
+            for field in STAT_FIELDS:
+                stats[field] += int(getattr(total, field) or 0)
+        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+        standings.append(stats)
+    return engine.sort(standings)
+
+
+def team_form(league, limit=FORM_LENGTH, team_ids=None):
+    """Last `limit` results and current streaks of each team, computed by the database.
+
+    Home and away appearances of the counted matches are stacked with UNION
+    ALL and numbered per team, newest first, with ROW_NUMBER(). The streaks
+    come from window aggregates over the same partition (the newest loss and
+    the newest win), so only `limit` rows per team are fetched.
+    Returns {team_id: {'form': ['G', 'E', 'P', ...] oldest first, 'unbeaten': n, 'winless': n}}.
+    """
+    counted = counted_matches_select(league)
+
+    def perspective(team_id, goals_for, goals_against):
+        return select(
+            team_id.label('team_id'),
+            counted.c.match_date.label('match_date'),
+            counted.c.id.label('match_id'),
+            func.coalesce(goals_for, 0).label('gf'),
+            func.coalesce(goals_against, 0).label('ga')
+        )
+
+    sides = union_all(
+        perspective(counted.c.home_team_id, counted.c.home_score, counted.c.away_score),
+        perspective(counted.c.away_team_id, counted.c.away_score, counted.c.home_score)
+    ).subquery()
+
+    ranked = select(
+        sides.c.team_id, sides.c.gf, sides.c.ga,
+        func.row_number().over(
+            partition_by=sides.c.team_id, order_by=(sides.c.match_date.desc(), sides.c.match_id.desc())
+        ).label('rn')
+    )
+    if team_ids is not None:
+        ranked = ranked.where(sides.c.team_id.in_(team_ids))
+    ranked = ranked.subquery()
+
+    team = ranked.c.team_id
+    streaks = select(
+        ranked.c.team_id, ranked.c.rn, ranked.c.gf, ranked.c.ga,
+        func.min(case((ranked.c.gf < ranked.c.ga, ranked.c.rn))).over(partition_by=team).label('last_loss'),
+        func.min(case((ranked.c.gf > ranked.c.ga, ranked.c.rn))).over(partition_by=team).label('last_win'),
+        func.count().over(partition_by=team).label('played')
+    ).subquery()
+
+    rows = db.session.execute(
+        select(streaks).where(streaks.c.rn <= limit).order_by(streaks.c.team_id, streaks.c.rn.desc()))
+
+    form = {}
+    for row in rows:
+        entry = form.get(row.team_id)
+        if entry is None:
+            entry = form[row.team_id] = {
+                'form': [],
+                'unbeaten': row.last_loss - 1 if row.last_loss else row.played,
+                'winless': row.last_win - 1 if row.last_win else row.played
+            }
+        entry['form'].append('G' if row.gf > row.ga else 'E' if row.gf == row.ga else 'P')
+
+    for team_id in team_ids or ():
+        form.setdefault(team_id, {'form': [], 'unbeaten': 0, 'winless': 0})
+    return form
+
+
+def attach_form(league, standings, limit=FORM_LENGTH):
+    """Add 'form', 'unbeaten' and 'winless' to every standings row (one query)."""
+    form = team_form(league, limit)
+    for stats in standings:
+        entry = form.get(stats['team'].id, {'form': [], 'unbeaten': 0, 'winless': 0})
+        stats.update(entry)
+    return standings
+
+
+def standings_timeline(league, teams):
+    """Position and points of every team after each match date of the regular season.
+
+    Counted matches are sorted once and replayed with cumulative accumulators
+    (see StandingsEngine.timeline) instead of recomputing a table per date.
+    Returns plain data: {'steps': [...], 'teams': [...]}.
+    """
+    engine = StandingsEngine.for_league(league)
+    counted = counted_matches_select(league)
+    matches = db.session.execute(
+        select(counted).order_by(counted.c.match_date, counted.c.id)).all()
+
+    steps = []
+    series = {team.id: {'id': team.id, 'name': team.name, 'positions': [], 'points': []} for team in teams}
+    for match_day, table in engine.timeline(teams, matches, step_key=lambda m: m.match_date.date()):
+        steps.append({'label': f"J{len(steps) + 1}", 'date': match_day.isoformat()})
+        for position, stats in enumerate(table, start=1):
+            entry = series[stats['team'].id]
+            entry['positions'].append(position)
+            entry['points'].append(stats['points'])
+
+    # Final table order, so the chart legend reads like the standings
+    ordered = sorted(series.values(), key=lambda entry: entry['positions'][-1] if entry['positions'] else 0)
+    return {'steps': steps, 'teams': ordered}
+
+
+def rebuild_standings(league):
+    """Recompute every persisted standings row of a league (repair path)."""
+    TeamStanding.query.filter_by(league_id=league.id).delete(synchronize_session=False)
+
+    # Keep rows for hidden/deleted teams too, so toggling visibility needs no rebuild
+    teams = Team.query.filter_by(league_id=league.id).all()
+    for stats in compute_standings(league, teams):
+        db.session.add(TeamStanding(
+            league_id=league.id,
+            team_id=stats['team'].id,
+            **{field: stats[field] for field in STAT_FIELDS}
+        ))
+
+    league.standings_signature = standings_signature(league)
+    db.session.flush()
+
+
+def read_standings(league):
+    """Standings of the active teams, read from the persisted rows: O(teams)."""
+    engine = StandingsEngine.for_league(league)
+    return engine.sort(*_active_rows(league, engine))
+
+
+def group_standings(league, groups):
+    """Table of every group, counting only the matches tagged with it.
+
+    Results against teams of another group stay in the league table but
+    not in the group ones. All groups come from one aggregation grouped by
+    (group_id, team_id), or one replay of the group matches for match-based
+    tiebreakers. Returns [(group, rows)] in group order.
+    """
+    engine = StandingsEngine.for_league(league)
+    group_ids = [group.id for group in groups]
+    teams = Team.query.filter(
+        Team.league_id == league.id,
+        Team.is_deleted == False,
+        Team.is_hidden == False,
+        Team.group_id.in_(group_ids)
+    ).all()
+
+    if engine.needs_matches:
+        # A group match has both teams in the group, so one pass serves every table
+        matches = db.session.execute(select(counted_matches_select(league, group_ids=group_ids))).all()
+        rows, extras = engine.aggregate(teams, matches)
+    else:
+        totals = aggregate_standings_sql(league, group_ids=group_ids)
+        rows, extras = [], {}
+        for team in teams:
+            stats = engine.new_row(team)
+            total = totals.get((team.group_id, team.id))
+            if total:
+                for field in STAT_FIELDS:
+                    stats[field] += int(getattr(total, field) or 0)
+            stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+            rows.append(stats)
+
+    by_group = {group_id: [] for group_id in group_ids}
+    for stats in rows:
+        by_group[stats['team'].group_id].append(stats)
+    return [(group, engine.sort(by_group[group.id], extras)) for group in groups]
+
+
+def _active_rows(league, engine):
+    """Unsorted (rows, extras) of the active teams for `engine`."""
+    if engine.needs_matches:
+        # Tiebreakers such as head-to-head are not derivable from team totals
+        teams = Team.query.filter_by(league_id=league.id, is_deleted=False, is_hidden=False).all()
+        matches = db.session.execute(select(counted_matches_select(league))).all()
+        return engine.aggregate(teams, matches)
+
+    if league.standings_signature != standings_signature(league):
+        # First read after a scoring change, a premium change or a repair
+        try:
+            rebuild_standings(league)
+            db.session.commit()
+        except IntegrityError:
+            # Another request rebuilt the rows first
+            db.session.rollback()
+
+    rows = db.session.query(Team, TeamStanding).outerjoin(
+        TeamStanding, TeamStanding.team_id == Team.id
+    ).filter(
+        Team.league_id == league.id,
+        Team.is_deleted == False,
+        Team.is_hidden == False
+    ).populate_existing().all()
+
+    standings = []
+    for team, row in rows:
+        if row:
+            stats = {field: getattr(row, field) or 0 for field in STAT_FIELDS}
+        else:
+            # Team created after the last rebuild: no results yet
+            stats = {field: 0 for field in STAT_FIELDS}
+            stats['points'] = team.manual_points_modifier or 0
+        stats['team'] = team
+        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+        standings.append(stats)
+    return standings, {}
+
+
+def standings_row(stats, position, with_team=False):
+    """JSON form of one standings entry."""
+    row = {field: stats[field] for field in STAT_FIELDS}
+    row['goal_difference'] = stats['goal_difference']
+    row['team_id'] = stats['team'].id
+    row['position'] = position
+    if with_team:
+        row['name'] = stats['team'].name
+        row['shield_url'] = stats['team'].shield_url
+    return row
+
+
+def standings_changes(before, after, leaders=5):
+    """What a write changed between two standings lists, for patching a page in place.
+
+    `rows` holds every team whose stats or position changed, `order` the new
+    team order, and `leaders` the top rows when the top changed (else None).
+    """
+    old_rows = {s['team'].id: standings_row(s, i) for i, s in enumerate(before, start=1)}
+    new_rows = [standings_row(s, i) for i, s in enumerate(after, start=1)]
+
+    top_before = [old_rows[s['team'].id] for s in before[:leaders]]
+    top_after = new_rows[:leaders]
+    return {
+        'rows': [row for row in new_rows if old_rows.get(row['team_id']) != row],
+        'order': [row['team_id'] for row in new_rows],
+        'leaders': [standings_row(s, i, with_team=True) for i, s in enumerate(after[:leaders], start=1)]
+                   if top_before != top_after else None
+    }
+
+
+def _add_to_row(league_id, team_id, diff):
+    """Atomically add a counter delta to a team's row, creating it if missing."""
+    values = {getattr(TeamStanding, field): getattr(TeamStanding, field) + d for field, d in zip(STAT_FIELDS, diff)}
+    updated = TeamStanding.query.filter_by(team_id=team_id).update(values, synchronize_session=False)
+    if not updated:
+        team = Team.query.get(team_id)
+        row = TeamStanding(league_id=league_id, team_id=team_id, **dict(zip(STAT_FIELDS, diff)))
+        row.points += (team.manual_points_modifier or 0) if team else 0
+        db.session.add(row)
+
+
+def adjust_manual_points(team, points):
+    """Mirror a change of `manual_points_modifier` in the persisted row."""
+    if team.league.standings_signature != standings_signature(team.league):
+        return
+    TeamStanding.query.filter_by(team_id=team.id).update(
+        {TeamStanding.points: TeamStanding.points + points}, synchronize_session=False)
+
+
+class StandingsDelta:
+    """Keeps the persisted standings current across a write.
+
+    Call `capture()` for every team pair whose matches are about to change
+    (before touching them), then `apply()` before committing. Only the
+    matches of the captured pairs are re-read, so a result costs O(pair)
+    instead of a full recomputation. The pair is the unit because free
+    leagues only count the first match of each pair. The Elo ratings of the
+    captured pairs are kept current on the way (see RatingDelta).
+    """
+
+    def __init__(self, league):
+        self.league = league
+        self._before = {}
+        self._ratings = RatingDelta(league)
+
+    def capture(self, home_team_id, away_team_id):
+        if not home_team_id or not away_team_id or home_team_id == away_team_id:
+            return
+        pair = tuple(sorted([str(home_team_id), str(away_team_id)]))
+        self._ratings.capture(pair)
+        if pair not in self._before:
+            self._before[pair] = self._pair_contribution(pair)
+
+    def apply(self):
+        self._ratings.apply()
+        if not self._before:
+            return
+        if self.league.standings_signature != standings_signature(self.league):
+            # Rows are stale already; the next read rebuilds them
+            return
+
+        db.session.flush()
+        totals = {}
+        for pair, before in self._before.items():
+            after = self._pair_contribution(pair)
+            for team_id in pair:
+                old = before.get(team_id, [0] * len(STAT_FIELDS))
+                new = after.get(team_id, [0] * len(STAT_FIELDS))
+                total = totals.setdefault(team_id, [0] * len(STAT_FIELDS))
+                for i in range(len(STAT_FIELDS)):
+                    total[i] += new[i] - old[i]
+
+        for team_id, diff in totals.items():
+            if any(diff):
+                _add_to_row(self.league.id, team_id, diff)
+        self._before = {}
+
+    def _pair_contribution(self, pair):
+        team_a, team_b = pair
+        matches = counted_matches_query(self.league.id).filter(or_(
+            and_(Match.home_team_id == team_a, Match.away_team_id == team_b),
+            and_(Match.home_team_id == team_b, Match.away_team_id == team_a)
+        )).order_by(Match.match_date, Match.id)
+
+        if not self.league.owner.is_active_premium:
+            matches = matches.limit(1)
+
+        win_points, draw_points = scoring_rules(self.league)
+        totals = {}
+        for match in matches:
+            for team_id, row in match_contribution(match, win_points, draw_points, self.league.enable_shutdown_tiebreaker).items():
+                total = totals.setdefault(team_id, [0] * len(STAT_FIELDS))
+                for i, value in enumerate(row):
+                    total[i] += value
+        return totals
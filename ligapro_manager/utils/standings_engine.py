@@ -0,0 +1,251 @@
+"""Single-pass standings engine.
+
+Every counted match is visited once and folded into per-team accumulators,
+so building a table costs O(matches + teams) instead of O(teams x matches).
+The table is then ordered by a configurable chain of tiebreak rules.
+
+The module only needs objects exposing the attributes used below, so it can
+run on ORM rows, lightweight query rows or synthetic data (see benchmarks/).
+"""
+from itertools import groupby
+
+# Available tiebreak rules, in the order they are usually applied
+TIEBREAK_RULES = ('points', 'goal_difference', 'goals_for', 'head_to_head', 'shutdown_wins', 'manual_modifier')
+
+# Current ordering of the league table
+DEFAULT_TIEBREAKERS = ('points', 'goal_difference', 'goals_for')
+
+# Labels shown in the league settings
+TIEBREAK_LABELS = {
+    'points': 'Puntos',
+    'goal_difference': 'Diferencia de goles',
+    'goals_for': 'Goles a favor',
+    'head_to_head': 'Enfrentamiento directo',
+    'shutdown_wins': 'Victorias en shutdown',
+    'manual_modifier': 'Ajuste manual de puntos',
+}
+
+# Rules that need per-match data beyond the persisted team totals
+MATCH_RULES = ('head_to_head', 'shutdown_wins')
+
+
+def parse_tiebreakers(value):
+    """Tiebreak chain from a comma separated string or sequence.
+
+    Unknown and repeated rules are dropped and points always rank first.
+    """
+    rules = value.split(',') if isinstance(value, str) else list(value or ())
+    chain = ['points']
+    for rule in (rule.strip() for rule in rules):
+        if rule in TIEBREAK_RULES and rule not in chain:
+            chain.append(rule)
+    return tuple(chain)
+
+
+class StandingsEngine:
+    """Aggregates matches into a sorted standings table.
+
+    `tiebreakers` is an ordered sequence of names from TIEBREAK_RULES.
+    """
+
+    def __init__(self, win_points=3, draw_points=1, shutdown_enabled=False, tiebreakers=DEFAULT_TIEBREAKERS):
+        unknown = [rule for rule in tiebreakers if rule not in TIEBREAK_RULES]
+        if unknown:
+            raise ValueError(f"Unknown tiebreak rules: {', '.join(unknown)}")
+        self.win_points = win_points
+        self.draw_points = draw_points
+        self.shutdown_enabled = bool(shutdown_enabled)
+        self.tiebreakers = tuple(tiebreakers)
+
+    @classmethod
+    def for_league(cls, league):
+        """Engine configured with the league's scoring and tiebreak chain."""
+        from utils.standings import scoring_rules, tiebreak_rules
+
+        win_points, draw_points = scoring_rules(league)
+        return cls(win_points, draw_points, league.enable_shutdown_tiebreaker, tiebreak_rules(league))
+
+    @property
+    def needs_pair_index(self):
+        return 'head_to_head' in self.tiebreakers
+
+    @property
+    def needs_matches(self):
+        return any(rule in MATCH_RULES for rule in self.tiebreakers)
+
+    def new_row(self, team):
+        return {
+            'team': team,
+            'played': 0,
+            'won': 0,
+            'drawn': 0,
+            'lost': 0,
+            'goals_for': 0,
+            'goals_against': 0,
+            'goal_difference': 0,
+            'points': (team.manual_points_modifier or 0)
+        }
+
+    def aggregate(self, teams, matches):
+        """Fold `matches` into one row per team in a single pass.
+
+        Returns (rows, extras) where rows keeps the order of `teams` and
+        extras maps team_id -> {'shutdown_wins': n}. Matches against teams
+        outside `teams` still count for the side that is listed.
+        """
+        rows, by_id, extras = self._start(teams)
+        self._replay(matches, by_id, extras)
+        self._finish(rows)
+        return rows, extras
+
+    def timeline(self, teams, matches, step_key):
+        """Replay chronologically sorted `matches` once, yielding (step, table) after each step.
+
+        Consecutive matches with the same `step_key(match)` form one step, so
+        every prefix of the season costs only its own matches plus a sort.
+        """
+        rows, by_id, extras = self._start(teams)
+        for step, step_matches in groupby(matches, key=step_key):
+            self._replay(step_matches, by_id, extras)
+            self._finish(rows)
+            # Copies, since the accumulators keep changing on the next step
+            yield step, self.sort([dict(row) for row in rows], extras)
+
+    def _start(self, teams):
+        rows = [self.new_row(team) for team in teams]
+        by_id = {row['team'].id: row for row in rows}
+        extras = {team_id: {'shutdown_wins': 0} for team_id in by_id}
+        self.pair_index = {} if self.needs_pair_index else None
+        return rows, by_id, extras
+
+    def _replay(self, matches, by_id, extras):
+        for match in matches:
+            home = by_id.get(match.home_team_id)
+            away = by_id.get(match.away_team_id)
+            if home is None and away is None:
+                continue
+            home_points, away_points = self._fold(match, home, away, extras)
+
+            if self.pair_index is not None:
+                self._index_pair(match, home_points, away_points)
+
+    def _finish(self, rows):
+        for row in rows:
+            row['goal_difference'] = row['goals_for'] - row['goals_against']
+
+    def _fold(self, match, home, away, extras):
+        home_score = match.home_score or 0
+        away_score = match.away_score or 0
+
+        if home_score > away_score:
+            home_points, away_points = self.win_points, 0
+            result = ('won', 'lost')
+        elif home_score < away_score:
+            home_points, away_points = 0, self.win_points
+            result = ('lost', 'won')
+        else:
+            result = ('drawn', 'drawn')
+            winner_id = match.shutdown_winner_id if self.shutdown_enabled else None
+            if winner_id:
+                home_points = 2 if winner_id == match.home_team_id else 1
+                away_points = 2 if winner_id == match.away_team_id else 1
+                if winner_id in extras:
+                    extras[winner_id]['shutdown_wins'] += 1
+            else:
+                home_points = away_points = self.draw_points
+
+        for row, gf, ga, points, outcome in ((home, home_score, away_score, home_points, result[0]),
+                                             (away, away_score, home_score, away_points, result[1])):
+            if row is None:
+                continue
+            row['played'] += 1
+            row['goals_for'] += gf
+            row['goals_against'] += ga
+            row['points'] += points
+            row[outcome] += 1
+        return home_points, away_points
+
+    def _index_pair(self, match, home_points, away_points):
+        """Accumulate the result from each side's point of view (head-to-head)."""
+        for team_id, rival_id, points, gf, ga in (
+                (match.home_team_id, match.away_team_id, home_points, match.home_score or 0, match.away_score or 0),
+                (match.away_team_id, match.home_team_id, away_points, match.away_score or 0, match.home_score or 0)):
+            entry = self.pair_index.setdefault((team_id, rival_id), [0, 0, 0])
+            entry[0] += points
+            entry[1] += gf
+            entry[2] += ga
+
+    def sort(self, rows, extras=None):
+        """Order rows by the tiebreak chain (descending, stable)."""
+        extras = extras or {}
+        groups = [list(rows)]
+        for rule in self.tiebreakers:
+            refined = []
+            for group in groups:
+                if len(group) < 2:
+                    refined.append(group)
+                elif rule == 'head_to_head':
+                    refined.extend(self._head_to_head_runs(group))
+                else:
+                    refined.extend(self._tied_runs(group, self._rule_values(rule, group, extras)))
+            groups = refined
+        return [row for group in groups for row in group]
+
+    @staticmethod
+    def _tied_runs(group, values):
+        """Sort `group` by `values` and split it into runs that are still tied."""
+        group.sort(key=lambda row: values[row['team'].id], reverse=True)
+        runs = [[group[0]]]
+        for row in group[1:]:
+            if values[row['team'].id] == values[runs[-1][-1]['team'].id]:
+                runs[-1].append(row)
+            else:
+                runs.append([row])
+        return runs
+
+    def _head_to_head_runs(self, group):
+        """Split a tied group by its mini-table (points, goal difference, goals for).
+
+        The mini-table only counts matches between the tied teams, read from
+        the pair index. When it separates some teams but leaves a smaller
+        tie, that tie gets a mini-table of its own; ties it cannot break are
+        left for the next rules of the chain.
+        """
+        ids = [row['team'].id for row in group]
+        pair_index = getattr(self, 'pair_index', None) or {}
+        table = {}
+        for team_id in ids:
+            points = goals_for = goals_against = 0
+            for rival_id in ids:
+                entry = pair_index.get((team_id, rival_id))
+                if entry is not None:
+                    points += entry[0]
+                    goals_for += entry[1]
+                    goals_against += entry[2]
+            table[team_id] = (points, goals_for - goals_against, goals_for)
+
+        runs = []
+        for run in self._tied_runs(group, table):
+            if 1 < len(run) < len(group):
+                runs.extend(self._head_to_head_runs(run))
+            else:
+                runs.append(run)
+        return runs
+
+    def _rule_values(self, rule, group, extras):
+        if rule == 'points':
+            return {row['team'].id: row['points'] for row in group}
+        if rule == 'goal_difference':
+            return {row['team'].id: row['goal_difference'] for row in group}
+        if rule == 'goals_for':
+            return {row['team'].id: row['goals_for'] for row in group}
+        if rule == 'shutdown_wins':
+            return {row['team'].id: extras.get(row['team'].id, {}).get('shutdown_wins', 0) for row in group}
+        if rule == 'manual_modifier':
+            return {row['team'].id: row['team'].manual_points_modifier or 0 for row in group}
+        raise ValueError(f"Unknown tiebreak rule: {rule}")
+
+    def standings(self, teams, matches):
+        """Aggregate and sort in one call."""
+        rows, extras = self.aggregate(teams, matches)
+        return self.sort(rows, extras)
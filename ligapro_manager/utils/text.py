@@ -0,0 +1,9 @@
+import unicodedata
+
+
+def normalize_name(name):
+    """Normalize name by removing accents and converting to lowercase."""
+    if not name:
+        return ""
+    return ''.join(c for c in unicodedata.normalize('NFD', name)
+                  if unicodedata.category(c) != 'Mn').lower().strip()
@@ -0,0 +1,148 @@
+"""What-if standings: the table after hypothetical results, computed in memory.
+
+The counted results, the current totals and the pending fixtures of a league
+are loaded once per revision (see `what_if_base`, cached with league_cached)
+as plain data. Each request only folds its hypothetical scores into copies of
+the totals and re-sorts them with the league's StandingsEngine, so nothing is
+read from or written to the database while the user types.
+"""
+from collections import namedtuple
+from sqlalchemy import select, or_
+from extensions import db
+from models import Match
+from utils.helpers import calculate_standings
+from utils.standings import STAT_FIELDS, counted_matches_select, match_contribution, standings_row
+from utils.standings_engine import StandingsEngine
+
+# Stand-ins for Team and Match rows, safe to share across requests
+TeamInfo = namedtuple('TeamInfo', 'id name shield_url manual_points_modifier')
+MatchResult = namedtuple('MatchResult', 'id home_team_id away_team_id home_score away_score shutdown_winner_id match_date')
+
+
+class WhatIfError(ValueError):
+    """A hypothetical result that cannot be applied; the message is shown to the user."""
+
+
+def _pair(home_team_id, away_team_id):
+    return tuple(sorted((home_team_id, away_team_id)))
+
+
+def what_if_base(league):
+    """Plain data the calculator starts from: current table, counted results, pending fixtures."""
+    standings = []
+    for stats in calculate_standings(league.id):
+        team = stats['team']
+        row = {field: stats[field] for field in STAT_FIELDS}
+        row['goal_difference'] = stats['goal_difference']
+        row['team'] = TeamInfo(team.id, team.name, team.shield_url, team.manual_points_modifier or 0)
+        standings.append(row)
+
+    counted = [MatchResult(*m) for m in db.session.execute(select(counted_matches_select(league))).all()]
+
+    team_ids = [row['team'].id for row in standings]
+    pending = Match.query.with_entities(
+        Match.id, Match.home_team_id, Match.away_team_id, Match.match_date
+    ).filter(
+        Match.league_id == league.id,
+        or_(Match.stage == 'regular', Match.stage == None, Match.stage == ''),
+        Match.is_completed == False,
+        Match.is_practice == False,
+        Match.home_team_id.in_(team_ids),
+        Match.away_team_id.in_(team_ids)
+    ).order_by(Match.match_date, Match.id).all()
+
+    return {
+        'standings': standings,
+        'counted': counted,
+        # Free leagues count only the first match of a pair (see counted_matches_select)
+        'first_of_pair': {} if league.owner.is_active_premium else
+                         {_pair(m.home_team_id, m.away_team_id): m for m in counted},
+        'pending': {m.id: {'id': m.id, 'home_team_id': m.home_team_id, 'away_team_id': m.away_team_id,
+                           'match_date': m.match_date} for m in pending}
+    }
+
+
+def _hypothetical_matches(league, base, results):
+    """MatchResult rows for the submitted scores; entries with an empty score are skipped."""
+    matches = []
+    for result in results:
+        fixture = base['pending'].get(str(result.get('match_id')))
+        if fixture is None:
+            raise WhatIfError('El partido no está pendiente en esta liga.')
+        if result.get('home_score') in (None, '') or result.get('away_score') in (None, ''):
+            continue
+        try:
+            home_score, away_score = int(result['home_score']), int(result['away_score'])
+        except (TypeError, ValueError):
+            raise WhatIfError('Marcador inválido.')
+        if home_score < 0 or away_score < 0:
+            raise WhatIfError('Marcador inválido.')
+
+        shutdown_winner_id = result.get('shutdown_winner_id')
+        if not (league.enable_shutdown_tiebreaker and home_score == away_score
+                and shutdown_winner_id in (fixture['home_team_id'], fixture['away_team_id'])):
+            shutdown_winner_id = None
+        matches.append(MatchResult(fixture['id'], fixture['home_team_id'], fixture['away_team_id'],
+                                   home_score, away_score, shutdown_winner_id, fixture['match_date']))
+    return matches
+
+
+def _replacements(league, base, hypothetical):
+    """(dropped, added): counted results a hypothetical displaces and the hypotheticals that count."""
+    if league.owner.is_active_premium:
+        return [], hypothetical
+
+    # Free league: per pair, only the earliest of the counted result and the hypotheticals counts
+    candidates = {}
+    for match in hypothetical:
+        candidates.setdefault(_pair(match.home_team_id, match.away_team_id), []).append(match)
+
+    dropped, added = [], []
+    for pair, matches in candidates.items():
+        current = base['first_of_pair'].get(pair)
+        first = min(matches + ([current] if current else []), key=lambda m: (m.match_date, m.id))
+        if first is not current:
+            added.append(first)
+            if current:
+                dropped.append(current)
+    return dropped, added
+
+
+def what_if_standings(league, base, results):
+    """Standings rows (JSON form) after applying `results` to `base` in memory.
+
+    `results` is a list of {"match_id", "home_score", "away_score",
+    "shutdown_winner_id"} for pending matches. Each row carries its current
+    position as `previous_position`.
+    """
+    engine = StandingsEngine.for_league(league)
+    dropped, added = _replacements(league, base, _hypothetical_matches(league, base, results))
+
+    if engine.needs_matches:
+        # Head-to-head and shutdown wins need the individual results: replay them (still no queries)
+        dropped_ids = {m.id for m in dropped}
+        matches = [m for m in base['counted'] if m.id not in dropped_ids] + added
+        teams = [row['team'] for row in base['standings']]
+        standings = engine.standings(teams, matches)
+    else:
+        rows = {row['team'].id: dict(row) for row in base['standings']}
+        win_points, draw_points = engine.win_points, engine.draw_points
+        for sign, matches in ((-1, dropped), (1, added)):
+            for match in matches:
+                for team_id, diff in match_contribution(match, win_points, draw_points, engine.shutdown_enabled).items():
+                    row = rows.get(team_id)
+                    if row is None:
+                        continue
+                    for field, value in zip(STAT_FIELDS, diff):
+                        row[field] += sign * value
+        for row in rows.values():
+            row['goal_difference'] = row['goals_for'] - row['goals_against']
+        standings = engine.sort(list(rows.values()))
+
+    previous = {row['team'].id: i for i, row in enumerate(base['standings'], start=1)}
+    table = []
+    for position, stats in enumerate(standings, start=1):
+        row = standings_row(stats, position, with_team=True)
+        row['previous_position'] = previous.get(row['team_id'])
+        table.append(row)
+    return table